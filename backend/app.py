@@ -1,14 +1,41 @@
 import os
 import json
+import asyncio
+import logging
+import shutil
+import hashlib
+import weakref
+import tempfile
+import mimetypes
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import AsyncIterator, Optional, Tuple
 
 from backend.graph.agent import stream_chat_response
+from backend.graph.resumable_stream import start_turn, get_turn, parse_event_id
 from backend.skills.skills_manager import SkillsManager
+from backend.memory.memory_consolidator import start_consolidation_scheduler
+from backend.warmup import STARTUP_WARMUP, run_warmup, start_keepalive, warmup_state
 
-app = FastAPI(title="Mini-OpenClaw API", version="0.1.0")
+# Module loggers (e.g. turn cancellations) go to stderr next to uvicorn's own output
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(levelname)s:     %(name)s: %(message)s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Periodic near-duplicate compaction of long-term memory (MEMORY_CONSOLIDATE_INTERVAL)
+    start_consolidation_scheduler()
+    # Keep local Ollama models loaded (OLLAMA_KEEPALIVE_PING_SECONDS)
+    start_keepalive()
+    # Preload models, indexes and skills in the background; /api/ready reports when it's done
+    warmup = asyncio.create_task(run_warmup()) if STARTUP_WARMUP else None
+    yield
+    if warmup:
+        warmup.cancel()
+
+app = FastAPI(title="Mini-OpenClaw API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,9 +43,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the validators and resume ids they are sent
+    expose_headers=["ETag", "Content-Range", "X-Turn-Id"],
 )
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Largest body PUT /api/files accepts
+FILE_UPLOAD_MAX_BYTES = int(float(os.getenv("FILE_UPLOAD_MAX_MB", "100")) * 1024 * 1024)
+# One lock per file being written, held from the If-Match check to the rename
+_path_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
 
 class ChatRequest(BaseModel):
     message: str
@@ -30,39 +63,167 @@ class FileSaveRequest(BaseModel):
     content: str
 
 @app.post("/api/chat")
-async def chat_endpoint(req: ChatRequest):
+async def chat_endpoint(req: ChatRequest, request: Request):
     # Depending on requirements, SSE streaming is typically sent via text/event-stream
     if req.stream:
+        # A reconnect carrying Last-Event-ID resumes the detached turn instead of re-running it
+        resume = parse_event_id(request.headers.get("last-event-id"))
+        if resume:
+            return resume_turn_response(*resume, req.session_id)
         # Note: stream_chat_response yields string chunks prefixed with "data: "
-        return StreamingResponse(stream_chat_response(req.message, req.session_id), media_type="text/event-stream")
+        run = start_turn(stream_chat_response(req.message, req.session_id), req.session_id)
+        return StreamingResponse(run.subscribe(), media_type="text/event-stream", headers={"X-Turn-Id": run.turn_id})
     else:
         # For non-streaming (not fully implemented in backend yet, fallback)
         return {"error": "Non-streaming not fully implemented in MVP"}
 
+@app.get("/api/chat/stream/{turn_id}")
+async def resume_chat_stream(turn_id: str, session_id: str, request: Request, last_event_id: Optional[str] = None):
+    """Resumes a turn's event stream (EventSource reconnects send Last-Event-ID automatically).
+
+    `session_id` must be the session the turn was started for.
+    """
+    resume = parse_event_id(request.headers.get("last-event-id") or last_event_id)
+    return resume_turn_response(turn_id, resume[1] if resume and resume[0] == turn_id else 0, session_id)
+
+def resume_turn_response(turn_id: str, after_seq: int, session_id: str):
+    # A turn of another session is answered exactly like an expired one
+    run = get_turn(turn_id, session_id)
+    if run is None:
+        async def expired():
+            yield "data: Error: this response stream has expired; send the message again to start a new turn.\n\n"
+        return StreamingResponse(expired(), media_type="text/event-stream")
+    return StreamingResponse(run.subscribe(after_seq), media_type="text/event-stream", headers={"X-Turn-Id": run.turn_id})
+
+def _backend_path(path: str) -> Optional[str]:
+    """Absolute path of a file under the backend directory; None if `path` escapes it."""
+    backend_dir = os.path.join(PROJECT_ROOT, "backend")
+    full_path = os.path.abspath(os.path.join(backend_dir, path))
+    if os.path.commonpath([full_path, backend_dir]) != backend_dir:
+        return None
+    return full_path
+
+def _file_etag(stat_result: os.stat_result) -> str:
+    # Same validator FileResponse derives, so If-Range checks against it too
+    etag_base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    return f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
 @app.get("/api/files")
-async def get_file(path: str):
-    """Reads a file relative to backend directory (e.g. memory/MEMORY.md)."""
-    full_path = os.path.join(PROJECT_ROOT, "backend", path)
-    if not os.path.exists(full_path):
+async def get_file(path: str, request: Request, format: str = "json"):
+    """Reads a file relative to backend directory (e.g. memory/MEMORY.md).
+
+    Returns {"content": ...} with an ETag; If-None-Match answers 304 when unchanged.
+    `format=raw` streams the file itself instead, with Range requests getting partial content.
+    """
+    full_path = _backend_path(path)
+    if not full_path or not os.path.isfile(full_path):
         return {"error": f"File {path} not found."}
-    with open(full_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    return {"content": content}
+    stat_result = os.stat(full_path)
+    etag = _file_etag(stat_result)
+    headers = {"etag": etag, "cache-control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if format != "raw":
+        with open(full_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        return JSONResponse({"content": content}, headers=headers)
+    media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+    if media_type.startswith("text/") or media_type == "application/json":
+        media_type += "; charset=utf-8"
+    return FileResponse(full_path, stat_result=stat_result, media_type=media_type, headers=headers)
 
-@app.post("/api/files")
-async def save_file(req: FileSaveRequest):
-    """Saves content to a file relative to backend directory."""
-    full_path = os.path.join(PROJECT_ROOT, "backend", req.path)
+async def _write_atomically(full_path: str, chunks: AsyncIterator[bytes], if_match: Optional[str] = None) -> Optional[Tuple[int, str]]:
+    """Streams chunks into a temp file next to the target, then renames it into place.
+
+    Returns the size and ETag written. With `if_match`, the file is only replaced if it still
+    has one of those ETags when the body is complete; otherwise nothing is written and None returned.
+    """
     os.makedirs(os.path.dirname(full_path), exist_ok=True)
-    with open(full_path, "w", encoding="utf-8") as f:
-        f.write(req.content)
-    
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), prefix=".upload-")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > FILE_UPLOAD_MAX_BYTES:
+                    raise ValueError(f"upload exceeds {FILE_UPLOAD_MAX_BYTES} bytes")
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        lock = _path_locks.setdefault(full_path, asyncio.Lock())
+        async with lock:
+            exists = os.path.isfile(full_path)
+            if if_match and not (exists and _etag_matches(if_match, _file_etag(os.stat(full_path)))):
+                os.remove(tmp_path)
+                return None
+            if exists:
+                shutil.copymode(full_path, tmp_path)
+            else:
+                os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, full_path)
+            etag = _file_etag(os.stat(full_path))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, etag
+
+def _after_file_saved(path: str):
     # If a skill changed, we might want to regenerate snapshot
-    if "SKILL.md" in req.path:
+    if "SKILL.md" in path:
         SkillsManager.generate_snapshot()
-        
+    # MEMORY.md is a view of the memory store; import the edit so the next render keeps it
+    if os.path.normpath(path) == os.path.join("memory", "MEMORY.md"):
+        from backend.memory.memory_store import get_memory_store
+        get_memory_store().sync_markdown()
+
+@app.post("/api/files")
+async def save_file(req: FileSaveRequest):
+    """Saves content to a file relative to backend directory."""
+    full_path = _backend_path(req.path)
+    if not full_path:
+        return {"error": f"Access denied to {req.path}."}
+
+    async def content():
+        yield req.content.encode("utf-8")
+
+    await _write_atomically(full_path, content())
+    await asyncio.to_thread(_after_file_saved, req.path)
     return {"status": "success"}
 
+@app.put("/api/files")
+async def upload_file(path: str, request: Request):
+    """Streams the raw request body into a file relative to backend directory.
+
+    The file is replaced atomically once the whole body has arrived. An If-Match
+    header makes the write conditional on the file still having that ETag; it is
+    checked before the body is read and again, under the file's lock, before the rename.
+    """
+    full_path = _backend_path(path)
+    if not full_path:
+        return JSONResponse({"error": f"Access denied to {path}."}, status_code=403)
+    if_match = request.headers.get("if-match")
+    modified = JSONResponse({"error": f"File {path} was modified since it was read."}, status_code=412)
+    if if_match:
+        current = _file_etag(os.stat(full_path)) if os.path.isfile(full_path) else None
+        if not current or not _etag_matches(if_match, current):
+            return modified
+    try:
+        written = await _write_atomically(full_path, request.stream(), if_match)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+    if written is None:
+        return modified
+    size, etag = written
+    await asyncio.to_thread(_after_file_saved, path)
+    return JSONResponse({"status": "success", "bytes": size, "etag": etag}, headers={"etag": etag})
+
 @app.get("/api/sessions")
 async def list_sessions():
     """Lists all available session JSON files."""
@@ -72,6 +233,31 @@ async def list_sessions():
     files = [f for f in os.listdir(sessions_dir) if f.endswith(".json")]
     return {"sessions": files}
 
+@app.get("/api/ready")
+async def readiness():
+    """Readiness probe: 503 until the startup warm-up has finished, with per-step timings."""
+    return JSONResponse(warmup_state, status_code=200 if warmup_state["ready"] else 503)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Per-route model usage/latency, per-provider health, turn cancellations, skill selection and cache footprints."""
+    from backend.graph.model_router import route_stats
+    from backend.graph.llm_pool import pool_stats
+    from backend.graph.run_metrics import run_metrics
+    from backend.tools.tool_cache import tool_cache_stats
+    from backend.memory.history_cache import history_cache
+    from backend.memory.memory_retriever import get_query_embeddings
+    from backend.skills.skills_manager import SkillsManager
+    return {
+        "model_routes": route_stats(),
+        "llm_providers": pool_stats(),
+        "runs": run_metrics(),
+        "skill_selection": SkillsManager.selection_stats(),
+        "tool_cache": tool_cache_stats(),
+        "session_cache": history_cache.stats(),
+        "query_embeddings": get_query_embeddings().stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     # Make sure to run the server efficiently
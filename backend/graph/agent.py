@@ -1,5 +1,8 @@
 import os
-from typing import AsyncGenerator
+import time
+import asyncio
+import logging
+from typing import AsyncGenerator, List
 from dotenv import load_dotenv
 
 # Load `.env` from the project root
@@ -10,7 +13,7 @@ load_dotenv(os.path.join(PROJECT_ROOT, ".env"))
 from langchain.agents import create_agent
 from langchain_openai import ChatOpenAI
 from langchain_ollama import ChatOllama
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, BaseMessageChunk, HumanMessage, SystemMessage, ToolMessage, message_chunk_to_message
 
 from backend.tools import (
     terminal_tool,
@@ -19,22 +22,30 @@ from backend.tools import (
     read_file_tool,
     write_file_tool,
     add_memory_tool,
-    search_knowledge_base_tool
+    search_knowledge_base_tool,
+    load_skill_tool,
+    read_pdf_tool,
+    read_output_tool,
+    search_files_tool
 )
+from backend.graph.llm_pool import HedgedChatModel
+from backend.graph.model_router import get_model
+from backend.graph.run_metrics import turn_metrics
 from backend.memory.prompt_manager import build_system_prompt
 from backend.skills.skills_manager import SkillsManager
-from backend.memory.session_manager import SessionManager
+from backend.memory.session_manager import SessionManager, current_session_id
+from backend.tools.process_registry import kill_session_processes
 
-def get_llm():
-    """Initializes the LLM based on environment variables."""
-    model_type = os.getenv("MODEL_TYPE", "openai").lower()
-    default_model = os.getenv("DEFAULT_MODEL", "gpt-5")
-    
+logger = logging.getLogger(__name__)
+
+def _build_provider(model_type: str):
+    """Builds the chat model for one provider name (ollama, deepseek, dashscope, google, openai)."""
     if model_type == "ollama":
         return ChatOllama(
             model=os.getenv("OLLAMA_MODEL", "qwen3:8b"),
             base_url=os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434"),
             temperature=0.2,
+            keep_alive=int(os.getenv("OLLAMA_KEEP_ALIVE_SECONDS", "1800")),
         )
     elif model_type == "deepseek":
         return ChatOpenAI(
@@ -69,10 +80,22 @@ def get_llm():
             streaming=True
         )
 
+def get_llm():
+    """Initializes the LLM based on environment variables.
+
+    With several providers in `LLM_PROVIDERS`, returns a hedged pool over them
+    (see backend/graph/llm_pool.py); otherwise just the `MODEL_TYPE` provider.
+    """
+    model_type = os.getenv("MODEL_TYPE", "openai").lower()
+    names = [n.strip().lower() for n in os.getenv("LLM_PROVIDERS", "").split(",") if n.strip()]
+    if len(names) < 2:
+        return _build_provider(names[0] if names else model_type)
+    return HedgedChatModel(providers=[(name, _build_provider(name)) for name in names])
+
 def get_mini_openclaw_agent(query: str = ""):
     """Builds and returns the agent executable graph."""
     
-    llm = get_llm()
+    llm = get_model("chat")
     
     # Bind Core Tools
     tools = [
@@ -81,7 +104,11 @@ def get_mini_openclaw_agent(query: str = ""):
         fetch_url_tool,
         read_file_tool,
         write_file_tool,
-        search_knowledge_base_tool
+        search_knowledge_base_tool,
+        load_skill_tool,
+        read_pdf_tool,
+        read_output_tool,
+        search_files_tool
     ]
     
     # Dynamic prompt building
@@ -98,7 +125,10 @@ def get_mini_openclaw_agent(query: str = ""):
 
 async def stream_chat_response(message: str, session_id: str) -> AsyncGenerator[str, None]:
     """Streams the agent thought process and final response via langgraph streaming."""
-    agent_graph = get_mini_openclaw_agent(query=message)
+    current_session_id.set(session_id)
+    # Prompt building embeds the query for skill and memory retrieval; off the event loop,
+    # concurrent turns overlap there and their embedding calls are batched together
+    agent_graph = await asyncio.to_thread(get_mini_openclaw_agent, message)
     session_manager = SessionManager(session_id)
     
     # Load past history 
@@ -111,19 +141,40 @@ async def stream_chat_response(message: str, session_id: str) -> AsyncGenerator[
     inputs = {"messages": history + [("user", message)]}
     
     new_messages = []
+    # Text of the answer currently being streamed, kept in case the turn is cancelled mid-call
+    partial_answer = []
+    in_llm_call = False
+    started = time.monotonic()
     
     try:
         final_state = None
         # Stream events to capture Thoughts (Tool calls) and final AI response
         async for event in agent_graph.astream_events(inputs, version="v2"):
             kind = event["event"]
+            if kind.startswith("on_chat_model") and event["metadata"].get("langgraph_node") != "model":
+                # A model called inside a tool inherits the run's callbacks; its output isn't the answer
+                continue
             
-            if kind == "on_chat_model_stream":
+            if kind == "on_chat_model_start":
+                in_llm_call = True
+                partial_answer = []
+                
+            elif kind == "on_chat_model_stream":
                 chunk = event["data"]["chunk"]
                 if chunk.content:
+                    partial_answer.append(chunk.content)
                     # AI answering stream
                     yield f"data: {chunk.content}\n\n"
                     
+            elif kind == "on_chat_model_end":
+                in_llm_call = False
+                partial_answer = []
+                output = event["data"].get("output")
+                if isinstance(output, BaseMessageChunk):
+                    output = message_chunk_to_message(output)
+                if isinstance(output, BaseMessage):
+                    new_messages.append(output)
+                    
             elif kind == "on_tool_start":
                 tool_name = event["name"]
                 # Stream out what tool is being used
@@ -131,13 +182,44 @@ async def stream_chat_response(message: str, session_id: str) -> AsyncGenerator[
                 
             elif kind == "on_tool_end":
                 tool_name = event["name"]
+                output = event["data"].get("output")
+                if isinstance(output, ToolMessage):
+                    new_messages.append(output)
                 yield f"data: [THOUGHT] Finished tool: {tool_name}\n\n"
                 
             elif kind == "on_chain_end" and not event.get("parent_ids"):
                 final_state = event["data"].get("output")
                 
         if final_state and "messages" in final_state:
-            session_manager.save_history(final_state["messages"])
+            # Saving may summarize old turns with the LLM; keep the event loop serving other turns meanwhile
+            await asyncio.to_thread(session_manager.save_history, final_state["messages"])
+        turn_metrics.record_completed(time.monotonic() - started)
+        
+    except asyncio.CancelledError:
+        # The client went away and the turn was abandoned: stop the tools it started and
+        # keep the part of the exchange that is consistent
+        killed = kill_session_processes(session_id)
+        await asyncio.to_thread(
+            session_manager.save_history,
+            history + [HumanMessage(content=message)] + _consistent_messages(new_messages, "".join(partial_answer)),
+        )
+        turn_metrics.record_cancelled(time.monotonic() - started, killed, in_llm_call)
+        logger.info("Cancelled turn of session %s: killed %d tool processes", session_id, killed)
+        raise
         
     except Exception as e:
         yield f"data: Error: {str(e)}\n\n"
+
+
+def _consistent_messages(messages: List[BaseMessage], partial_answer: str) -> List[BaseMessage]:
+    """Cuts off a trailing tool-call step whose results didn't all arrive, and appends the interrupted answer if any."""
+    messages = list(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], AIMessage) and messages[i].tool_calls:
+            answered = {m.tool_call_id for m in messages[i + 1:] if isinstance(m, ToolMessage)}
+            if any(call["id"] not in answered for call in messages[i].tool_calls):
+                messages = messages[:i]
+            break
+    if partial_answer:
+        messages.append(AIMessage(content=partial_answer + "\n\n[response interrupted]"))
+    return messages
@@ -0,0 +1,275 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.chat_models import agenerate_from_stream
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Start a hedged request on the next provider when the first token hasn't arrived by then
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_MS", "2500")) / 1000
+# Consecutive failures that open a provider's circuit, and how long it stays open
+LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "3"))
+LLM_CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("LLM_CIRCUIT_COOLDOWN", "30"))
+# Providers above this rolling error rate are tried after the healthy ones
+LLM_MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))
+# Number of recent requests the rolling TTFT and error rate are computed over
+HEALTH_WINDOW = 50
+
+
+class ProviderHealth:
+    """Rolling time-to-first-token and error rate of one provider, plus its circuit breaker."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ttfts = deque(maxlen=HEALTH_WINDOW)
+        self.outcomes = deque(maxlen=HEALTH_WINDOW)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.hedges_won = 0
+        self._lock = threading.Lock()
+
+    def record_success(self, ttft: float, hedged: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.ttfts.append(ttft)
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            if hedged:
+                self.hedges_won += 1
+
+    def record_slow(self, elapsed: float):
+        # A cancelled hedge loser had no first token after `elapsed`, a lower bound on its TTFT
+        with self._lock:
+            self.ttfts.append(elapsed)
+
+    def record_failure(self):
+        with self._lock:
+            self.requests += 1
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= LLM_CIRCUIT_FAILURES:
+                self.open_until = time.monotonic() + LLM_CIRCUIT_COOLDOWN_SECONDS
+
+    def available(self) -> bool:
+        """False while the circuit is open; after the cooldown one trial request is let through."""
+        return time.monotonic() >= self.open_until
+
+    @property
+    def error_rate(self) -> float:
+        return (self.outcomes.count(False) / len(self.outcomes)) if self.outcomes else 0.0
+
+    @property
+    def median_ttft(self) -> Optional[float]:
+        if not self.ttfts:
+            return None
+        ordered = sorted(self.ttfts)
+        return ordered[len(ordered) // 2]
+
+    def degraded(self) -> bool:
+        ttft = self.median_ttft
+        return self.error_rate > LLM_MAX_ERROR_RATE or (ttft is not None and ttft > LLM_HEDGE_AFTER_SECONDS)
+
+    def stats(self) -> dict:
+        ttft = self.median_ttft
+        return {
+            "requests": self.requests,
+            "median_ttft_ms": round(ttft * 1000) if ttft is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "circuit_open": not self.available(),
+            "hedges_won": self.hedges_won,
+        }
+
+
+# Shared by every pool instance: agents (and their bound models) are rebuilt per request
+provider_health: Dict[str, ProviderHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_provider_health(name: str) -> ProviderHealth:
+    with _health_lock:
+        if name not in provider_health:
+            provider_health[name] = ProviderHealth(name)
+        return provider_health[name]
+
+
+def pool_stats() -> Dict[str, dict]:
+    return {name: health.stats() for name, health in provider_health.items()}
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model over an ordered pool of providers.
+
+    Providers are tried in configured order, healthy ones first and open
+    circuits skipped. If the first provider's first token misses the hedge
+    deadline, the next provider is started too; whichever streams first wins
+    and the other request is cancelled. Failures before the first token fail
+    over to the next provider.
+    """
+
+    providers: List[Tuple[str, Any]]
+    hedge_after: float = LLM_HEDGE_AFTER_SECONDS
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-pool"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"providers": [name for name, _ in self.providers], "hedge_after": self.hedge_after}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "HedgedChatModel":
+        return HedgedChatModel(
+            providers=[(name, model.bind_tools(tools, **kwargs)) for name, model in self.providers],
+            hedge_after=self.hedge_after,
+            callbacks=self.callbacks,
+        )
+
+    def _candidates(self) -> List[Tuple[str, Any]]:
+        available = [(name, model) for name, model in self.providers if get_provider_health(name).available()]
+        if not available:
+            # Every circuit is open: try them all rather than failing outright
+            available = list(self.providers)
+        return sorted(available, key=lambda p: get_provider_health(p[0]).degraded())
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Without streaming the whole response stands in for the first token, and a
+        # losing request can't be cancelled mid-call, so its result is just dropped
+        candidates = self._candidates()
+        executor = ThreadPoolExecutor(max_workers=len(candidates))
+        attempts = {}  # future -> (provider name, start time)
+
+        def start_next():
+            name, model = candidates.pop(0)
+            future = executor.submit(model.invoke, messages, stop=stop, config={"callbacks": []}, **kwargs)
+            attempts[future] = (name, time.monotonic())
+
+        start_next()
+        last_error = None
+        try:
+            while attempts:
+                timeout = self.hedge_after if candidates else None
+                done, _ = wait(attempts, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    name = next(iter(attempts.values()))[0]
+                    print(f"LLM provider {name} missed the {self.hedge_after:.1f}s deadline, hedging")
+                    start_next()
+                    continue
+                for future in done:
+                    name, started = attempts.pop(future)
+                    try:
+                        message = future.result()
+                    except Exception as e:
+                        get_provider_health(name).record_failure()
+                        last_error = e
+                        print(f"LLM provider {name} failed: {e}")
+                        continue
+                    get_provider_health(name).record_success(time.monotonic() - started, hedged=bool(attempts))
+                    return ChatResult(generations=[ChatGeneration(message=message)])
+                if not attempts and candidates:
+                    start_next()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise last_error or RuntimeError("No LLM provider produced a response")
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await agenerate_from_stream(self._astream(messages, stop=stop, run_manager=run_manager, **kwargs))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        candidates = self._candidates()
+        attempts = {}  # first-chunk task -> (provider name, stream, start time)
+
+        def start_next():
+            name, model = candidates.pop(0)
+            # Member callbacks are disabled so each token is reported once, by this model's run
+            stream = model.astream(messages, stop=stop, config={"callbacks": []}, **kwargs).__aiter__()
+            attempts[asyncio.ensure_future(stream.__anext__())] = (name, stream, time.monotonic())
+
+        start_next()
+        winner = None
+        last_error = None
+        try:
+            while attempts:
+                timeout = self.hedge_after if candidates else None
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    name = next(iter(attempts.values()))[0]
+                    print(f"LLM provider {name} missed the {self.hedge_after:.1f}s first-token deadline, hedging")
+                    start_next()
+                    continue
+                for task in done:
+                    name, stream, started = attempts.pop(task)
+                    try:
+                        first = task.result()
+                    except StopAsyncIteration:
+                        # A stream that ends before any token is a failed request, not a winner
+                        first = None
+                        last_error = RuntimeError(f"LLM provider {name} returned an empty stream")
+                    except Exception as e:
+                        first = None
+                        last_error = e
+                    if first is None:
+                        get_provider_health(name).record_failure()
+                        print(f"LLM provider {name} failed: {last_error}")
+                        continue
+                    get_provider_health(name).record_success(time.monotonic() - started, hedged=bool(attempts))
+                    winner = (name, stream, first)
+                    break
+                if winner:
+                    break
+                if not attempts and candidates:
+                    start_next()
+        finally:
+            # Cancel the losing (or abandoned) requests
+            for task, (name, stream, started) in attempts.items():
+                task.cancel()
+                elapsed = time.monotonic() - started
+                if elapsed >= self.hedge_after:
+                    get_provider_health(name).record_slow(elapsed)
+            for task, (_, stream, _) in list(attempts.items()):
+                try:
+                    await task
+                except BaseException:
+                    pass
+                await stream.aclose()
+
+        if winner is None:
+            raise last_error or RuntimeError("No LLM provider produced a response")
+
+        name, stream, first = winner
+        try:
+            yield ChatGenerationChunk(message=first)
+            async for chunk in stream:
+                yield ChatGenerationChunk(message=chunk)
+        except Exception:
+            # Tokens were already streamed, so this can't fail over; just count it
+            get_provider_health(name).record_failure()
+            raise
+        finally:
+            await stream.aclose()
@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Dict
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Call purposes that can be routed to their own model tier
+PURPOSES = ("chat", "summarize", "synthesize")
+
+# Latency budget per purpose when MODEL_ROUTE_<PURPOSE>_BUDGET_MS is unset; with a multi-tier
+# route, the next tier is hedged in once the current one misses it
+DEFAULT_BUDGETS_MS = {"chat": 2500, "summarize": 20000, "synthesize": 8000}
+# Number of recent calls the per-route latency percentiles are computed over
+LATENCY_WINDOW = 200
+
+
+def route_config(purpose: str):
+    """Returns (provider tiers, budget seconds) for a purpose; no tiers means the main chat model.
+
+    MODEL_ROUTE_<PURPOSE> is a comma-separated list of MODEL_TYPE names, cheapest first,
+    e.g. MODEL_ROUTE_SUMMARIZE="ollama,dashscope".
+    """
+    key = f"MODEL_ROUTE_{purpose.upper()}"
+    tiers = [t.strip().lower() for t in os.getenv(key, "").split(",") if t.strip()]
+    budget_ms = float(os.getenv(f"{key}_BUDGET_MS", DEFAULT_BUDGETS_MS.get(purpose, 5000)))
+    return tiers, budget_ms / 1000
+
+
+class RouteStats(BaseCallbackHandler):
+    """Callback handler counting calls, errors, token usage and latency of one route."""
+
+    def __init__(self, purpose: str):
+        self.purpose = purpose
+        self.calls = 0
+        self.errors = 0
+        self.over_budget = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._started: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        started = self._started.pop(run_id, None)
+        with self._lock:
+            self.calls += 1
+            if started is not None:
+                latency = time.monotonic() - started
+                self.latencies.append(latency)
+                if latency > route_config(self.purpose)[1]:
+                    self.over_budget += 1
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._started.pop(run_id, None)
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+
+    def _percentile(self, ordered, q):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000) if ordered else None
+
+    def stats(self) -> dict:
+        tiers, budget = route_config(self.purpose)
+        ordered = sorted(self.latencies)
+        return {
+            "tiers": tiers or ["main"],
+            "budget_ms": round(budget * 1000),
+            "calls": self.calls,
+            "errors": self.errors,
+            "over_budget": self.over_budget,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "p50_ms": self._percentile(ordered, 0.5),
+            "p95_ms": self._percentile(ordered, 0.95),
+        }
+
+
+route_stats_by_purpose: Dict[str, RouteStats] = {purpose: RouteStats(purpose) for purpose in PURPOSES}
+
+
+def get_model(purpose: str = "chat"):
+    """Returns the chat model for a call purpose, reporting its usage and latency under that route."""
+    from backend.graph.agent import _build_provider, get_llm
+    from backend.graph.llm_pool import HedgedChatModel
+
+    if purpose not in PURPOSES:
+        raise ValueError(f"Unknown model route `{purpose}`; expected one of {', '.join(PURPOSES)}")
+    tiers, budget = route_config(purpose)
+    if not tiers:
+        model = get_llm()
+    elif len(tiers) == 1:
+        model = _build_provider(tiers[0])
+    else:
+        model = HedgedChatModel(providers=[(name, _build_provider(name)) for name in tiers], hedge_after=budget)
+    model.callbacks = [route_stats_by_purpose[purpose]]
+    return model
+
+
+def route_stats() -> Dict[str, dict]:
+    return {purpose: stats.stats() for purpose, stats in route_stats_by_purpose.items()}
+
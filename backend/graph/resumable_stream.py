@@ -0,0 +1,219 @@
+import os
+import uuid
+import asyncio
+import logging
+from collections import deque
+from typing import AsyncGenerator, AsyncIterator, Dict, Optional, Tuple
+
+# Events kept per turn for replay; a client further behind than this gets a gap notice
+STREAM_BUFFER_EVENTS = int(os.getenv("STREAM_BUFFER_EVENTS", "2000"))
+# How long a running turn waits for a client to reconnect once none is attached before it is
+# cancelled; long enough for an EventSource retry or a dropped connection, short enough that an
+# abandoned turn stops promptly (0 cancels as soon as the last client goes)
+STREAM_DETACH_GRACE_SECONDS = float(os.getenv("STREAM_DETACH_GRACE_SECONDS", "5"))
+# How long a finished turn stays resumable with no client attached
+STREAM_RESUME_SECONDS = float(os.getenv("STREAM_RESUME_SECONDS", "60"))
+# Comment lines sent on idle streams so proxies don't drop the connection
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Token coalescing: consecutive token events waiting for a client are merged into one frame and write.
+# With few streams open every token is sent as soon as it arrives; as the number of attached
+# streams grows from the idle to the busy count, each write waits up to the max window for more.
+SSE_COALESCE = os.getenv("SSE_COALESCE", "true").lower() == "true"
+SSE_COALESCE_IDLE_STREAMS = int(os.getenv("SSE_COALESCE_IDLE_STREAMS", "32"))
+SSE_COALESCE_BUSY_STREAMS = int(os.getenv("SSE_COALESCE_BUSY_STREAMS", "512"))
+SSE_COALESCE_MAX_WINDOW_MS = float(os.getenv("SSE_COALESCE_MAX_WINDOW_MS", "50"))
+# No window is waited for once this many characters are already pending
+SSE_COALESCE_MAX_CHARS = int(os.getenv("SSE_COALESCE_MAX_CHARS", "512"))
+
+logger = logging.getLogger(__name__)
+
+_active_subscribers = 0
+
+
+def coalesce_window() -> float:
+    """Seconds a write waits for more tokens, scaled by the number of attached streams."""
+    if not SSE_COALESCE or _active_subscribers <= SSE_COALESCE_IDLE_STREAMS:
+        return 0.0
+    load = (_active_subscribers - SSE_COALESCE_IDLE_STREAMS) / max(SSE_COALESCE_BUSY_STREAMS - SSE_COALESCE_IDLE_STREAMS, 1)
+    return min(load, 1.0) * SSE_COALESCE_MAX_WINDOW_MS / 1000
+
+
+def token_text(raw_event: str) -> Optional[str]:
+    """The answer text of a plain `data:` token event; None for thoughts, errors and other events."""
+    if not raw_event.startswith("data: ") or not raw_event.endswith("\n\n"):
+        return None
+    text = raw_event[6:-2]
+    if text.startswith("[THOUGHT]") or text.startswith("Error:"):
+        return None
+    return text
+
+
+class TurnRun:
+    """One agent turn running detached from the HTTP response that started it.
+
+    Every SSE event the turn produces gets the id `<turn_id>:<seq>` and is kept
+    in a bounded ring buffer, so a client that reconnects with Last-Event-ID
+    is replayed what it missed instead of re-running the turn.
+    """
+
+    def __init__(self, session_id: str):
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.session_id = session_id
+        self.buffer = deque(maxlen=STREAM_BUFFER_EVENTS)
+        self.seq = 0
+        self.chars = 0
+        self.done = False
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+        self._grace_handle = None
+
+    def _publish(self, raw_event: str):
+        self.seq += 1
+        self.chars += len(raw_event)
+        # (seq, framed event, token text if it can be merged, total characters published so far)
+        self.buffer.append((self.seq, f"id: {self.turn_id}:{self.seq}\n{raw_event}", token_text(raw_event), self.chars))
+        self._notify()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _produce(self, events: AsyncIterator[str]):
+        try:
+            async for raw_event in events:
+                self._publish(raw_event)
+        except asyncio.CancelledError:
+            logger.info("Turn %s of session %s cancelled after %d events", self.turn_id, self.session_id, self.seq)
+        except Exception as e:
+            self._publish(f"data: Error: {str(e)}\n\n")
+        finally:
+            await events.aclose()
+            self.done = True
+            self._notify()
+            self._schedule_grace()
+
+    def _schedule_grace(self):
+        """Once nobody is attached, cancel a running turn after the detach grace, or forget a finished one
+        after the resume window."""
+        if self._grace_handle:
+            self._grace_handle.cancel()
+            self._grace_handle = None
+        if self.subscribers == 0:
+            loop = asyncio.get_running_loop()
+            delay = STREAM_RESUME_SECONDS if self.done else STREAM_DETACH_GRACE_SECONDS
+            self._grace_handle = loop.call_later(delay, self._grace_expired)
+
+    def _grace_expired(self):
+        self._grace_handle = None
+        if self.subscribers:
+            return
+        if not self.done and self.task:
+            self.task.cancel()
+        else:
+            _runs.pop(self.turn_id, None)
+
+    def _frames_after(self, last_seq: int):
+        """The buffered events after last_seq, with runs of token events merged into one frame
+        carrying the last merged id, so a resume from it skips exactly what was sent."""
+        frames = []
+        tokens = []
+        token_seq = None
+        for seq, event, token, _ in self.buffer:
+            if seq <= last_seq:
+                continue
+            if token is not None and SSE_COALESCE:
+                tokens.append(token)
+                token_seq = seq
+                continue
+            if tokens:
+                frames.append(self._token_frame(token_seq, "".join(tokens)))
+                tokens = []
+            frames.append(event)
+        if tokens:
+            frames.append(self._token_frame(token_seq, "".join(tokens)))
+        return frames
+
+    def _token_frame(self, seq: int, text: str) -> str:
+        # One data: line per line of text; SSE parsers join them back with newlines
+        data = "\n".join(f"data: {line}" for line in text.split("\n"))
+        return f"id: {self.turn_id}:{seq}\n{data}\n\n"
+
+    def _chars_after(self, last_seq: int) -> int:
+        for seq, _, _, chars in self.buffer:
+            if seq == last_seq:
+                return self.chars - chars
+        return self.chars
+
+    async def subscribe(self, after_seq: int = 0) -> AsyncGenerator[str, None]:
+        """Yields the turn's events after `after_seq`, then live ones, with heartbeats while idle."""
+        global _active_subscribers
+        self.subscribers += 1
+        _active_subscribers += 1
+        if self._grace_handle:
+            self._grace_handle.cancel()
+            self._grace_handle = None
+        last_seq = after_seq
+        try:
+            if self.buffer and self.buffer[0][0] > last_seq + 1:
+                missed = self.buffer[0][0] - last_seq - 1
+                yield f"event: gap\ndata: {missed} events are no longer buffered\n\n"
+            while True:
+                if self.seq > last_seq:
+                    window = coalesce_window()
+                    if window and self._chars_after(last_seq) < SSE_COALESCE_MAX_CHARS:
+                        # Sleeping rather than waking per event keeps the batching itself cheap
+                        await asyncio.sleep(window)
+                    frames = self._frames_after(last_seq)
+                    last_seq = self.seq
+                    if SSE_COALESCE:
+                        # Everything waiting goes out in a single write
+                        yield "".join(frames)
+                    else:
+                        for frame in frames:
+                            yield frame
+                if self.done and last_seq >= self.seq:
+                    return
+                changed = self._changed
+                if self.seq > last_seq:
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            self.subscribers -= 1
+            _active_subscribers -= 1
+            if self.subscribers == 0:
+                self._schedule_grace()
+
+
+_runs: Dict[str, TurnRun] = {}
+
+
+def start_turn(events: AsyncIterator[str], session_id: str) -> TurnRun:
+    """Runs `events` (an SSE event generator such as stream_chat_response) as a detached turn."""
+    run = TurnRun(session_id)
+    _runs[run.turn_id] = run
+    run.task = asyncio.create_task(run._produce(events))
+    return run
+
+
+def parse_event_id(event_id: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Splits a `<turn_id>:<seq>` Last-Event-ID; None if it isn't one."""
+    if not event_id or ":" not in event_id:
+        return None
+    turn_id, _, seq = event_id.strip().rpartition(":")
+    if not seq.isdigit():
+        return None
+    return turn_id, int(seq)
+
+
+def get_turn(turn_id: str, session_id: str) -> Optional[TurnRun]:
+    """The turn, if it is still buffered and belongs to `session_id`; a turn of another session is not found."""
+    run = _runs.get(turn_id)
+    if run is None or run.session_id != session_id:
+        return None
+    return run
+
@@ -0,0 +1,55 @@
+import threading
+
+# Weight of the newest turn in the running average of completed turn durations
+DURATION_SMOOTHING = 0.1
+
+
+class RunMetrics:
+    """Counts completed and cancelled agent turns and estimates the compute cancellation saved.
+
+    A cancelled turn is assumed to have needed as long as an average completed
+    turn, so the time it had left is counted as saved.
+    """
+
+    def __init__(self):
+        self.completed = 0
+        self.avg_duration = None
+        self.cancelled = 0
+        self.cancelled_mid_llm_call = 0
+        self.processes_killed = 0
+        self.seconds_saved = 0.0
+        self._lock = threading.Lock()
+
+    def record_completed(self, duration: float):
+        with self._lock:
+            self.completed += 1
+            if self.avg_duration is None:
+                self.avg_duration = duration
+            else:
+                self.avg_duration += DURATION_SMOOTHING * (duration - self.avg_duration)
+
+    def record_cancelled(self, elapsed: float, processes_killed: int, mid_llm_call: bool):
+        with self._lock:
+            self.cancelled += 1
+            self.processes_killed += processes_killed
+            if mid_llm_call:
+                self.cancelled_mid_llm_call += 1
+            if self.avg_duration is not None:
+                self.seconds_saved += max(0.0, self.avg_duration - elapsed)
+
+    def stats(self) -> dict:
+        return {
+            "completed": self.completed,
+            "avg_duration_s": round(self.avg_duration, 2) if self.avg_duration is not None else None,
+            "cancelled": self.cancelled,
+            "cancelled_mid_llm_call": self.cancelled_mid_llm_call,
+            "processes_killed": self.processes_killed,
+            "estimated_seconds_saved": round(self.seconds_saved, 1),
+        }
+
+
+turn_metrics = RunMetrics()
+
+
+def run_metrics() -> dict:
+    return turn_metrics.stats()
@@ -0,0 +1,130 @@
+"""
+Benchmark for SSE token coalescing in resumable_stream.
+
+Usage: python -m backend.graph.stream_benchmark [--concurrency 1,64,256] [--tokens 200] [--interval-ms 20]
+
+Runs a streaming server in a subprocess with coalescing on and off, and reports SSE frames,
+socket writes and server CPU per streamed token and the token delivery latency clients see.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+from backend.graph.resumable_stream import start_turn
+
+
+def serve(port: int):
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route
+
+    body_writes = 0
+
+    async def fake_tokens(count, interval):
+        for _ in range(count):
+            await asyncio.sleep(interval)
+            yield f"data: {time.time():.6f} \n\n"
+
+    async def stream(request):
+        run = start_turn(fake_tokens(int(request.query_params["n"]), float(request.query_params["interval"])), "bench")
+        return StreamingResponse(run.subscribe(), media_type="text/event-stream")
+
+    async def stats(request):
+        return JSONResponse({"writes": body_writes})
+
+    app = Starlette(routes=[Route("/stream", stream), Route("/stats", stats)])
+
+    async def counting_app(scope, receive, send):
+        # Each response body message is one socket send() by the server
+        async def counting_send(message):
+            nonlocal body_writes
+            if message["type"] == "http.response.body":
+                body_writes += 1
+            await send(message)
+        await app(scope, receive, counting_send)
+
+    uvicorn.run(counting_app, port=port, log_level="warning")
+
+
+def process_counters(pid, port):
+    import httpx
+
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return httpx.get(f"http://127.0.0.1:{port}/stats").json()["writes"], cpu
+
+
+async def client(http, url, latencies):
+    received = frames = 0
+    async with http.stream("GET", url) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                now = time.time()
+                frames += 1
+                for stamp in line[6:].split():
+                    latencies.append(now - float(stamp))
+                    received += 1
+    return received, frames
+
+
+async def run_level(port, concurrency, tokens, interval_ms):
+    import httpx
+
+    url = f"http://127.0.0.1:{port}/stream?n={tokens}&interval={interval_ms / 1000}"
+    latencies = []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=None) as http:
+        counts = await asyncio.gather(*(client(http, url, latencies) for _ in range(concurrency)))
+    return sum(c[0] for c in counts), sum(c[1] for c in counts), latencies
+
+
+def main():
+    import httpx
+
+    parser = argparse.ArgumentParser(description="Benchmark SSE token coalescing.")
+    parser.add_argument("--concurrency", default="1,64,256")
+    parser.add_argument("--tokens", type=int, default=200, help="tokens per stream")
+    parser.add_argument("--interval-ms", type=float, default=20, help="delay between tokens")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    for coalesce in ("false", "true"):
+        port = 18000 + (coalesce == "true")
+        env = {**os.environ, "SSE_COALESCE": coalesce}
+        server = subprocess.Popen([sys.executable, "-m", "backend.graph.stream_benchmark", "--serve", str(port)], env=env)
+        try:
+            for _ in range(100):
+                try:
+                    httpx.get(f"http://127.0.0.1:{port}/stream?n=1&interval=0")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                writes_before, cpu_before = process_counters(server.pid, port)
+                tokens, frames, latencies = asyncio.run(run_level(port, concurrency, args.tokens, args.interval_ms))
+                writes_after, cpu_after = process_counters(server.pid, port)
+                latencies.sort()
+                print(
+                    f"coalesce={coalesce:5} streams={concurrency:4} tokens={tokens:7} "
+                    f"frames/token={frames / tokens:.2f} send syscalls/token={(writes_after - writes_before) / tokens:.2f} "
+                    f"server CPU/token={(cpu_after - cpu_before) / tokens * 1e6:.0f}us "
+                    f"latency p50={statistics.median(latencies) * 1000:.1f}ms p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+# Query texts arriving within this window of the first one are embedded together in one call
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+# Recent query vectors, so the skill ranking and memory search of one turn embed its query once
+QUERY_VECTOR_CACHE_SIZE = 256
+
+
+class CoalescingEmbeddings(Embeddings):
+    """Embeddings whose query calls are micro-batched across concurrent turns.
+
+    Each embed_query (from any thread) or aembed_query (from the event loop) is queued;
+    a dispatcher thread takes the first waiting text, gathers whatever else arrives within
+    EMBED_BATCH_MAX_WAIT_MS (up to EMBED_BATCH_MAX_SIZE), sends a single embed_documents
+    call and hands each caller its vector. The window is skipped while traffic is idle.
+    Document embedding goes straight through.
+    """
+
+    def __init__(self, inner: Embeddings, max_batch: int = EMBED_BATCH_MAX_SIZE, max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._recent: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+        self.batches = 0
+        self.queries = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def _submit(self, text: str) -> Future:
+        future: Future = Future()
+        with self._lock:
+            vector = self._recent.get(text)
+            if vector is not None:
+                self._recent.move_to_end(text)
+                future.set_result(vector)
+                return future
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="embedding-batcher", daemon=True)
+                self._dispatcher.start()
+        self._queue.put((text, future))
+        return future
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self._submit(text))
+
+    def _dispatch_loop(self):
+        last_batch_size = 1
+        while True:
+            batch = [self._queue.get()]
+            # A lone caller on an idle server isn't held back; once calls overlap, the window
+            # collects more, and queries arriving while a batch is in flight queue up for the next
+            wait = self.max_wait if last_batch_size > 1 or not self._queue.empty() else 0
+            deadline = time.monotonic() + wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # The dispatcher is the only consumer of the queue; it must outlive any one batch
+                print(f"Error in embedding batch: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            last_batch_size = len(batch)
+
+    def _run_batch(self, batch):
+        # Callers that gave up (a cancelled aembed_query cancels its future) are dropped
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        # Concurrent turns often embed the same text; send each distinct text once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(texts, self.inner.embed_documents(texts)))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.batches += 1
+            self.queries += len(batch)
+            for text, vector in vectors.items():
+                self._recent[text] = vector
+            while len(self._recent) > QUERY_VECTOR_CACHE_SIZE:
+                self._recent.popitem(last=False)
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+    def stats(self) -> dict:
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "avg_batch": round(self.queries / self.batches, 2) if self.batches else None,
+        }
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m backend.memory.embedding_batcher [--concurrency 1,8,64] [--queries 20]
+    # Concurrent turns each embed a stream of queries against a fake embedding server that, like
+    # Ollama, handles one request at a time at a fixed cost per request plus a cost per text.
+    import argparse
+    import statistics
+    from concurrent.futures import ThreadPoolExecutor
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,8,64")
+    parser.add_argument("--queries", type=int, default=20, help="queries per turn")
+    parser.add_argument("--request-ms", type=float, default=15, help="fixed cost of one embedding request")
+    parser.add_argument("--text-ms", type=float, default=0.5, help="added cost per text in a request")
+    args = parser.parse_args()
+
+    class FakeEmbeddingServer(Embeddings):
+        def __init__(self):
+            self._busy = threading.Lock()
+            self.requests = 0
+
+        def embed_documents(self, texts):
+            with self._busy:
+                self.requests += 1
+                time.sleep((args.request_ms + args.text_ms * len(texts)) / 1000)
+            return [[float(len(t)), 1.0] for t in texts]
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    def run(embeddings, concurrency):
+        latencies = []
+
+        def turn(worker):
+            for i in range(args.queries):
+                started = time.perf_counter()
+                embeddings.embed_query(f"turn {worker} query {i}")
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(turn, range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return concurrency * args.queries / elapsed, statistics.median(latencies), max(latencies)
+
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        for mode in ("direct", "coalesced"):
+            server = FakeEmbeddingServer()
+            embeddings = server if mode == "direct" else CoalescingEmbeddings(server)
+            throughput, p50, worst = run(embeddings, concurrency)
+            print(
+                f"turns={concurrency:3} {mode:9} {throughput:7.1f} queries/s "
+                f"p50={p50 * 1000:6.1f}ms max={worst * 1000:7.1f}ms embedding requests={server.requests}"
+            )
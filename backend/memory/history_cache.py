@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage
+
+# Bounds on the parsed session histories kept in memory, evicted least-recently-used first
+SESSION_CACHE_MAX_SESSIONS = int(os.getenv("SESSION_CACHE_MAX_SESSIONS", "128"))
+SESSION_CACHE_MAX_BYTES = int(float(os.getenv("SESSION_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+
+def file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, mtime_ns, size) of a session file; atomic replaces change the inode even within one mtime tick."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def estimate_size(messages: List[BaseMessage]) -> int:
+    """Approximate memory held by parsed messages: objects, their text and structured fields."""
+    total = sys.getsizeof(messages)
+    for message in messages:
+        total += sys.getsizeof(message) + sys.getsizeof(message.__dict__)
+        content = message.content
+        if isinstance(content, str):
+            total += sys.getsizeof(content)
+        else:
+            total += sum(sys.getsizeof(str(part)) for part in content)
+        for field in ("additional_kwargs", "response_metadata", "tool_calls"):
+            value = getattr(message, field, None)
+            if value:
+                total += sys.getsizeof(str(value))
+    return total
+
+
+class HistoryCache:
+    """Parsed session histories keyed by file path and validated against the file's version.
+
+    Saves write through to disk and then cache what they wrote, so the next turn's load
+    is a stat instead of a JSON parse. A file rewritten by another worker process (or by
+    the files API) has a different version and is simply re-read.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_CACHE_MAX_SESSIONS, max_bytes: int = SESSION_CACHE_MAX_BYTES):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        # path -> (file version, messages, estimated bytes, bytes on disk)
+        self._entries: "OrderedDict[str, Tuple[tuple, Tuple[BaseMessage, ...], int, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, version: Optional[tuple]) -> Optional[List[BaseMessage]]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or version is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            # A fresh list, so callers can append; the messages themselves are shared and not mutated
+            return list(entry[1])
+
+    def put(self, path: str, version: Optional[tuple], messages: List[BaseMessage]):
+        if version is None:
+            return
+        size = estimate_size(messages)
+        with self._lock:
+            self._remove(path)
+            if size > self.max_bytes:
+                return
+            self._entries[path] = (version, tuple(messages), size, version[2])
+            self._size += size
+            while self._size > self.max_bytes or len(self._entries) > self.max_sessions:
+                evicted_path = next(iter(self._entries))
+                self._remove(evicted_path)
+                self.evictions += 1
+
+    def _remove(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "messages": sum(len(entry[1]) for entry in self._entries.values()),
+                "estimated_bytes": self._size,
+                "bytes_on_disk": sum(entry[3] for entry in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+history_cache = HistoryCache()
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Superseded generations kept for readers that are still loading them
+KEEP_GENERATIONS = 3
+POINTER_FILE = "CURRENT"
+LOCK_FILE = ".build.lock"
+
+
+class IndexGenerations:
+    """Versioned on-disk index directories shared by every worker process.
+
+    Builds run under an exclusive file lock and write into a fresh `gen-<n>`
+    directory; the build is published by atomically replacing the CURRENT
+    pointer file, so readers only ever open fully written generations and
+    pick up new ones by re-reading the pointer.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def current(self) -> Optional[dict]:
+        """The published generation: {"generation", "path", "source_stamp", "published_at"}, or None."""
+        try:
+            with open(os.path.join(self.root, POINTER_FILE), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        state["path"] = os.path.join(self.root, state["generation"])
+        return state
+
+    def load(self, loader: Callable[[str], object]):
+        """Returns (state, loader(path of the current generation)), or (None, None) if none is published.
+
+        If the generation is pruned while it is being read, the new current one is loaded instead.
+        """
+        state = self.current()
+        while state:
+            try:
+                return state, loader(state["path"])
+            except Exception:
+                latest = self.current()
+                if not latest or latest["generation"] == state["generation"]:
+                    raise
+                state = latest
+        return None, None
+
+    @contextmanager
+    def lock(self, blocking: bool = True):
+        """Exclusive cross-process build lock; yields False instead of waiting when non-blocking and busy."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_FILE), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _generation_numbers(self):
+        numbers = []
+        for name in os.listdir(self.root):
+            if name.startswith("gen-") and name[4:].isdigit():
+                numbers.append(int(name[4:]))
+        return sorted(numbers)
+
+    def publish(self, save: Callable[[str], None], source_stamp) -> dict:
+        """Writes a new generation with `save(directory)` and makes it current. Call with the lock held."""
+        numbers = self._generation_numbers()
+        name = f"gen-{(numbers[-1] + 1) if numbers else 1:06d}"
+        path = os.path.join(self.root, name)
+        save(path)
+
+        state = {"generation": name, "source_stamp": source_stamp, "published_at": time.time()}
+        tmp_path = os.path.join(self.root, f"{POINTER_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.root, POINTER_FILE))
+        self._prune()
+        state["path"] = path
+        return state
+
+    def _prune(self):
+        # Also clears directories left behind by builds that crashed before publishing
+        for number in self._generation_numbers()[:-KEEP_GENERATIONS]:
+            shutil.rmtree(os.path.join(self.root, f"gen-{number:06d}"), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Stress test: python -m backend.memory.index_generations [--workers 8] [--seconds 10]
+    # Worker processes repeatedly find the index stale, build it under the lock and load whatever
+    # is current. Every build is logged per source stamp; every load checks that the docstore matches
+    # the vectors and that all documents come from one build.
+    import argparse
+    import multiprocessing
+    import random
+    import tempfile
+
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--docs", type=int, default=2000)
+    args = parser.parse_args()
+
+    def stress_worker(root, stamp_path, log_path, seconds, num_docs, results):
+        generations = IndexGenerations(root)
+        embeddings = DeterministicFakeEmbedding(size=64)
+        builds = loads = torn = 0
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            with open(stamp_path) as f:
+                stamp = int(f.read())
+            state = generations.current()
+            if not state or state["source_stamp"] < stamp:
+                with generations.lock():
+                    state = generations.current()
+                    if not state or state["source_stamp"] < stamp:
+                        docs = [Document(page_content=f"build {stamp} doc {i}", metadata={"stamp": stamp}) for i in range(num_docs)]
+                        store = FAISS.from_documents(docs, embeddings)
+                        with open(log_path, "a") as log:
+                            log.write(f"{stamp}\n")
+                        state = generations.publish(store.save_local, stamp)
+                        builds += 1
+            try:
+                state, store = generations.load(lambda path: FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True))
+                stamps = {doc.metadata["stamp"] for doc in store.docstore._dict.values()}
+                if store.index.ntotal != num_docs or len(store.docstore._dict) != num_docs or stamps != {state["source_stamp"]}:
+                    torn += 1
+                loads += 1
+            except Exception as e:
+                print(f"Torn read of {state['generation']}: {e}")
+                torn += 1
+            # Occasionally make the source newer, as a memory write would
+            if random.random() < 0.05:
+                with open(stamp_path, "r+") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    value = int(f.read()) + 1
+                    f.seek(0)
+                    f.write(str(value))
+                    f.truncate()
+        results.put((builds, loads, torn))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "index")
+        stamp_path = os.path.join(tmp, "stamp")
+        log_path = os.path.join(tmp, "builds.log")
+        with open(stamp_path, "w") as f:
+            f.write("1")
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [
+            context.Process(target=stress_worker, args=(root, stamp_path, log_path, args.seconds, args.docs, results))
+            for _ in range(args.workers)
+        ]
+        for p in processes:
+            p.start()
+        totals = [results.get() for _ in processes]
+        for p in processes:
+            p.join()
+
+        with open(log_path) as f:
+            built_stamps = [int(line) for line in f]
+        duplicates = len(built_stamps) - len(set(built_stamps))
+        builds, loads, torn = (sum(t[i] for t in totals) for i in range(3))
+        print(f"{args.workers} workers: {builds} builds for {len(set(built_stamps))} source versions, "
+              f"{duplicates} duplicate builds, {loads} loads, {torn} torn reads, "
+              f"{len(os.listdir(root)) - 2} generation dirs kept")
+        if duplicates or torn:
+            raise SystemExit(1)
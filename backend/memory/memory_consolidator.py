@@ -0,0 +1,211 @@
+import os
+import time
+import threading
+import statistics
+from typing import List, Optional
+
+import numpy as np
+import faiss
+
+from backend.memory.memory_store import get_memory_store, MemoryRecord
+from backend.memory.memory_retriever import (
+    index_generations,
+    load_memory_index,
+    load_published_index,
+    memory_source_stamp,
+    record_document,
+)
+
+# Cosine similarity above which two memories are treated as the same fact
+SIMILARITY_THRESHOLD = float(os.getenv("MEMORY_CONSOLIDATE_SIMILARITY", "0.92"))
+# Consolidate once this many memories have been added since the last run (0 disables)
+CONSOLIDATE_THRESHOLD = int(os.getenv("MEMORY_CONSOLIDATE_THRESHOLD", "200"))
+# Also consolidate every N seconds when the scheduler is running (0 disables)
+CONSOLIDATE_INTERVAL = int(os.getenv("MEMORY_CONSOLIDATE_INTERVAL", "0"))
+
+# Passes made to embed memories added during a consolidation before publishing anyway
+CATCH_UP_ATTEMPTS = 5
+
+_consolidation_lock = threading.Lock()
+
+
+def _index_size_bytes() -> int:
+    state = index_generations.current()
+    if not state:
+        return 0
+    total = 0
+    for name in ("index.faiss", "index.pkl"):
+        path = os.path.join(state["path"], name)
+        if os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def _median_search_ms(vectorstore, probe_vectors: List[List[float]], k: int = 3) -> float:
+    # Query vectors are embedded up front so only the index lookup is timed
+    timings = []
+    for vector in probe_vectors:
+        start = time.perf_counter()
+        vectorstore.similarity_search_by_vector(vector, k=k)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 2) if timings else 0.0
+
+
+def _cluster(vectors: np.ndarray, threshold: float) -> List[List[int]]:
+    """Groups rows whose cosine similarity exceeds the threshold (transitively, via union-find)."""
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    lims, _, neighbours = index.range_search(vectors, threshold)
+
+    parent = list(range(len(vectors)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(vectors)):
+        for j in neighbours[lims[i]:lims[i + 1]]:
+            ri, rj = find(i), find(int(j))
+            if ri != rj:
+                parent[rj] = ri
+
+    clusters = {}
+    for i in range(len(vectors)):
+        clusters.setdefault(find(i), []).append(i)
+    return [c for c in clusters.values() if len(c) > 1]
+
+
+def _catch_up(store, vectorstore) -> int:
+    """Brings the index in line with the store; returns the source stamp the index now covers.
+
+    add_memory doesn't take the build lock, so memories can keep arriving while this
+    runs; it repeats until the store is unchanged across a pass (or gives up after a
+    few, publishing an older stamp that leaves the index stale for the next load).
+    """
+    for _ in range(CATCH_UP_ATTEMPTS):
+        source_stamp = memory_source_stamp()
+        records = store.all()
+        indexed_refs = set(vectorstore.index_to_docstore_id.values())
+        # Memories deleted meanwhile (e.g. by an edit of MEMORY.md) lose their vectors too
+        live_refs = {f"memory-{r.id}" for r in records}
+        gone = [ref for ref in indexed_refs if ref.startswith("memory-") and ref not in live_refs]
+        if gone:
+            vectorstore.delete(ids=gone)
+        missing = [r for r in records if r.embedding_ref not in indexed_refs]
+        if missing:
+            refs = {r.id: f"memory-{r.id}" for r in missing}
+            vectorstore.add_documents([record_document(r) for r in missing], ids=list(refs.values()))
+            store.set_embedding_refs(refs)
+        if memory_source_stamp() == source_stamp:
+            return source_stamp
+    return source_stamp
+
+
+def consolidate_memories(similarity_threshold: float = SIMILARITY_THRESHOLD) -> dict:
+    """Merges near-duplicate memories, keeping the newest entry of each cluster.
+
+    Only the vectors of removed entries are deleted from the FAISS index; the
+    rest of the index is published as a new generation as-is. Returns a report
+    of the size and retrieval-latency change.
+    """
+    with _consolidation_lock:
+        try:
+            # Bring the index up to date first, then work on a private copy of it under the build lock
+            if not load_memory_index():
+                return {"entries_before": 0, "entries_after": 0, "merged": 0}
+            with index_generations.lock():
+                return _consolidate_locked(similarity_threshold)
+        finally:
+            # Recorded on every exit so later adds don't immediately trigger another run
+            store = get_memory_store()
+            store.set_meta("last_consolidated_count", str(store.count()))
+
+
+def _consolidate_locked(similarity_threshold: float) -> dict:
+    store = get_memory_store()
+    _, vectorstore = load_published_index()
+    records = store.all()
+    if not vectorstore or len(records) < 2:
+        return {"entries_before": len(records), "entries_after": len(records), "merged": 0}
+
+    position_by_ref = {doc_id: pos for pos, doc_id in vectorstore.index_to_docstore_id.items()}
+    indexed: List[MemoryRecord] = [r for r in records if r.embedding_ref in position_by_ref]
+    if len(indexed) < 2:
+        return {"entries_before": len(records), "entries_after": len(records), "merged": 0}
+    vectors = np.vstack([vectorstore.index.reconstruct(position_by_ref[r.embedding_ref]) for r in indexed])
+
+    probes = [vectorstore.embeddings.embed_query(r.content) for r in indexed[-5:]]
+    entries_before = vectorstore.index.ntotal
+    bytes_before = _index_size_bytes()
+    latency_before = _median_search_ms(vectorstore, probes)
+
+    removed: List[MemoryRecord] = []
+    for cluster in _cluster(vectors, similarity_threshold):
+        members = sorted((indexed[i] for i in cluster), key=lambda r: (r.created_at, r.id))
+        removed.extend(members[:-1])
+
+    if removed:
+        store.delete([r.id for r in removed])
+        vectorstore.delete(ids=[r.embedding_ref for r in removed])
+        store.render_markdown()
+        index_generations.publish(vectorstore.save_local, _catch_up(store, vectorstore))
+
+    report = {
+        "entries_before": entries_before,
+        "entries_after": vectorstore.index.ntotal,
+        "merged": len(removed),
+        "index_bytes_before": bytes_before,
+        "index_bytes_after": _index_size_bytes(),
+        "search_ms_before": latency_before,
+        "search_ms_after": _median_search_ms(vectorstore, probes),
+    }
+    print(f"Memory consolidation: {report}")
+    return report
+
+
+def maybe_consolidate_in_background() -> Optional[threading.Thread]:
+    """Starts a consolidation run if enough memories were added since the last one."""
+    if CONSOLIDATE_THRESHOLD <= 0 or _consolidation_lock.locked():
+        return None
+    store = get_memory_store()
+    last_count = int(store.get_meta("last_consolidated_count", "0"))
+    if store.count() - last_count < CONSOLIDATE_THRESHOLD:
+        return None
+
+    def run():
+        try:
+            consolidate_memories()
+        except Exception as e:
+            print(f"Error consolidating memories: {e}")
+
+    thread = threading.Thread(target=run, name="memory-consolidation", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_consolidation_scheduler(interval: int = CONSOLIDATE_INTERVAL) -> Optional[threading.Thread]:
+    """Runs consolidation every `interval` seconds on a daemon thread."""
+    if interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                consolidate_memories()
+            except Exception as e:
+                print(f"Error consolidating memories: {e}")
+
+    thread = threading.Thread(target=loop, name="memory-consolidation-scheduler", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    report = consolidate_memories()
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -1,21 +1,29 @@
 import os
-from typing import List
+import threading
+from typing import List, Optional
 from dotenv import load_dotenv
 
-from langchain_community.document_loaders import TextLoader
 from langchain_community.vectorstores import FAISS
 from langchain_text_splitters import MarkdownTextSplitter
 from langchain_core.documents import Document
 from langchain_ollama import OllamaEmbeddings
 from langchain_openai import OpenAIEmbeddings
 
+from backend.memory.memory_store import get_memory_store, MemoryRecord, MEMORY_FILE_PATH
+from backend.memory.index_generations import IndexGenerations
+from backend.memory.embedding_batcher import CoalescingEmbeddings
+
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 load_dotenv(os.path.join(PROJECT_ROOT, ".env"))
 
 SESSIONS_DIR = os.path.join(PROJECT_ROOT, "backend", "sessions")
-MEMORY_FILE_PATH = os.path.join(PROJECT_ROOT, "backend", "memory", "MEMORY.md")
 FAISS_INDEX_PATH = os.path.join(SESSIONS_DIR, "memory_faiss_index")
 
+# Index builds are shared by all worker processes through published generations
+index_generations = IndexGenerations(FAISS_INDEX_PATH)
+_loaded_index = {"generation": None, "vectorstore": None}
+_loaded_index_lock = threading.Lock()
+
 def get_embeddings():
     """Initializes embeddings based on environment variables."""
     model_type = os.getenv("MODEL_TYPE", "openai").lower()
@@ -24,6 +32,7 @@ def get_embeddings():
         return OllamaEmbeddings(
             model=os.getenv("OLLAMA_EMBED_MODEL", "qwen2.5:14b"),
             base_url=os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434"),
+            keep_alive=int(os.getenv("OLLAMA_KEEP_ALIVE_SECONDS", "1800")),
         )
     elif model_type in ["deepseek", "dashscope", "openai"]:
         # Fallback to OpenAI compatible embeddings for API providers
@@ -42,34 +51,128 @@ def get_embeddings():
         )
     return OllamaEmbeddings(model="nomic-embed-text")
 
+_query_embeddings = None
+_query_embeddings_lock = threading.Lock()
+
+def get_query_embeddings() -> CoalescingEmbeddings:
+    """The shared embeddings for query-time searches; concurrent turns' queries are batched into one call."""
+    global _query_embeddings
+    with _query_embeddings_lock:
+        if _query_embeddings is None:
+            _query_embeddings = CoalescingEmbeddings(get_embeddings())
+        return _query_embeddings
+
+def record_document(record: MemoryRecord) -> Document:
+    return Document(
+        page_content=record.to_markdown(),
+        metadata={"memory_id": record.id, "created_at": record.created_at, "session_id": record.session_id},
+    )
+
+def _memory_documents() -> List[Document]:
+    """Builds one document per memory record, plus chunks of the hand-written preamble."""
+    store = get_memory_store()
+
+    text_splitter = MarkdownTextSplitter(chunk_size=500, chunk_overlap=50)
+    docs = [
+        Document(page_content=chunk, metadata={"source": "preamble"})
+        for chunk in text_splitter.split_text(store.get_preamble())
+    ]
+    docs.extend(record_document(record) for record in store.all())
+    return docs
+
+def memory_source_stamp() -> int:
+    """Version of the memory contents an index is built from (MEMORY.md is rewritten on every change)."""
+    try:
+        return os.stat(MEMORY_FILE_PATH).st_mtime_ns
+    except OSError:
+        return 0
+
+def _index_is_fresh(state: Optional[dict]) -> bool:
+    return bool(state) and state["source_stamp"] >= memory_source_stamp()
+
 def rebuild_memory_index():
-    """Reads MEMORY.md, splits it, and builds a FAISS index."""
-    if not os.path.exists(MEMORY_FILE_PATH):
-        return None
-        
+    """Embeds the structured memory records and publishes them as a new FAISS index generation."""
     try:
-        loader = TextLoader(MEMORY_FILE_PATH, encoding='utf-8')
-        documents = loader.load()
-        
-        # Split by Markdown headers
-        text_splitter = MarkdownTextSplitter(chunk_size=500, chunk_overlap=50)
-        docs = text_splitter.split_documents(documents)
-        
-        if not docs:
-            # If the file is empty or only has short text, create a dummy doc
-            docs = [Document(page_content="[Empty Memory]")]
-            
-        embeddings = get_embeddings()
-        vectorstore = FAISS.from_documents(docs, embeddings)
-        
-        # Save locally
-        os.makedirs(SESSIONS_DIR, exist_ok=True)
-        vectorstore.save_local(FAISS_INDEX_PATH)
-        return vectorstore
+        with index_generations.lock():
+            return _build_and_publish()
     except Exception as e:
         print(f"Error rebuilding memory index: {e}")
         return None
 
+def _build_and_publish():
+    # Called with the build lock held
+    store = get_memory_store()
+    if not os.path.exists(MEMORY_FILE_PATH):
+        store.render_markdown()
+
+    # Stamp before reading, so changes made during the build leave the index stale
+    source_stamp = memory_source_stamp()
+    docs = _memory_documents()
+    if not docs:
+        # If there is no memory at all, create a dummy doc
+        docs = [Document(page_content="[Empty Memory]")]
+
+    ids = [
+        f"memory-{d.metadata['memory_id']}" if "memory_id" in d.metadata else f"preamble-{i}"
+        for i, d in enumerate(docs)
+    ]
+    embeddings = get_embeddings()
+    vectorstore = FAISS.from_documents(docs, embeddings, ids=ids)
+    store.set_embedding_refs({
+        d.metadata["memory_id"]: doc_id for d, doc_id in zip(docs, ids) if "memory_id" in d.metadata
+    })
+
+    # Save locally
+    os.makedirs(SESSIONS_DIR, exist_ok=True)
+    index_generations.publish(vectorstore.save_local, source_stamp)
+    return vectorstore
+
+def _keyword_memory(query: str, k: int) -> str:
+    """Indexed keyword lookup used when the vector index is unavailable."""
+    try:
+        records = get_memory_store().search(query, limit=k)
+    except Exception as e:
+        print(f"Error searching memory store: {e}")
+        return ""
+    return "\n\n...\n\n".join(r.to_markdown() for r in records)
+
+def load_published_index():
+    """Loads the current index generation from disk; (state, vectorstore), or (None, None)."""
+    # Searches on the loaded store embed their queries through the batcher
+    embeddings = get_query_embeddings()
+    return index_generations.load(lambda path: FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True))
+
+def load_memory_index():
+    """Returns the memory FAISS index, rebuilding it first if MEMORY.md changed since it was built.
+
+    Only one process builds at a time; while another worker is rebuilding, the
+    previous generation is served. A loaded generation is reused until a newer
+    one is published. The build lock and embedding calls block, so async code
+    calls this (via get_relevant_memory) through asyncio.to_thread.
+    """
+    state = index_generations.current()
+    if not _index_is_fresh(state):
+        # Wait for a running build only if there is no index to serve meanwhile
+        with index_generations.lock(blocking=state is None) as acquired:
+            if acquired:
+                state = index_generations.current()
+                if not _index_is_fresh(state):
+                    try:
+                        return _build_and_publish()
+                    except Exception as e:
+                        print(f"Error rebuilding memory index: {e}")
+                        if not state:
+                            return None
+
+    with _loaded_index_lock:
+        if _loaded_index["generation"] != state["generation"]:
+            state, vectorstore = load_published_index()
+            if state is None:
+                # CURRENT was removed or became unreadable since it was checked: publish a fresh build
+                return rebuild_memory_index()
+            _loaded_index.update(generation=state["generation"], vectorstore=vectorstore)
+        return _loaded_index["vectorstore"]
+
 def get_relevant_memory(query: str, k: int = 3) -> str:
     """Retrieves relevant memory chunks for the given query."""
     if not query.strip():
@@ -81,27 +184,10 @@ def get_relevant_memory(query: str, k: int = 3) -> str:
         except Exception:
             return ""
             
-    embeddings = get_embeddings()
     try:
-        # Check if index exists and if it is up-to-date
-        index_file = os.path.join(FAISS_INDEX_PATH, "index.faiss")
-        should_rebuild = True
-        
-        if os.path.exists(index_file):
-            if os.path.exists(MEMORY_FILE_PATH):
-                memory_mtime = os.path.getmtime(MEMORY_FILE_PATH)
-                index_mtime = os.path.getmtime(index_file)
-                if index_mtime > memory_mtime:
-                    should_rebuild = False  # Index is fresh
-            else:
-                should_rebuild = False # No memory file, so nothing to rebuild
-        
-        if not should_rebuild:
-            vectorstore = FAISS.load_local(FAISS_INDEX_PATH, embeddings, allow_dangerous_deserialization=True)
-        else:
-            vectorstore = rebuild_memory_index()
-            if not vectorstore:
-                return ""
+        vectorstore = load_memory_index()
+        if not vectorstore:
+            return ""
                 
         # Search
         docs = vectorstore.similarity_search(query, k=k)
@@ -111,8 +197,11 @@ def get_relevant_memory(query: str, k: int = 3) -> str:
             
         return "\n\n...\n\n".join([doc.page_content for doc in docs])
     except Exception as e:
-        # Fallback to naive reading if RAG fails
+        # Fall back to the FTS5 keyword index, then to naive reading, if RAG fails
         print(f"Error retrieving from memory index: {e}")
+        keyword_hits = _keyword_memory(query, k)
+        if keyword_hits:
+            return keyword_hits
         try:
             with open(MEMORY_FILE_PATH, 'r', encoding='utf-8') as f:
                 content = f.read()
@@ -0,0 +1,328 @@
+import os
+import re
+import sqlite3
+import hashlib
+import datetime
+from dataclasses import dataclass
+from typing import List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SESSIONS_DIR = os.path.join(PROJECT_ROOT, "backend", "sessions")
+MEMORY_DB_PATH = os.path.join(SESSIONS_DIR, "memory.db")
+MEMORY_FILE_PATH = os.path.join(PROJECT_ROOT, "backend", "memory", "MEMORY.md")
+
+MEMORY_HEADER = "# 长期记忆 (MEMORY)\n\n这里记录着与你相关的核心设定、重要决策、偏好设定以及其他跨越单次会话的历史信息。这些信息作为上下文的一部分将在每次对话被载入。\n\n---\n"
+
+# Matches the bullets written by add_memory: "- **[2024-01-01 12:00:00]** content"
+MEMORY_BULLET_PATTERN = re.compile(r"^- \*\*\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]\*\* (.*)$")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass
+class MemoryRecord:
+    id: int
+    content: str
+    created_at: str
+    session_id: Optional[str] = None
+    embedding_ref: Optional[str] = None
+    expires_at: Optional[str] = None
+
+    def to_markdown(self) -> str:
+        return f"- **[{self.created_at}]** {_single_line(self.content)}"
+
+
+def _single_line(content: str) -> str:
+    # A memory is one bullet in MEMORY.md; its line breaks would otherwise leave lines outside it
+    return " ".join(line.strip() for line in content.splitlines() if line.strip())
+
+
+def _normalize(content: str) -> str:
+    return " ".join(content.split()).casefold()
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(_normalize(content).encode("utf-8")).hexdigest()
+
+
+def _fts_query(query: str) -> str:
+    """Turns free text into an FTS5 OR-expression that the trigram tokenizer can match."""
+    terms = []
+    for word in re.findall(r"\w+", query):
+        if len(word) < 3:
+            continue
+        if word.isascii():
+            terms.append(word)
+        else:
+            # CJK text has no word boundaries, so match on overlapping trigrams instead
+            terms.extend(word[i:i + 3] for i in range(len(word) - 2))
+    # Quote every term so FTS5 operators inside user text are treated literally
+    unique_terms = dict.fromkeys(t.replace('"', '""') for t in terms)
+    return " OR ".join(f'"{t}"' for t in unique_terms)
+
+
+class MemoryStore:
+    """Structured long-term memory backed by SQLite with an FTS5 keyword index.
+
+    MEMORY.md is kept as a rendered view of the records: appends are written
+    through to the end of the file, and `render_markdown` regenerates it fully.
+    The file version written last is recorded, so a hand edit (e.g. through the
+    files API) is noticed and imported back before the records are next used.
+    """
+
+    def __init__(self, db_path: str = MEMORY_DB_PATH, markdown_path: str = MEMORY_FILE_PATH):
+        self.db_path = db_path
+        self.markdown_path = markdown_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_schema(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS memories (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content TEXT NOT NULL,
+                    content_hash TEXT NOT NULL UNIQUE,
+                    created_at TEXT NOT NULL,
+                    session_id TEXT,
+                    embedding_ref TEXT,
+                    expires_at TEXT
+                );
+                CREATE TABLE IF NOT EXISTS memory_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+                    content, content='memories', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+                    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+                    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE OF content ON memories BEGIN
+                    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+                END;
+            """)
+            migrated = conn.execute("SELECT value FROM memory_meta WHERE key = 'migrated'").fetchone()
+        if not migrated:
+            self._import_markdown()
+
+    def _parse_markdown(self) -> tuple[str, list[tuple[str, str]]]:
+        """(preamble, [(content, created_at), ...]) of the bullets and other lines of MEMORY.md."""
+        preamble_lines = []
+        records = []
+        in_bullet = False
+        with open(self.markdown_path, 'r', encoding='utf-8') as f:
+            for line in f.read().splitlines():
+                match = MEMORY_BULLET_PATTERN.match(line)
+                if match:
+                    records.append((match.group(2), match.group(1)))
+                    in_bullet = True
+                elif in_bullet and line[:1].isspace() and line.strip():
+                    # An indented line right under a bullet (a hand edit) continues it
+                    content, created_at = records[-1]
+                    records[-1] = (f"{content} {line.strip()}", created_at)
+                else:
+                    preamble_lines.append(line)
+                    in_bullet = False
+        preamble = "\n".join(preamble_lines).rstrip() + "\n" if "".join(preamble_lines).strip() else MEMORY_HEADER
+        return preamble, records
+
+    def _import_markdown(self):
+        """One-off migration of an existing MEMORY.md into structured records."""
+        preamble, records = self._parse_markdown() if os.path.exists(self.markdown_path) else (MEMORY_HEADER, [])
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO memory_meta(key, value) VALUES ('preamble', ?)", (preamble,))
+            for content, created_at in records:
+                conn.execute(
+                    "INSERT OR IGNORE INTO memories(content, content_hash, created_at) VALUES (?, ?, ?)",
+                    (content, _content_hash(content), created_at),
+                )
+            conn.execute("INSERT OR REPLACE INTO memory_meta(key, value) VALUES ('migrated', '1')")
+            self._record_markdown_version(conn)
+
+    def _markdown_version(self) -> Optional[str]:
+        try:
+            stat = os.stat(self.markdown_path)
+        except OSError:
+            return None
+        return f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
+    def _record_markdown_version(self, conn: sqlite3.Connection):
+        conn.execute("INSERT OR REPLACE INTO memory_meta(key, value) VALUES ('markdown_version', ?)", (self._markdown_version(),))
+
+    def sync_markdown(self) -> bool:
+        """Imports MEMORY.md if it was edited since the store last wrote it; returns whether it was.
+
+        The file is taken as the intended state: new or changed bullets become records,
+        records whose bullet was removed are deleted, and the other lines become the preamble.
+        """
+        version = self._markdown_version()
+        if version is None or version == self.get_meta("markdown_version"):
+            return False
+        with self._connect() as conn:
+            # Holds the write lock, so an add can't land between reading the file and applying it
+            conn.execute("BEGIN IMMEDIATE")
+            version = self._markdown_version()
+            row = conn.execute("SELECT value FROM memory_meta WHERE key = 'markdown_version'").fetchone()
+            if version is None or (row and row["value"] == version):
+                return False
+            preamble, records = self._parse_markdown()
+            hashes = {}
+            for content, created_at in records:
+                hashes.setdefault(_content_hash(content), (content, created_at))
+            existing = {r["content_hash"]: r["id"] for r in conn.execute("SELECT id, content_hash FROM memories")}
+            conn.executemany("DELETE FROM memories WHERE id = ?", [(i,) for h, i in existing.items() if h not in hashes])
+            conn.executemany(
+                "INSERT INTO memories(content, content_hash, created_at) VALUES (?, ?, ?)",
+                [(content, h, created_at) for h, (content, created_at) in hashes.items() if h not in existing],
+            )
+            conn.execute("INSERT OR REPLACE INTO memory_meta(key, value) VALUES ('preamble', ?)", (preamble,))
+            self._record_markdown_version(conn)
+        return True
+
+    def _row_to_record(self, row: sqlite3.Row) -> MemoryRecord:
+        return MemoryRecord(
+            id=row["id"],
+            content=row["content"],
+            created_at=row["created_at"],
+            session_id=row["session_id"],
+            embedding_ref=row["embedding_ref"],
+            expires_at=row["expires_at"],
+        )
+
+    def add(self, content: str, session_id: Optional[str] = None, ttl_days: Optional[int] = None) -> tuple[MemoryRecord, bool]:
+        """Inserts a memory in O(1). Returns (record, created); exact duplicates return the existing record.
+
+        Line breaks in `content` are collapsed, since each memory is stored as a single bullet.
+        """
+        content = _single_line(content)
+        now = datetime.datetime.now()
+        created_at = now.strftime(TIMESTAMP_FORMAT)
+        expires_at = (now + datetime.timedelta(days=ttl_days)).strftime(TIMESTAMP_FORMAT) if ttl_days else None
+        content_hash = _content_hash(content)
+
+        self.sync_markdown()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # An expired copy that hasn't been purged yet doesn't make the fact a duplicate
+            conn.execute(
+                "DELETE FROM memories WHERE content_hash = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (content_hash, created_at),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO memories(content, content_hash, created_at, session_id, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (content, content_hash, created_at, session_id, expires_at),
+            )
+            created = cursor.rowcount > 0
+            row = conn.execute("SELECT * FROM memories WHERE content_hash = ?", (content_hash,)).fetchone()
+            record = self._row_to_record(row)
+            if created:
+                self._append_markdown(record, conn)
+        return record, created
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM memory_meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO memory_meta(key, value) VALUES (?, ?)", (key, value))
+
+    def get_preamble(self) -> str:
+        return self.get_meta("preamble", MEMORY_HEADER)
+
+    def all(self) -> List[MemoryRecord]:
+        """Returns all unexpired records, oldest first."""
+        self.sync_markdown()
+        now = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM memories WHERE expires_at IS NULL OR expires_at > ? ORDER BY id", (now,)
+            ).fetchall()
+        return [self._row_to_record(r) for r in rows]
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    def search(self, query: str, limit: int = 3) -> List[MemoryRecord]:
+        """Keyword lookup through the FTS5 index, ranked by bm25."""
+        match = _fts_query(query)
+        if not match:
+            return []
+        now = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT m.* FROM memories_fts f JOIN memories m ON m.id = f.rowid
+                   WHERE memories_fts MATCH ? AND (m.expires_at IS NULL OR m.expires_at > ?)
+                   ORDER BY bm25(memories_fts) LIMIT ?""",
+                (match, now, limit),
+            ).fetchall()
+        return [self._row_to_record(r) for r in rows]
+
+    def set_embedding_refs(self, refs: dict[int, str]):
+        """Records which vector-index entry holds the embedding of each memory."""
+        with self._connect() as conn:
+            conn.executemany("UPDATE memories SET embedding_ref = ? WHERE id = ?", [(ref, mid) for mid, ref in refs.items()])
+
+    def delete(self, ids: List[int]):
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM memories WHERE id = ?", [(i,) for i in ids])
+
+    def purge_expired(self) -> int:
+        now = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM memories WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            return cursor.rowcount
+
+    def _append_markdown(self, record: MemoryRecord, conn: sqlite3.Connection):
+        if not os.path.exists(self.markdown_path):
+            self._write_markdown(conn)
+            return
+        with open(self.markdown_path, 'a', encoding='utf-8') as f:
+            f.write(f"\n{record.to_markdown()}\n")
+        self._record_markdown_version(conn)
+
+    def _write_markdown(self, conn: sqlite3.Connection) -> str:
+        now = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        row = conn.execute("SELECT value FROM memory_meta WHERE key = 'preamble'").fetchone()
+        lines = [row["value"] if row else MEMORY_HEADER]
+        rows = conn.execute("SELECT * FROM memories WHERE expires_at IS NULL OR expires_at > ? ORDER BY id", (now,))
+        lines.extend(f"\n{self._row_to_record(r).to_markdown()}\n" for r in rows)
+        content = "".join(lines)
+
+        os.makedirs(os.path.dirname(self.markdown_path), exist_ok=True)
+        tmp_path = f"{self.markdown_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, self.markdown_path)
+        self._record_markdown_version(conn)
+        return content
+
+    def render_markdown(self) -> str:
+        """Regenerates MEMORY.md from the preamble and the current records."""
+        self.sync_markdown()
+        self.purge_expired()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return self._write_markdown(conn)
+
+_store: Optional[MemoryStore] = None
+
+
+def get_memory_store() -> MemoryStore:
+    """Returns the process-wide MemoryStore, creating (and migrating) it on first use."""
+    global _store
+    if _store is None:
+        _store = MemoryStore()
+    return _store
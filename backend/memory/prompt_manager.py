@@ -22,16 +22,8 @@ def build_system_prompt(query: str = "") -> str:
     """
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
-    # Dynamically hot-plug skills before building the prompt
-    try:
-        from backend.skills.skills_manager import SkillsManager
-        SkillsManager.generate_snapshot()
-    except Exception as e:
-        print(f"Error hot-plugging skills: {e}")
-    
     # Paths to the core files
     files = {
-        "SKILLS_SNAPSHOT": os.path.join(project_root, "backend", "skills", "SKILLS_SNAPSHOT.md"),
         "SOUL": os.path.join(project_root, "backend", "workspace", "SOUL.md"),
         "IDENTITY": os.path.join(project_root, "backend", "workspace", "IDENTITY.md"),
         "USER": os.path.join(project_root, "backend", "workspace", "USER.md"),
@@ -39,6 +31,17 @@ def build_system_prompt(query: str = "") -> str:
     }
     
     prompt_parts = []
+
+    # Dynamically hot-plug skills, listing only the ones relevant to this query
+    try:
+        from backend.skills.skills_manager import SkillsManager
+        skills_snapshot = SkillsManager.select_snapshot(query)
+        prompt_parts.append(f"<!-- BEGIN SKILLS_SNAPSHOT -->\n{skills_snapshot}\n<!-- END SKILLS_SNAPSHOT -->")
+        prefetched = SkillsManager.prefetch_skill(query)
+        if prefetched:
+            prompt_parts.append(f"<!-- BEGIN SKILL_PREFETCH -->\n{prefetched}\n<!-- END SKILL_PREFETCH -->")
+    except Exception as e:
+        print(f"Error hot-plugging skills: {e}")
     
     for name, path in files.items():
         content = read_and_truncate_file(path)
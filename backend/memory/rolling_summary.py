@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+from typing import Callable, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SUMMARIES_DIR = os.path.join(PROJECT_ROOT, "backend", "sessions", "summaries")
+
+# Turns (a user message and everything up to the next one) summarized together as one block
+SUMMARY_BLOCK_TURNS = int(os.getenv("SUMMARY_BLOCK_TURNS", "4"))
+# This many consecutive summaries of one level are merged into a single summary of the next level
+SUMMARY_MERGE_FANOUT = int(os.getenv("SUMMARY_MERGE_FANOUT", "4"))
+# Tool results are clipped to this many characters in a block's summarization prompt
+TOOL_RESULT_PROMPT_CHARS = 1000
+# Block summaries kept by content hash, so a block compressed again (e.g. after a failed save) isn't re-summarized
+RECENT_BLOCK_CACHE = 32
+
+SUMMARY_PREFIX = "Summary of previous conversation:\n"
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def format_block(messages: List[BaseMessage]) -> str:
+    """Renders a block of turns as a plain transcript for the summarization prompt."""
+    lines = []
+    for m in messages:
+        if isinstance(m, HumanMessage):
+            text = m.content if isinstance(m.content, str) else str(m.content)
+            lines.append(f"Human: {text}")
+        elif isinstance(m, AIMessage):
+            text = m.content if m.content and isinstance(m.content, str) else ""
+            calls = ", ".join(call["name"] for call in m.tool_calls)
+            if calls:
+                text = f"{text} (called tools: {calls})".strip()
+            lines.append(f"AI: {text or '(Tool usage or complex content)'}")
+        elif isinstance(m, ToolMessage):
+            text = m.content if isinstance(m.content, str) else str(m.content)
+            if len(text) > TOOL_RESULT_PROMPT_CHARS:
+                text = text[:TOOL_RESULT_PROMPT_CHARS] + "..."
+            lines.append(f"Tool Result: {text}")
+    return "\n".join(lines)
+
+
+def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Groups messages into turns starting at each HumanMessage, so tool call/result pairs stay together."""
+    turns: List[List[BaseMessage]] = []
+    for m in messages:
+        if isinstance(m, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(m)
+    return turns
+
+
+class RollingSummary:
+    """Hierarchical summary of a session's compressed history, persisted beside the session.
+
+    Compressed turns are summarized in blocks of SUMMARY_BLOCK_TURNS; whenever the
+    newest SUMMARY_MERGE_FANOUT summaries share a level they are merged into one summary
+    a level up, like carries in a counter. A compression pass therefore only summarizes
+    the blocks it removes (plus amortized merges), and the stored summary stays a
+    handful of nodes however long the session gets.
+    """
+
+    def __init__(self, session_id: str, summarize: Callable[[str], str]):
+        self.path = os.path.join(SUMMARIES_DIR, f"{session_id}.json")
+        self.summarize = summarize
+        self.nodes: List[dict] = []  # oldest first: {"level", "key", "summary"}
+        self.recent_blocks: dict = {}
+        self.rendered_key: Optional[str] = None
+        self.llm_calls = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.nodes = state.get("nodes", [])
+        self.recent_blocks = state.get("recent_blocks", {})
+        self.rendered_key = state.get("rendered_key")
+
+    def _save(self):
+        os.makedirs(SUMMARIES_DIR, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"nodes": self.nodes, "recent_blocks": self.recent_blocks, "rendered_key": self.rendered_key}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def render(self) -> str:
+        return "\n\n".join(node["summary"] for node in self.nodes)
+
+    def adopt(self, summary_message: Optional[str]):
+        """Lines the tree up with the summary currently in the history.
+
+        If the history's summary is not the one this tree rendered (an older session format,
+        or another writer), that text becomes the single oldest node instead.
+        """
+        text = summary_message[len(SUMMARY_PREFIX):] if summary_message and summary_message.startswith(SUMMARY_PREFIX) else summary_message
+        if text is None:
+            if self.nodes:
+                self.nodes = []
+            return
+        if self.rendered_key == _digest(text):
+            return
+        self.nodes = [{"level": SUMMARY_MERGE_FANOUT, "key": _digest(text), "summary": text}] if text.strip() else []
+
+    def _summarize_block(self, block: List[BaseMessage]) -> dict:
+        transcript = format_block(block)
+        key = _digest(transcript)
+        summary = self.recent_blocks.get(key)
+        if summary is None:
+            summary = self.summarize(
+                "Summarize this part of a conversation concisely. "
+                "Preserve all key facts, constraints, user preferences, decisions and results of tool calls. "
+                "This summary will serve as memory for future interactions.\n\n"
+                f"{transcript}"
+            )
+            self.llm_calls += 1
+            self.recent_blocks[key] = summary
+            while len(self.recent_blocks) > RECENT_BLOCK_CACHE:
+                self.recent_blocks.pop(next(iter(self.recent_blocks)))
+        return {"level": 0, "key": key, "summary": summary}
+
+    def _merge_tail(self):
+        while len(self.nodes) >= SUMMARY_MERGE_FANOUT:
+            tail = self.nodes[-SUMMARY_MERGE_FANOUT:]
+            level = tail[0]["level"]
+            if any(node["level"] != level for node in tail):
+                return
+            parts = "\n\n".join(f"Part {i + 1}:\n{node['summary']}" for i, node in enumerate(tail))
+            summary = self.summarize(
+                "Combine these consecutive summaries of one conversation, oldest first, into a single concise summary. "
+                "Keep every fact, constraint, preference and decision that still matters; drop superseded details.\n\n"
+                f"{parts}"
+            )
+            self.llm_calls += 1
+            merged = {"level": level + 1, "key": _digest("".join(node["key"] for node in tail)), "summary": summary}
+            self.nodes[-SUMMARY_MERGE_FANOUT:] = [merged]
+
+    def compress(self, turns: List[List[BaseMessage]]) -> str:
+        """Summarizes the given oldest turns block by block into the tree; returns the new summary text."""
+        for start in range(0, len(turns), SUMMARY_BLOCK_TURNS):
+            block = [m for turn in turns[start:start + SUMMARY_BLOCK_TURNS] for m in turn]
+            self.nodes.append(self._summarize_block(block))
+            self._merge_tail()
+        text = self.render()
+        self.rendered_key = _digest(text)
+        self._save()
+        return text
@@ -1,12 +1,27 @@
 import os
 import json
-from typing import List, Dict, Any
+import threading
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage, messages_to_dict
 
+from backend.memory.history_cache import file_version, history_cache
+from backend.memory.rolling_summary import SUMMARY_PREFIX, RollingSummary, split_turns
+
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 SESSIONS_DIR = os.path.join(PROJECT_ROOT, "backend", "sessions")
 
+# The session the current agent turn belongs to, so tools can attribute their effects
+current_session_id: ContextVar[Optional[str]] = ContextVar("current_session_id", default=None)
+
+def _tool_safe_cut(messages: List[BaseMessage], index: int) -> int:
+    """The cut point nearest `index` (earlier ones first) that doesn't separate tool results from the call that made them."""
+    for i in [*range(index, 0, -1), *range(index + 1, len(messages))]:
+        if not isinstance(messages[i], ToolMessage):
+            return i
+    return 0
+
 class SessionManager:
     def __init__(self, session_id: str = "main_session"):
         self.session_id = session_id
@@ -14,9 +29,13 @@ class SessionManager:
         os.makedirs(SESSIONS_DIR, exist_ok=True)
         
     def load_history(self) -> List[BaseMessage]:
-        """Loads conversation history from the local JSON file."""
-        if not os.path.exists(self.session_path):
+        """Loads conversation history, from the in-process cache while the JSON file is unchanged."""
+        version = file_version(self.session_path)
+        if version is None:
             return []
+        cached = history_cache.get(self.session_path, version)
+        if cached is not None:
+            return cached
             
         try:
             with open(self.session_path, 'r', encoding='utf-8') as f:
@@ -26,68 +45,63 @@ class SessionManager:
             # Warning: For ToolMessages to align properly, proper dict structures are needed.
             # Using messages_from_dict or manually parsing depending on LangChain version.
             from langchain_core.messages import messages_from_dict
-            return messages_from_dict(data)
+            messages = messages_from_dict(data)
+            history_cache.put(self.session_path, version, messages)
+            return messages
         except Exception as e:
             print(f"Error loading session {self.session_id}: {e}")
             return []
             
     def _compress_history(self, messages: List[BaseMessage], max_messages: int = 40) -> List[BaseMessage]:
-        """Compresses older messages using an LLM to prevent context bloat."""
+        """Compresses older messages into a hierarchical rolling summary to prevent context bloat.
+
+        Only the turns removed by this pass are summarized (see RollingSummary); earlier
+        summaries are reused from the session's summary sidecar rather than re-summarized.
+        """
         if len(messages) <= max_messages:
             return messages
             
-        from backend.graph.agent import get_llm
-        
-        # 1. Separate system messages and past summaries from the rest
-        system_msgs = [m for m in messages if isinstance(m, SystemMessage) and "Summary of previous conversation" not in getattr(m, 'content', '')]
-        non_system_msgs = [m for m in messages if not isinstance(m, SystemMessage) and "Summary of previous conversation" not in getattr(m, 'content', '')]
-        old_summaries = [m for m in messages if isinstance(m, SystemMessage) and "Summary of previous conversation" in getattr(m, 'content', '')]
+        # 1. Separate system messages, the past summary and the conversation in one pass
+        system_msgs, non_system_msgs = [], []
+        old_summary = None
+        for m in messages:
+            content = getattr(m, 'content', '')
+            if isinstance(m, SystemMessage) and isinstance(content, str) and content.startswith(SUMMARY_PREFIX):
+                old_summary = content
+            elif isinstance(m, SystemMessage):
+                system_msgs.append(m)
+            else:
+                non_system_msgs.append(m)
         
         if len(non_system_msgs) <= max_messages:
             return messages
             
-        # 2. Find split point: roughly half, but align with a HumanMessage to avoid breaking tool call pairs
-        num_to_compress = len(non_system_msgs) // 2
-        split_index = num_to_compress
-        while split_index < len(non_system_msgs) and not isinstance(non_system_msgs[split_index], HumanMessage):
+        # 2. Compress whole turns, oldest first, until about half the conversation remains;
+        # turns start at a HumanMessage so tool call pairs are never split
+        turns = split_turns(non_system_msgs)
+        remaining = len(non_system_msgs)
+        split_index = 0
+        while split_index < len(turns) - 1 and remaining > max_messages // 2:
+            remaining -= len(turns[split_index])
             split_index += 1
             
-        if split_index >= len(non_system_msgs):
-            # Fallback if no HumanMessage found: just take half
-            split_index = num_to_compress
-            
-        msgs_to_compress = non_system_msgs[:split_index]
-        msgs_to_keep = non_system_msgs[split_index:]
-        
-        # 3. Format conversation for the LLM
-        conversation_lines = []
-        if old_summaries:
-            conversation_lines.append(f"PREVIOUS SUMMARY: {old_summaries[-1].content}")
-        
-        for m in msgs_to_compress:
-            if isinstance(m, HumanMessage):
-                text = m.content if isinstance(m.content, str) else str(m.content)
-                conversation_lines.append(f"Human: {text}")
-            elif isinstance(m, AIMessage):
-                text = m.content if m.content and isinstance(m.content, str) else "(Tool usage or complex content)"
-                conversation_lines.append(f"AI: {text}")
-            elif isinstance(m, ToolMessage):
-                text = m.content if isinstance(m.content, str) else str(m.content)
-                conversation_lines.append(f"Tool Result: {text[:200]}...")
-                
-        conversation_str = "\n".join(conversation_lines)
+        turns_to_compress = turns[:split_index]
+        msgs_to_keep = [m for turn in turns[split_index:] for m in turn]
+        if not turns_to_compress:
+            # A single oversized turn: cut it in half, between tool steps rather than inside one
+            cut = _tool_safe_cut(non_system_msgs, len(non_system_msgs) // 2)
+            if cut == 0:
+                return messages
+            turns_to_compress = [non_system_msgs[:cut]]
+            msgs_to_keep = non_system_msgs[cut:]
         
         try:
-            llm = get_llm()
-            prompt = (
-                "Please summarize the following conversation history concisely. "
-                "Preserve all key facts, constraints, user preferences, and important context. "
-                "This summary will serve as memory for future interactions.\n\n"
-                f"{conversation_str}"
-            )
-            
-            summary_response = llm.invoke(prompt)
-            summary_message = SystemMessage(content=f"Summary of previous conversation:\n{summary_response.content}")
+            from backend.graph.model_router import get_model
+            llm = get_model("summarize")
+            summary = RollingSummary(self.session_id, lambda prompt: llm.invoke(prompt).content)
+            summary.adopt(old_summary)
+            summary_text = summary.compress(turns_to_compress)
+            summary_message = SystemMessage(content=f"{SUMMARY_PREFIX}{summary_text}")
             
             # Combine back: original system msgs + new summary + kept msgs
             return system_msgs + [summary_message] + msgs_to_keep
@@ -95,7 +109,7 @@ class SessionManager:
         except Exception as e:
             print(f"Error compressing history: {e}")
             # Fallback to direct truncation if LLM fails
-            return messages[-max_messages:]
+            return messages[_tool_safe_cut(messages, len(messages) - max_messages):]
 
     def save_history(self, messages: List[BaseMessage]):
         """Saves conversation history to the local JSON file."""
@@ -104,8 +118,19 @@ class SessionManager:
             messages = self._compress_history(messages)
             
             data = messages_to_dict(messages)
-            with open(self.session_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # Write-through: replace the file atomically so other workers never read a partial
+            # file, then cache exactly what was written under the new file version
+            tmp_path = f"{self.session_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                # The version is taken before the rename: a concurrent save by another worker can't be cached as ours
+                version = file_version(tmp_path)
+                os.replace(tmp_path, self.session_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            history_cache.put(self.session_path, version, messages)
         except Exception as e:
             print(f"Error saving session {self.session_id}: {e}")
             
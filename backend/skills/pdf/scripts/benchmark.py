@@ -0,0 +1,149 @@
+"""
+Benchmarks for the PDF form scripts on large synthetic documents.
+
+Usage: python benchmark.py convert [--pages N] [--workers N]
+       python benchmark.py structure [--pages N] [--workers N]
+       python benchmark.py fill [--records N] [--workers N]
+       python benchmark.py field-info [--pages N]
+
+The synthetic PDFs are generated with reportlab, which the scripts themselves
+don't need; it is in the project's dev dependencies (`uv sync --group dev`).
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from convert_pdf_to_images import convert, peak_rss_mb
+from extract_form_field_info import field_index_path, load_field_info
+from extract_form_structure import iter_page_structures
+from fill_fillable_fields import fill_batch
+
+
+
+
+def make_synthetic_pdf(pdf_path, num_pages, rows_per_page=20):
+    """Writes a form-like PDF: per page, rows of text labels, full-width lines and checkboxes."""
+    width, height = letter
+    c = canvas.Canvas(pdf_path, pagesize=letter)
+    for page in range(1, num_pages + 1):
+        c.setFont("Helvetica", 10)
+        c.drawString(50, height - 40, f"Synthetic form page {page}")
+        row_height = (height - 100) / rows_per_page
+        for row in range(rows_per_page):
+            y = height - 60 - row * row_height
+            c.drawString(50, y - 14, f"Field {row + 1} label")
+            c.line(40, y - row_height + 2, width - 40, y - row_height + 2)
+            c.rect(width - 80, y - 16, 10, 10)
+        c.showPage()
+    c.save()
+
+
+def make_fillable_pdf(pdf_path, num_pages, fields_per_page=20):
+    """Writes a PDF with AcroForm fields named page<N>_<kind><row>: mostly text fields,
+    plus checkboxes, two-option radio groups and choice lists."""
+    width, height = letter
+    c = canvas.Canvas(pdf_path, pagesize=letter)
+    for page in range(1, num_pages + 1):
+        row_height = (height - 100) / fields_per_page
+        for row in range(fields_per_page):
+            y = height - 60 - row * row_height
+            c.drawString(50, y - 14, f"Field {row + 1}")
+            if row % 4 == 3:
+                c.acroForm.checkbox(name=f"page{page}_check{row}", x=150, y=y - 18, size=12)
+            elif row % 4 == 1:
+                for i, option in enumerate(("yes", "no")):
+                    c.acroForm.radio(name=f"page{page}_radio{row}", value=option, x=150 + i * 40, y=y - 18, size=12)
+            elif row % 8 == 2:
+                c.acroForm.choice(name=f"page{page}_choice{row}", options=["alpha", "beta", "gamma"], value="alpha", x=150, y=y - 20, width=120, height=16)
+            else:
+                c.acroForm.textfield(name=f"page{page}_text{row}", x=150, y=y - 20, width=300, height=16)
+        c.showPage()
+    c.save()
+
+
+def bench_convert(num_pages, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "synthetic.pdf")
+        make_synthetic_pdf(pdf_path, num_pages)
+        start = time.perf_counter()
+        convert(pdf_path, os.path.join(tmp, "images"), workers=workers)
+        elapsed = time.perf_counter() - start
+    rss_self, rss_children = peak_rss_mb()
+    print(f"convert_pdf_to_images: {num_pages} pages, {num_pages / elapsed:.1f} pages/sec, peak RSS {rss_self} MB (renderer {rss_children} MB)")
+
+
+def bench_structure(num_pages, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "synthetic.pdf")
+        make_synthetic_pdf(pdf_path, num_pages)
+        for label, worker_count in (("1 worker", 1), (f"{workers or os.cpu_count()} workers", workers)):
+            start = time.perf_counter()
+            extracted = sum(1 for _ in iter_page_structures(pdf_path, workers=worker_count))
+            elapsed = time.perf_counter() - start
+            print(f"extract_form_structure ({label}): {extracted} pages, {extracted / elapsed:.1f} pages/sec")
+
+
+def bench_fill(num_records, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path = os.path.join(tmp, "template.pdf")
+        make_fillable_pdf(template_path, 2)
+        # Fill the first few text fields of page 1, whatever kinds make_fillable_pdf puts on which rows
+        text_fields = [f["field_id"] for f in load_field_info(template_path) if f["page"] == 1 and f["type"] == "text"][:3]
+        records_path = os.path.join(tmp, "records.jsonl")
+        with open(records_path, "w") as f:
+            for i in range(num_records):
+                f.write(json.dumps({"values": {field_id: f"record {i} {field_id}" for field_id in text_fields}}) + "\n")
+        written, failures = fill_batch(template_path, records_path, os.path.join(tmp, "out"), workers=workers)
+    print(f"fill_fillable_fields --batch: {written} written, {len(failures)} failed")
+
+
+def bench_field_info(num_pages):
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "fillable.pdf")
+        make_fillable_pdf(pdf_path, num_pages, fields_per_page=30)
+        for label in ("cold", "sidecar"):
+            start = time.perf_counter()
+            fields = load_field_info(pdf_path)
+            elapsed = time.perf_counter() - start
+            print(f"extract_form_field_info ({label}): {len(fields)} fields in {elapsed:.3f}s")
+        print(f"field index: {os.path.getsize(field_index_path(pdf_path)) / 1024:.0f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF form scripts on synthetic PDFs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="convert_pdf_to_images.py")
+    convert_parser.add_argument("--pages", type=int, default=300)
+    convert_parser.add_argument("--workers", type=int)
+
+    structure_parser = subparsers.add_parser("structure", help="extract_form_structure.py")
+    structure_parser.add_argument("--pages", type=int, default=500)
+    structure_parser.add_argument("--workers", type=int)
+
+    fill_parser = subparsers.add_parser("fill", help="fill_fillable_fields.py --batch")
+    fill_parser.add_argument("--records", type=int, default=1000)
+    fill_parser.add_argument("--workers", type=int)
+
+    field_info_parser = subparsers.add_parser("field-info", help="extract_form_field_info.py")
+    field_info_parser.add_argument("--pages", type=int, default=150)
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        bench_convert(args.pages, args.workers)
+    elif args.command == "structure":
+        bench_structure(args.pages, args.workers)
+    elif args.command == "fill":
+        bench_fill(args.records, args.workers)
+    elif args.command == "field-info":
+        bench_field_info(args.pages)
+
+
+if __name__ == "__main__":
+    main()
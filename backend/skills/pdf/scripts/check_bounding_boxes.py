@@ -1,10 +1,20 @@
 from dataclasses import dataclass
+import argparse
 import json
+import math
+import statistics
 import sys
 
 
 
 
+# The text report stops after this many messages unless asked for everything
+DEFAULT_MAX_MESSAGES = 20
+# A rect spanning more grid cells than this (e.g. a page-sized box among small ones) isn't
+# bucketed; it is compared against every other rect instead
+MAX_CELLS_PER_RECT = 64
+
+
 @dataclass
 class RectAndField:
     rect: list[float]
@@ -12,54 +22,155 @@ class RectAndField:
     field: dict
 
 
-def get_bounding_box_messages(fields_json_stream) -> list[str]:
-    messages = []
-    fields = json.load(fields_json_stream)
-    messages.append(f"Read {len(fields['form_fields'])} fields")
+def rects_intersect(r1, r2):
+    disjoint_horizontal = r1[0] >= r2[2] or r1[2] <= r2[0]
+    disjoint_vertical = r1[1] >= r2[3] or r1[3] <= r2[1]
+    return not (disjoint_horizontal or disjoint_vertical)
+
+
+def intersecting_pairs(rects):
+    """Yields index pairs (i, j), i < j, of intersecting rects using a uniform grid index.
+
+    Each rect is bucketed into the grid cells it covers, so only rects that
+    share a cell are compared; with cells sized to the typical rect this is
+    close to linear instead of comparing every pair. The few rects much larger
+    than the cells are checked directly against all others.
+    """
+    if len(rects) < 2:
+        return
+    # Form boxes are usually wide and short, so size cells per axis
+    cell_width = max(statistics.median(abs(r[2] - r[0]) for r in rects), 1.0)
+    cell_height = max(statistics.median(abs(r[3] - r[1]) for r in rects), 1.0)
+
+    def cell_span(r):
+        x_start, x_end = math.floor(min(r[0], r[2]) / cell_width), math.floor(max(r[0], r[2]) / cell_width)
+        y_start, y_end = math.floor(min(r[1], r[3]) / cell_height), math.floor(max(r[1], r[3]) / cell_height)
+        return range(x_start, x_end + 1), range(y_start, y_end + 1)
+
+    def cells(r):
+        xs, ys = cell_span(r)
+        for x in xs:
+            for y in ys:
+                yield x, y
+
+    grid = {}
+    bucketed = []
+    overflow = []
+    for i, r in enumerate(rects):
+        xs, ys = cell_span(r)
+        if len(xs) * len(ys) > MAX_CELLS_PER_RECT:
+            overflow.append(i)
+            continue
+        bucketed.append(i)
+        for cell in cells(r):
+            grid.setdefault(cell, []).append(i)
+
+    for i in bucketed:
+        r = rects[i]
+        seen = set()
+        for cell in cells(r):
+            for j in grid[cell]:
+                if j > i and j not in seen:
+                    seen.add(j)
+                    if rects_intersect(r, rects[j]):
+                        yield i, j
+
+    overflow_set = set(overflow)
+    for i in overflow:
+        for j in range(len(rects)):
+            # Pairs of two oversized rects are checked once, from the lower index
+            if j == i or (j in overflow_set and j < i):
+                continue
+            if rects_intersect(rects[i], rects[j]):
+                yield min(i, j), max(i, j)
 
-    def rects_intersect(r1, r2):
-        disjoint_horizontal = r1[0] >= r2[2] or r1[2] <= r2[0]
-        disjoint_vertical = r1[1] >= r2[3] or r1[3] <= r2[1]
-        return not (disjoint_horizontal or disjoint_vertical)
 
+def find_bounding_box_problems(fields):
+    """Returns every bounding box problem, ordered as the pairwise check reported them."""
     rects_and_fields = []
     for f in fields["form_fields"]:
         rects_and_fields.append(RectAndField(f["label_bounding_box"], "label", f))
         rects_and_fields.append(RectAndField(f["entry_bounding_box"], "entry", f))
 
-    has_error = False
+    indices_by_page = {}
+    for i, rf in enumerate(rects_and_fields):
+        indices_by_page.setdefault(rf.field["page_number"], []).append(i)
+
+    keyed_problems = []
+    for page, indices in indices_by_page.items():
+        for a, b in intersecting_pairs([rects_and_fields[i].rect for i in indices]):
+            ri, rj = rects_and_fields[indices[a]], rects_and_fields[indices[b]]
+            keyed_problems.append(((indices[a], 0, indices[b]), {
+                "type": "intersection",
+                "page": page,
+                "field": ri.field["description"],
+                "rect_type": ri.rect_type,
+                "rect": ri.rect,
+                "other_field": rj.field["description"],
+                "other_rect_type": rj.rect_type,
+                "other_rect": rj.rect,
+                "same_field": ri.field is rj.field,
+            }))
+
     for i, ri in enumerate(rects_and_fields):
-        for j in range(i + 1, len(rects_and_fields)):
-            rj = rects_and_fields[j]
-            if ri.field["page_number"] == rj.field["page_number"] and rects_intersect(ri.rect, rj.rect):
-                has_error = True
-                if ri.field is rj.field:
-                    messages.append(f"FAILURE: intersection between label and entry bounding boxes for `{ri.field['description']}` ({ri.rect}, {rj.rect})")
-                else:
-                    messages.append(f"FAILURE: intersection between {ri.rect_type} bounding box for `{ri.field['description']}` ({ri.rect}) and {rj.rect_type} bounding box for `{rj.field['description']}` ({rj.rect})")
-                if len(messages) >= 20:
-                    messages.append("Aborting further checks; fix bounding boxes and try again")
-                    return messages
-        if ri.rect_type == "entry":
-            if "entry_text" in ri.field:
-                font_size = ri.field["entry_text"].get("font_size", 14)
-                entry_height = ri.rect[3] - ri.rect[1]
-                if entry_height < font_size:
-                    has_error = True
-                    messages.append(f"FAILURE: entry bounding box height ({entry_height}) for `{ri.field['description']}` is too short for the text content (font size: {font_size}). Increase the box height or decrease the font size.")
-                    if len(messages) >= 20:
-                        messages.append("Aborting further checks; fix bounding boxes and try again")
-                        return messages
-
-    if not has_error:
+        if ri.rect_type == "entry" and "entry_text" in ri.field:
+            font_size = ri.field["entry_text"].get("font_size", 14)
+            entry_height = ri.rect[3] - ri.rect[1]
+            if entry_height < font_size:
+                keyed_problems.append(((i, 1, 0), {
+                    "type": "entry_too_short",
+                    "page": ri.field["page_number"],
+                    "field": ri.field["description"],
+                    "rect": ri.rect,
+                    "entry_height": entry_height,
+                    "font_size": font_size,
+                }))
+
+    keyed_problems.sort(key=lambda kp: kp[0])
+    return [problem for _, problem in keyed_problems]
+
+
+def problem_message(problem):
+    if problem["type"] == "entry_too_short":
+        return f"FAILURE: entry bounding box height ({problem['entry_height']}) for `{problem['field']}` is too short for the text content (font size: {problem['font_size']}). Increase the box height or decrease the font size."
+    if problem["same_field"]:
+        return f"FAILURE: intersection between label and entry bounding boxes for `{problem['field']}` ({problem['rect']}, {problem['other_rect']})"
+    return f"FAILURE: intersection between {problem['rect_type']} bounding box for `{problem['field']}` ({problem['rect']}) and {problem['other_rect_type']} bounding box for `{problem['other_field']}` ({problem['other_rect']})"
+
+
+def get_bounding_box_messages(fields_json_stream, max_messages=DEFAULT_MAX_MESSAGES) -> list[str]:
+    messages = []
+    fields = json.load(fields_json_stream)
+    messages.append(f"Read {len(fields['form_fields'])} fields")
+
+    problems = find_bounding_box_problems(fields)
+    for problem in problems:
+        messages.append(problem_message(problem))
+        if max_messages and len(messages) >= max_messages:
+            messages.append("Aborting further checks; fix bounding boxes and try again")
+            return messages
+
+    if not problems:
         messages.append("SUCCESS: All bounding boxes are valid")
     return messages
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: check_bounding_boxes.py [fields.json]")
-        sys.exit(1)
-    with open(sys.argv[1]) as f:
-        messages = get_bounding_box_messages(f)
+    parser = argparse.ArgumentParser(description="Check fields.json bounding boxes for overlaps and undersized entries.")
+    parser.add_argument("fields_json", help="fields.json")
+    parser.add_argument("--all", action="store_true", help="report every problem instead of stopping after the first few")
+    parser.add_argument("--json", action="store_true", help="print the problems as structured JSON")
+    args = parser.parse_args()
+    if args.json:
+        with open(args.fields_json) as f:
+            fields = json.load(f)
+        problems = find_bounding_box_problems(fields)
+        print(json.dumps({
+            "fields": len(fields["form_fields"]),
+            "success": not problems,
+            "problems": problems,
+        }, indent=2))
+        sys.exit(0)
+    with open(args.fields_json) as f:
+        messages = get_bounding_box_messages(f, max_messages=None if args.all else DEFAULT_MAX_MESSAGES)
     for msg in messages:
         print(msg)
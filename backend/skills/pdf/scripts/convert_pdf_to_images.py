@@ -1,33 +1,92 @@
+import argparse
 import os
+import resource
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from pdf2image import convert_from_path
+from pypdf import PdfReader
 
+from page_ranges import parse_page_ranges
 
 
 
-def convert(pdf_path, output_dir, max_dim=1000):
-    images = convert_from_path(pdf_path, dpi=200)
 
-    for i, image in enumerate(images):
-        width, height = image.size
-        if width > max_dim or height > max_dim:
-            scale_factor = min(max_dim / width, max_dim / height)
-            new_width = int(width * scale_factor)
-            new_height = int(height * scale_factor)
-            image = image.resize((new_width, new_height))
-        
-        image_path = os.path.join(output_dir, f"page_{i+1}.png")
-        image.save(image_path)
-        print(f"Saved page {i+1} as {image_path} (size: {image.size})")
+# Pages are never rendered above this resolution, matching the previous fixed 200 DPI render
+MAX_DPI = 200
 
-    print(f"Converted {len(images)} pages to PNG images")
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its (waited-for) children, in MB."""
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(self_kb / 1024, 1), round(children_kb / 1024, 1)
+
+
+def target_size(page, max_dim):
+    """Pixel size a page renders to: its CropBox at MAX_DPI, scaled down so the longest side fits max_dim."""
+    # The CropBox is the visible page area viewers show; it falls back to the MediaBox when absent
+    width = float(page.cropbox.width)
+    height = float(page.cropbox.height)
+    if page.rotation % 180 == 90:
+        width, height = height, width
+    scale = MAX_DPI / 72
+    if max(width, height) * scale > max_dim:
+        scale = min(max_dim / width, max_dim / height)
+    return round(width * scale), round(height * scale)
+
+
+def render_page(pdf_path, page_number, size, output_dir):
+    # pdftoppm scales straight to the target size and writes the PNG itself,
+    # so no full-resolution image is ever decoded into this process.
+    # Only the long edge is fixed (-scale-to), so the page keeps its aspect ratio
+    convert_from_path(
+        pdf_path,
+        first_page=page_number,
+        last_page=page_number,
+        size=max(size),
+        use_cropbox=True,
+        fmt="png",
+        output_folder=output_dir,
+        output_file=f"page_{page_number}",
+        single_file=True,
+        paths_only=True,
+    )
+    return page_number, os.path.join(output_dir, f"page_{page_number}.png"), size
+
+
+def convert(pdf_path, output_dir, max_dim=1000, pages=None, workers=None):
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    reader = PdfReader(pdf_path)
+    page_numbers = parse_page_ranges(pages, len(reader.pages))
+    sizes = {n: target_size(reader.pages[n - 1], max_dim) for n in page_numbers}
+
+    # Each page is rendered by its own pdftoppm process; threads only dispatch them
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda n: render_page(pdf_path, n, sizes[n], output_dir), page_numbers)
+        for page_number, image_path, size in results:
+            print(f"Saved page {page_number} as {image_path} (size: {size})")
+
+    elapsed = time.perf_counter() - start
+    rss_self, rss_children = peak_rss_mb()
+    print(f"Converted {len(page_numbers)} pages to PNG images")
+    print(f"Took {elapsed:.2f}s ({len(page_numbers) / elapsed:.1f} pages/sec, peak RSS {rss_self} MB, renderer peak RSS {rss_children} MB)")
+    return page_numbers
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: convert_pdf_to_images.py [input pdf] [output directory]")
+    parser = argparse.ArgumentParser(description="Convert PDF pages to PNG images.")
+    parser.add_argument("pdf_path", help="input pdf")
+    parser.add_argument("output_directory", help="output directory")
+    parser.add_argument("--pages", help='pages to convert, e.g. "1-3,7" (default: all)')
+    parser.add_argument("--max-dim", type=int, default=1000, help="maximum width/height in pixels (default: 1000)")
+    parser.add_argument("--workers", type=int, help="parallel page renders (default: CPU count)")
+    args = parser.parse_args()
+    try:
+        convert(args.pdf_path, args.output_directory, max_dim=args.max_dim, pages=args.pages, workers=args.workers)
+    except ValueError as e:
+        print(f"ERROR: {e}")
         sys.exit(1)
-    pdf_path = sys.argv[1]
-    output_directory = sys.argv[2]
-    convert(pdf_path, output_directory)
@@ -1,37 +1,188 @@
+"""
+Draw fields.json bounding boxes onto page images for visual validation
+(entry boxes in red, label boxes in blue).
+
+Usage: python create_validation_image.py <input.pdf> <fields.json> <output_dir> [--pages 1-3] [--contact-sheet sheet.png]
+       python create_validation_image.py [page number] [fields.json file] [input image path] [output image path]
+
+The first form renders the requested pages (default: every page with fields)
+straight from the PDF in parallel and writes validation_page_<N>.png for each;
+the second annotates a single pre-rendered page image.
+"""
+
+import argparse
 import json
+import math
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from PIL import Image, ImageDraw
+from pdf2image import convert_from_path
+from pypdf import PdfReader
+
+from convert_pdf_to_images import target_size
+from page_ranges import parse_page_ranges
+
+
+
+
+# The contact sheet's longest side, so the whole form fits in one image read
+CONTACT_SHEET_MAX_DIM = 2000
+
+
+def coordinate_size(page_info):
+    """The (width, height) space a page's fields.json boxes are expressed in, if declared."""
+    if page_info and "pdf_width" in page_info:
+        return float(page_info["pdf_width"]), float(page_info["pdf_height"])
+    if page_info and "image_width" in page_info:
+        return float(page_info["image_width"]), float(page_info["image_height"])
+    return None
+
+
+def visible_area(page):
+    """The page's CropBox as (left, top, width, height) in the top-left MediaBox coordinates
+    extract_form_structure reports, or None for rotated pages."""
+    if page.rotation % 360:
+        return None
+    media, crop = page.mediabox, page.cropbox
+    return float(crop.left - media.left), float(media.top - crop.top), float(crop.width), float(crop.height)
+
+
+def draw_field_boxes(img, fields, page_info=None, area=None):
+    """Draws the fields' boxes onto img, scaled from the page's coordinate space to the image size.
+
+    Boxes in PDF coordinates are mapped through `area` (the rendered CropBox, see visible_area)
+    when it is known, since the image shows only that part of the page.
+    """
+    x_scale = y_scale = 1.0
+    x_offset = y_offset = 0.0
+    size = coordinate_size(page_info)
+    if size and area and "pdf_width" in page_info:
+        x_offset, y_offset = area[0], area[1]
+        x_scale, y_scale = img.width / area[2], img.height / area[3]
+    elif size:
+        x_scale, y_scale = img.width / size[0], img.height / size[1]
 
+    def scaled(box):
+        return [(box[0] - x_offset) * x_scale, (box[1] - y_offset) * y_scale,
+                (box[2] - x_offset) * x_scale, (box[3] - y_offset) * y_scale]
 
+    draw = ImageDraw.Draw(img)
+    num_boxes = 0
+    for field in fields:
+        draw.rectangle(scaled(field['entry_bounding_box']), outline='red', width=2)
+        draw.rectangle(scaled(field['label_bounding_box']), outline='blue', width=2)
+        num_boxes += 2
+    return num_boxes
+
+
+def fields_by_page(data):
+    grouped = {}
+    for field in data["form_fields"]:
+        grouped.setdefault(field["page_number"], []).append(field)
+    return grouped
 
 
 def create_validation_image(page_number, fields_json_path, input_path, output_path):
+    """Draws one page's boxes onto a pre-rendered page image.
+
+    If fields.json declares the page's pdf_width/pdf_height or image_width/image_height,
+    the boxes are scaled from that size to the image's size; otherwise they are drawn
+    as pixel coordinates unchanged.
+    """
     with open(fields_json_path, 'r') as f:
         data = json.load(f)
 
-        img = Image.open(input_path)
-        draw = ImageDraw.Draw(img)
-        num_boxes = 0
-        
-        for field in data["form_fields"]:
-            if field["page_number"] == page_number:
-                entry_box = field['entry_bounding_box']
-                label_box = field['label_bounding_box']
-                draw.rectangle(entry_box, outline='red', width=2)
-                draw.rectangle(label_box, outline='blue', width=2)
-                num_boxes += 2
-        
-        img.save(output_path)
-        print(f"Created validation image at {output_path} with {num_boxes} bounding boxes")
+    page_info = next((p for p in data.get("pages", []) if p["page_number"] == page_number), None)
+    img = Image.open(input_path)
+    num_boxes = draw_field_boxes(img, fields_by_page(data).get(page_number, []), page_info)
+    img.save(output_path)
+    print(f"Created validation image at {output_path} with {num_boxes} bounding boxes")
+
+
+def render_validation_page(pdf_path, page_number, size, area, fields, page_info, output_dir):
+    # Render the CropBox with only the long edge fixed, as convert_pdf_to_images does
+    img = convert_from_path(pdf_path, first_page=page_number, last_page=page_number, size=max(size), use_cropbox=True)[0]
+    num_boxes = draw_field_boxes(img, fields, page_info, area)
+    output_path = os.path.join(output_dir, f"validation_page_{page_number}.png")
+    img.save(output_path)
+    return page_number, output_path, num_boxes
+
+
+def make_contact_sheet(image_paths, output_path, max_dim=CONTACT_SHEET_MAX_DIM):
+    """Tiles the page images, labelled with their page numbers, into one image."""
+    columns = math.ceil(math.sqrt(len(image_paths)))
+    rows = math.ceil(len(image_paths) / columns)
+    cell = max_dim // columns
+    sheet = Image.new("RGB", (columns * cell, rows * cell), "white")
+    draw = ImageDraw.Draw(sheet)
+    for i, (page_number, path) in enumerate(image_paths):
+        with Image.open(path) as img:
+            img.thumbnail((cell - 4, cell - 16))
+            x, y = (i % columns) * cell, (i // columns) * cell
+            sheet.paste(img, (x + 2, y + 14))
+        draw.text((x + 2, y), f"Page {page_number}", fill="black")
+    sheet.save(output_path)
+    return sheet.size
+
+
+def create_validation_images(pdf_path, fields_json_path, output_dir, pages=None, max_dim=1000, workers=None, contact_sheet=None):
+    """Renders each requested page from the PDF with its boxes drawn, in one pass over fields.json."""
+    start = time.perf_counter()
+    with open(fields_json_path, 'r') as f:
+        data = json.load(f)
+    grouped = fields_by_page(data)
+    page_infos = {p["page_number"]: p for p in data.get("pages", [])}
+
+    reader = PdfReader(pdf_path)
+    page_numbers = parse_page_ranges(pages, len(reader.pages)) if pages else sorted(
+        n for n in grouped if 1 <= n <= len(reader.pages))
+    sizes = {n: target_size(reader.pages[n - 1], max_dim) for n in page_numbers}
+    areas = {n: visible_area(reader.pages[n - 1]) for n in page_numbers}
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Rendering happens in pdftoppm subprocesses, so threads are enough to run pages in parallel
+    image_paths = []
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda n: render_validation_page(pdf_path, n, sizes[n], areas[n], grouped.get(n, []), page_infos.get(n), output_dir),
+            page_numbers)
+        for page_number, output_path, num_boxes in results:
+            image_paths.append((page_number, output_path))
+            print(f"Created validation image at {output_path} with {num_boxes} bounding boxes")
+
+    if contact_sheet and image_paths:
+        size = make_contact_sheet(image_paths, contact_sheet)
+        print(f"Created contact sheet at {contact_sheet} (size: {size})")
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {len(page_numbers)} validation pages in {elapsed:.2f}s")
+    return image_paths
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 5:
-        print("Usage: create_validation_image.py [page number] [fields.json file] [input image path] [output image path]")
+    if len(sys.argv) == 5 and sys.argv[1].isdigit():
+        page_number = int(sys.argv[1])
+        fields_json_path = sys.argv[2]
+        input_image_path = sys.argv[3]
+        output_image_path = sys.argv[4]
+        create_validation_image(page_number, fields_json_path, input_image_path, output_image_path)
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Render PDF pages with fields.json bounding boxes drawn on them.")
+    parser.add_argument("pdf_path", help="input pdf")
+    parser.add_argument("fields_json", help="fields.json")
+    parser.add_argument("output_directory", help="output directory")
+    parser.add_argument("--pages", help='pages to render, e.g. "1-3,7" (default: pages with fields)')
+    parser.add_argument("--max-dim", type=int, default=1000, help="maximum width/height in pixels (default: 1000)")
+    parser.add_argument("--workers", type=int, help="parallel page renders (default: CPU count)")
+    parser.add_argument("--contact-sheet", help="also write all pages tiled into this one image")
+    args = parser.parse_args()
+    try:
+        create_validation_images(args.pdf_path, args.fields_json, args.output_directory, pages=args.pages,
+                                 max_dim=args.max_dim, workers=args.workers, contact_sheet=args.contact_sheet)
+    except ValueError as e:
+        print(f"ERROR: {e}")
         sys.exit(1)
-    page_number = int(sys.argv[1])
-    fields_json_path = sys.argv[2]
-    input_image_path = sys.argv[3]
-    output_image_path = sys.argv[4]
-    create_validation_image(page_number, fields_json_path, input_image_path, output_image_path)
@@ -1,4 +1,6 @@
+import hashlib
 import json
+import os
 import sys
 
 from pypdf import PdfReader
@@ -16,6 +18,94 @@ def get_full_annotation_field_id(annotation):
     return ".".join(reversed(components)) if components else None
 
 
+def _object_key(obj):
+    ref = getattr(obj, "indirect_reference", None)
+    return (ref.idnum, ref.generation) if ref is not None else id(obj)
+
+
+def memoized_field_id(annotation, memo):
+    """Like get_full_annotation_field_id, but each node's full ID is computed once, so
+    widgets sharing parents don't re-walk the same /Parent chain."""
+    key = _object_key(annotation)
+    if key in memo:
+        return memo[key]
+    parent = annotation.get('/Parent')
+    parent_id = memoized_field_id(parent, memo) if parent else None
+    field_name = annotation.get('/T')
+    if field_name:
+        field_id = f"{parent_id}.{field_name}" if parent_id else str(field_name)
+    else:
+        field_id = parent_id
+    memo[key] = field_id
+    return field_id
+
+
+def _normal_appearance_states(widget):
+    try:
+        return list(widget["/AP"].get_object()["/N"].get_object().keys())
+    except (KeyError, AttributeError):
+        return []
+
+
+def get_form_fields(reader: PdfReader):
+    """Equivalent of reader.get_fields() for what get_field_info needs (/FT, /Kids, /_States_),
+    built in one pass over the AcroForm tree with memoized qualified names.
+
+    pypdf's get_fields checks every node against a list of visited nodes,
+    which is quadratic in the number of fields.
+    """
+    acro_form = reader.root_object.get("/AcroForm")
+    acro_form = acro_form.get_object() if acro_form is not None else None
+    if not acro_form or "/Fields" not in acro_form:
+        return {}
+
+    names = {}
+
+    def qualified_name(node):
+        key = _object_key(node)
+        if key not in names:
+            if "/TM" in node:
+                names[key] = str(node["/TM"])
+            elif "/Parent" in node:
+                names[key] = qualified_name(node["/Parent"].get_object()) + "." + str(node.get("/T", ""))
+            else:
+                names[key] = str(node.get("/T", ""))
+        return names[key]
+
+    fields = {}
+    visited = set()
+    stack = [f.get_object() for f in reversed(acro_form["/Fields"].get_object())]
+    while stack:
+        node = stack.pop()
+        key = _object_key(node)
+        if key in visited or ("/T" not in node and "/TM" not in node):
+            continue
+        visited.add(key)
+
+        field = {attr: node[attr] for attr in ("/FT", "/Kids", "/Ff") if attr in node}
+        ft = node.get("/FT", "")
+        if ft == "/Ch" and node.get("/Opt"):
+            field["/_States_"] = node["/Opt"]
+        if ft == "/Btn" and "/AP" in node:
+            states = _normal_appearance_states(node)
+            if "/Off" not in states:
+                states.append("/Off")
+            field["/_States_"] = states
+        elif ft == "/Btn" and node.get("/Ff", 0) & (1 << 15):
+            states = []
+            for kid in node.get("/Kids", []):
+                for state in _normal_appearance_states(kid.get_object()):
+                    if state not in states:
+                        states.append(state)
+            if node.get("/Ff", 0) & (1 << 14) and "/Off" in states:
+                states.remove("/Off")
+            field["/_States_"] = states
+        fields[qualified_name(node)] = field
+
+        stack.extend(kid.get_object() for kid in reversed(node.get("/Kids", [])))
+    return fields
+
+
 def make_field_dict(field, field_id):
     field_dict = {"field_id": field_id}
     ft = field.get('/FT')
@@ -45,7 +135,7 @@ def make_field_dict(field, field_id):
 
 
 def get_field_info(reader: PdfReader):
-    fields = reader.get_fields()
+    fields = get_form_fields(reader)
 
     field_info_by_id = {}
     possible_radio_names = set()
@@ -59,11 +149,12 @@ def get_field_info(reader: PdfReader):
 
 
     radio_fields_by_id = {}
+    field_id_memo = {}
 
     for page_index, page in enumerate(reader.pages):
         annotations = page.get('/Annots', [])
         for ann in annotations:
-            field_id = get_full_annotation_field_id(ann)
+            field_id = memoized_field_id(ann.get_object(), field_id_memo)
             if field_id in field_info_by_id:
                 field_info_by_id[field_id]["page"] = page_index + 1
                 field_info_by_id[field_id]["rect"] = ann.get('/Rect')
@@ -107,9 +198,47 @@ def get_field_info(reader: PdfReader):
     return sorted_fields
 
 
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def field_index_path(pdf_path):
+    return f"{pdf_path}.field_index.json"
+
+
+def load_field_info(pdf_path: str, reader: PdfReader = None):
+    """Returns get_field_info for the PDF, served from a sidecar index when the PDF's content hash matches.
+
+    The first call derives the field info and writes `<pdf>.field_index.json`;
+    later extract/fill/validate steps on the same file just load it.
+    """
+    sha256 = file_sha256(pdf_path)
+    sidecar = field_index_path(pdf_path)
+    try:
+        with open(sidecar) as f:
+            index = json.load(f)
+        if index.get("sha256") == sha256:
+            return index["fields"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    field_info = get_field_info(reader or PdfReader(pdf_path))
+    try:
+        tmp_path = f"{sidecar}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"sha256": sha256, "fields": field_info}, f)
+        os.replace(tmp_path, sidecar)
+    except OSError as e:
+        print(f"Could not write field index {sidecar}: {e}")
+    return field_info
+
+
 def write_field_info(pdf_path: str, json_output_path: str):
-    reader = PdfReader(pdf_path)
-    field_info = get_field_info(reader)
+    field_info = load_field_info(pdf_path)
     with open(json_output_path, "w") as f:
         json.dump(field_info, f, indent=2)
     print(f"Wrote {len(field_info)} fields to {json_output_path}")
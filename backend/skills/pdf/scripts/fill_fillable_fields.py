@@ -1,16 +1,18 @@
+import argparse
 import json
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 from pypdf import PdfReader, PdfWriter
 
-from extract_form_field_info import get_field_info
+from extract_form_field_info import load_field_info
 
 
 
 
-def fill_pdf_fields(input_pdf_path: str, fields_json_path: str, output_pdf_path: str):
-    with open(fields_json_path) as f:
-        fields = json.load(f)
+def group_values_by_page(fields):
     fields_by_page = {}
     for field in fields:
         if "value" in field:
@@ -19,29 +21,26 @@ def fill_pdf_fields(input_pdf_path: str, fields_json_path: str, output_pdf_path:
             if page not in fields_by_page:
                 fields_by_page[page] = {}
             fields_by_page[page][field_id] = field["value"]
-    
-    reader = PdfReader(input_pdf_path)
+    return fields_by_page
 
-    has_error = False
-    field_info = get_field_info(reader)
-    fields_by_ids = {f["field_id"]: f for f in field_info}
+
+def validation_errors(fields, fields_by_ids):
+    errors = []
     for field in fields:
         existing_field = fields_by_ids.get(field["field_id"])
         if not existing_field:
-            has_error = True
-            print(f"ERROR: `{field['field_id']}` is not a valid field ID")
+            errors.append(f"ERROR: `{field['field_id']}` is not a valid field ID")
         elif field["page"] != existing_field["page"]:
-            has_error = True
-            print(f"ERROR: Incorrect page number for `{field['field_id']}` (got {field['page']}, expected {existing_field['page']})")
+            errors.append(f"ERROR: Incorrect page number for `{field['field_id']}` (got {field['page']}, expected {existing_field['page']})")
         else:
             if "value" in field:
                 err = validation_error_for_field_value(existing_field, field["value"])
                 if err:
-                    print(err)
-                    has_error = True
-    if has_error:
-        sys.exit(1)
+                    errors.append(err)
+    return errors
+
 
+def write_filled_pdf(reader, fields_by_page, output_pdf_path):
     writer = PdfWriter(clone_from=reader)
     for page, field_values in fields_by_page.items():
         writer.update_page_form_field_values(writer.pages[page - 1], field_values, auto_regenerate=False)
@@ -52,6 +51,120 @@ def fill_pdf_fields(input_pdf_path: str, fields_json_path: str, output_pdf_path:
         writer.write(f)
 
 
+def fill_pdf_fields(input_pdf_path: str, fields_json_path: str, output_pdf_path: str):
+    with open(fields_json_path) as f:
+        fields = json.load(f)
+    fields_by_page = group_values_by_page(fields)
+    
+    reader = PdfReader(input_pdf_path)
+
+    field_info = load_field_info(input_pdf_path, reader)
+    fields_by_ids = {f["field_id"]: f for f in field_info}
+    errors = validation_errors(fields, fields_by_ids)
+    for err in errors:
+        print(err)
+    if errors:
+        sys.exit(1)
+
+    write_filled_pdf(reader, fields_by_page, output_pdf_path)
+
+
+_template_reader = None
+
+
+def _init_batch_worker(template_pdf_path):
+    # Workers parse the template and apply the pypdf patch once, not once per record
+    global _template_reader
+    monkeypatch_pydpf_method()
+    _template_reader = PdfReader(template_pdf_path)
+
+
+def _fill_batch_record(job):
+    record_number, fields_by_page, output_pdf_path = job
+    try:
+        write_filled_pdf(_template_reader, fields_by_page, output_pdf_path)
+        return record_number, None
+    except Exception as e:
+        return record_number, f"ERROR: failed to write {output_pdf_path}: {e}"
+
+
+def record_fields(record, fields_by_ids):
+    """Normalizes a batch record: a field_values.json-style list, or an object with
+    "fields" (such a list) or "values" ({field_id: value}, pages taken from the template)."""
+    if isinstance(record, list):
+        return record
+    if "fields" in record:
+        return record["fields"]
+    return [
+        {"field_id": field_id, "page": fields_by_ids.get(field_id, {}).get("page"), "value": value}
+        for field_id, value in record.get("values", {}).items()
+    ]
+
+
+def batch_output_path(output_dir, output_name, outputs):
+    """(path, error) for a record's output file; it must stay inside output_dir and not be taken by an earlier record."""
+    root = os.path.realpath(output_dir)
+    output_path = os.path.realpath(os.path.join(root, str(output_name)))
+    if output_path == root or os.path.commonpath([output_path, root]) != root:
+        return None, f"ERROR: output `{output_name}` is outside the output directory"
+    if output_path in outputs:
+        return None, f"ERROR: output `{output_name}` is already written by record {outputs[output_path]}"
+    return output_path, None
+
+
+def fill_batch(template_pdf_path: str, records_jsonl_path: str, output_dir: str, workers=None):
+    """Fills one template for every record in a JSONL file, validating against the template's schema once."""
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    monkeypatch_pydpf_method()
+    reader = PdfReader(template_pdf_path)
+    fields_by_ids = {f["field_id"]: f for f in load_field_info(template_pdf_path, reader)}
+
+    jobs = []
+    failures = {}
+    outputs = {}
+    total = 0
+    with open(records_jsonl_path) as f:
+        for record_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            total += 1
+            try:
+                record = json.loads(line)
+                fields = record_fields(record, fields_by_ids)
+                errors = validation_errors(fields, fields_by_ids)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                errors = [f"ERROR: malformed record: {e}"]
+            fields_by_page = group_values_by_page(fields) if not errors else {}
+            if not errors and not fields_by_page:
+                errors = ["ERROR: record has no field values to fill"]
+            if not errors:
+                output_name = record.get("output") if isinstance(record, dict) else None
+                output_path, error = batch_output_path(output_dir, output_name or f"record_{record_number}.pdf", outputs)
+                if error:
+                    errors = [error]
+            if errors:
+                failures[record_number] = errors
+                continue
+            outputs[output_path] = record_number
+            jobs.append((record_number, fields_by_page, output_path))
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(template_pdf_path,)) as executor:
+        for record_number, error in executor.map(_fill_batch_record, jobs, chunksize=max(1, len(jobs) // (workers * 4))):
+            if error:
+                failures[record_number] = [error]
+
+    for record_number in sorted(failures):
+        for err in failures[record_number]:
+            print(f"Record {record_number}: {err}")
+
+    elapsed = time.perf_counter() - start
+    written = total - len(failures)
+    print(f"Filled {written} of {total} records into {output_dir} in {elapsed:.2f}s ({written / elapsed:.1f} records/sec)")
+    return written, failures
+
+
 def validation_error_for_field_value(field_info, field_value):
     field_type = field_info["type"]
     field_id = field_info["field_id"]
@@ -88,11 +201,19 @@ def monkeypatch_pydpf_method():
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: fill_fillable_fields.py [input pdf] [field_values.json] [output pdf]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Fill a PDF's form fields.",
+        usage="fill_fillable_fields.py [input pdf] [field_values.json] [output pdf]\n"
+              "       fill_fillable_fields.py --batch [template pdf] [records.jsonl] [output directory] [--workers N]",
+    )
+    parser.add_argument("input_pdf")
+    parser.add_argument("fields_json")
+    parser.add_argument("output")
+    parser.add_argument("--batch", action="store_true", help="fill the template once per line of a JSONL records file")
+    parser.add_argument("--workers", type=int, help="worker processes for --batch (default: CPU count)")
+    args = parser.parse_args()
+    if args.batch:
+        _, failures = fill_batch(args.input_pdf, args.fields_json, args.output, workers=args.workers)
+        sys.exit(1 if failures else 0)
     monkeypatch_pydpf_method()
-    input_pdf = sys.argv[1]
-    fields_json = sys.argv[2]
-    output_pdf = sys.argv[3]
-    fill_pdf_fields(input_pdf, fields_json, output_pdf)
+    fill_pdf_fields(args.input_pdf, args.fields_json, args.output)
@@ -0,0 +1,26 @@
+"""
+Page-range parsing shared by the PDF scripts and the read_pdf tool.
+
+Kept free of rendering and platform-specific imports so any script can use it.
+"""
+
+
+def parse_page_ranges(spec, num_pages):
+    """Parses a 1-based page spec like "1-3,7,10-" into a sorted list of page numbers."""
+    if not spec:
+        return list(range(1, num_pages + 1))
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            start = int(start) if start.strip() else 1
+            end = int(end) if end.strip() else num_pages
+        else:
+            start = end = int(part)
+        if start < 1 or end > num_pages or start > end:
+            raise ValueError(f"Invalid page range `{part}` for a {num_pages}-page document")
+        pages.update(range(start, end + 1))
+    return sorted(pages)
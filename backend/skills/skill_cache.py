@@ -0,0 +1,120 @@
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SKILLS_DIR = os.path.join(PROJECT_ROOT, "backend", "skills")
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+@dataclass
+class SkillSection:
+    level: int
+    title: str
+    start: int
+    end: int
+
+
+@dataclass
+class SkillDocument:
+    path: str
+    mtime_ns: int
+    size: int
+    text: str
+    sections: List[SkillSection] = field(default_factory=list)
+
+    def headings(self) -> List[str]:
+        return [f"{'#' * s.level} {s.title}" for s in self.sections]
+
+    def section(self, title: str) -> Optional[str]:
+        """Returns a section with its subsections; exact title match wins over a substring match."""
+        wanted = title.strip().lstrip("#").strip().lower()
+        exact = [s for s in self.sections if s.title.lower() == wanted]
+        partial = [s for s in self.sections if wanted in s.title.lower()]
+        match = (exact or partial or [None])[0]
+        if match is None:
+            return None
+        return self.text[match.start:match.end].rstrip() + "\n"
+
+
+def parse_sections(text: str) -> List[SkillSection]:
+    """Splits markdown into heading sections, ignoring '#' lines inside code fences."""
+    headings: List[Tuple[int, str, int]] = []
+    in_fence = False
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _HEADING.match(line.rstrip("\n"))
+            if match:
+                headings.append((len(match.group(1)), match.group(2), offset))
+        offset += len(line)
+
+    sections = []
+    for i, (level, title, start) in enumerate(headings):
+        end = len(text)
+        for next_level, _, next_start in headings[i + 1:]:
+            if next_level <= level:
+                end = next_start
+                break
+        sections.append(SkillSection(level, title, start, end))
+    return sections
+
+
+class SkillDocumentCache:
+    """Parsed skill documents kept in memory and re-read only when the file changes on disk."""
+
+    def __init__(self):
+        self._docs: Dict[str, SkillDocument] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> SkillDocument:
+        stat = os.stat(path)
+        with self._lock:
+            doc = self._docs.get(path)
+            if doc and doc.mtime_ns == stat.st_mtime_ns and doc.size == stat.st_size:
+                return doc
+
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        doc = SkillDocument(path, stat.st_mtime_ns, stat.st_size, text, parse_sections(text))
+        with self._lock:
+            self._docs[path] = doc
+        return doc
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._docs.clear()
+            else:
+                self._docs.pop(path, None)
+
+
+skill_document_cache = SkillDocumentCache()
+
+
+def resolve_skill_file(skill_name: str, file_name: str = "SKILL.md") -> Optional[str]:
+    """Maps a skill name (frontmatter name or directory name) and a file inside it to a path."""
+    from backend.skills.skills_manager import SkillsManager
+
+    skill_dir = None
+    for skill in SkillsManager.get_index().skills:
+        if skill["name"] == skill_name or os.path.basename(os.path.dirname(skill["path"])) == skill_name:
+            skill_dir = os.path.dirname(skill["path"])
+            break
+    if skill_dir is None:
+        return None
+
+    path = os.path.abspath(os.path.join(skill_dir, file_name))
+    if os.path.commonpath([path, skill_dir]) != skill_dir or not os.path.isfile(path):
+        # Case-insensitive fallback: SKILL.md refers to FORMS.md while the file is forms.md
+        for candidate in os.listdir(skill_dir):
+            if candidate.lower() == os.path.basename(file_name).lower():
+                return os.path.join(skill_dir, candidate)
+        return None
+    return path
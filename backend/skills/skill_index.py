@@ -0,0 +1,140 @@
+import os
+import re
+import math
+import time
+from collections import Counter
+from typing import List, Dict, Optional
+
+from backend.skills.skill_cache import parse_sections
+
+# How many query-relevant skills to expose per turn, on top of the pinned ones
+SKILLS_TOP_K = int(os.getenv("SKILLS_TOP_K", "5"))
+# Comma-separated skill names that are always listed regardless of the query
+PINNED_SKILLS = [s.strip() for s in os.getenv("PINNED_SKILLS", "").split(",") if s.strip()]
+# Weight of the embedding score versus BM25 in the hybrid ranking (0 = BM25 only)
+EMBEDDING_WEIGHT = float(os.getenv("SKILLS_EMBEDDING_WEIGHT", "0.5"))
+
+_CJK_RUN = re.compile(r"[㐀-鿿]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; CJK runs are split into bigrams since they have no spaces."""
+    tokens = []
+    for word in re.findall(r"\w+", text.lower()):
+        if _CJK_RUN.fullmatch(word):
+            tokens.extend(word[i:i + 2] for i in range(max(len(word) - 1, 1)))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-token count: one token per CJK character, ~4 characters per token otherwise."""
+    cjk = sum(len(run) for run in _CJK_RUN.findall(text))
+    return cjk + (len(text) - cjk) // 4
+
+
+def skill_document(skill: dict) -> str:
+    """The text a skill is indexed under: name, description and SKILL.md headings."""
+    headings = [section.title for section in parse_sections(skill.get("content", ""))]
+    return "\n".join([skill["name"], skill["description"], *headings])
+
+
+class BM25:
+    def __init__(self, corpus: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_freqs = [Counter(doc) for doc in corpus]
+        self.doc_lens = [len(doc) for doc in corpus]
+        self.avg_len = (sum(self.doc_lens) / len(corpus)) if corpus else 0.0
+        df = Counter(term for doc in corpus for term in set(doc))
+        n = len(corpus)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def scores(self, query: List[str]) -> List[float]:
+        results = []
+        for freqs, length in zip(self.doc_freqs, self.doc_lens):
+            score = 0.0
+            for term in query:
+                tf = freqs.get(term)
+                if not tf:
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * length / (self.avg_len or 1))
+                score += self.idf[term] * tf * (self.k1 + 1) / norm
+            results.append(score)
+        return results
+
+
+def _min_max(values: List[float]) -> List[float]:
+    low, high = min(values), max(values)
+    if high - low <= 1e-12:
+        return [0.0 for _ in values]
+    return [(v - low) / (high - low) for v in values]
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class SkillIndex:
+    """Hybrid BM25 + embedding index used to pick the skills relevant to a query."""
+
+    def __init__(self, skills: List[dict]):
+        self.skills = skills
+        self.documents = [skill_document(s) for s in skills]
+        self.bm25 = BM25([tokenize(d) for d in self.documents])
+        self._vectors: Optional[List[List[float]]] = None
+        self._last_ranking: tuple = (None, [])
+
+    def _doc_vectors(self, embeddings) -> List[List[float]]:
+        if self._vectors is None:
+            self._vectors = embeddings.embed_documents(self.documents)
+        return self._vectors
+
+    def rank(self, query: str) -> List[tuple[float, dict]]:
+        # Selection and prefetch rank the same query in one turn; embed it only once
+        if self._last_ranking[0] == query:
+            return self._last_ranking[1]
+        scores = _min_max(self.bm25.scores(tokenize(query)))
+        if EMBEDDING_WEIGHT > 0:
+            try:
+                from backend.memory.memory_retriever import get_query_embeddings
+                embeddings = get_query_embeddings()
+                query_vector = embeddings.embed_query(query)
+                semantic = [_cosine(query_vector, v) for v in self._doc_vectors(embeddings)]
+                scores = [
+                    (1 - EMBEDDING_WEIGHT) * lexical + EMBEDDING_WEIGHT * sem
+                    for lexical, sem in zip(scores, _min_max(semantic))
+                ]
+            except Exception as e:
+                # Embedding server unavailable: BM25 alone still gives a usable ranking
+                print(f"Skill selection falling back to BM25: {e}")
+        ranked = sorted(zip(scores, self.skills), key=lambda pair: pair[0], reverse=True)
+        self._last_ranking = (query, ranked)
+        return ranked
+
+    def select(self, query: str, top_k: int = SKILLS_TOP_K, pinned: Optional[List[str]] = None) -> tuple[List[dict], Dict]:
+        """Returns (selected skills in directory order, selection stats)."""
+        start = time.perf_counter()
+        pinned_names = set(PINNED_SKILLS if pinned is None else pinned)
+        pinned_names.update(s["name"] for s in self.skills if str(s.get("pinned", "")).lower() == "true")
+
+        if len(self.skills) <= top_k + len(pinned_names) or not query.strip():
+            chosen = {s["name"] for s in self.skills}
+        else:
+            chosen = set(pinned_names)
+            for score, skill in self.rank(query):
+                if len(chosen - pinned_names) >= top_k:
+                    break
+                if score > 0:
+                    chosen.add(skill["name"])
+
+        selected = [s for s in self.skills if s["name"] in chosen]
+        stats = {
+            "total_skills": len(self.skills),
+            "selected_skills": len(selected),
+            "selection_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        return selected, stats
@@ -1,11 +1,26 @@
 import os
 import re
+import threading
+
+from backend.skills.skill_index import SkillIndex, SKILLS_TOP_K, estimate_tokens
+from backend.skills.skill_cache import skill_document_cache
+
+# Attach the body of the best-matching skill to the prompt, saving the load_skill round-trip
+SKILL_PREFETCH = os.getenv("SKILL_PREFETCH", "false").lower() == "true"
+SKILL_PREFETCH_MIN_SCORE = float(os.getenv("SKILL_PREFETCH_MIN_SCORE", "0.5"))
+SKILL_PREFETCH_MAX_CHARS = int(os.getenv("SKILL_PREFETCH_MAX_CHARS", "8000"))
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 SKILLS_DIR = os.path.join(PROJECT_ROOT, "backend", "skills")
 SNAPSHOT_FILE = os.path.join(SKILLS_DIR, "SKILLS_SNAPSHOT.md")
 
 class SkillsManager:
+    _index: SkillIndex = None
+    _index_signature: tuple = ()
+    last_selection_stats: dict = {}
+    _selection_totals: dict = {"selections": 0, "selection_ms": 0.0, "saved_tokens": 0}
+    _stats_lock = threading.Lock()
+
     @staticmethod
     def _parse_yaml_frontmatter(content: str) -> dict:
         """Parses simple YAML frontmatter to extract name and description."""
@@ -21,49 +36,67 @@ class SkillsManager:
         return metadata
 
     @classmethod
-    def generate_snapshot(cls) -> str:
-        """Scans the skills directory and generates the XML SKILLS_SNAPSHOT.md file."""
-        skills_xml = []
-        
-        # Add a strong system prompt directive to stop the agent from using `ls` to check its skills
-        skills_xml.append("### SYSTEM DIRECTIVE: YOUR SKILLS SOURCE OF TRUTH ###")
-        skills_xml.append("The following `<available_skills>` block is the **ONLY** source of truth for your currently available skills.")
-        skills_xml.append("Do NOT use terminal commands (like `ls`) or code to search the file system to check what skills you have.")
-        skills_xml.append("If a skill is listed below, you have it. If it is NOT listed below, you DO NOT have it.")
-        skills_xml.append("")
-        
-        skills_xml.append("<available_skills>")
-        
+    def scan_skills(cls) -> list[dict]:
+        """Scans the skills directory and returns the metadata of every SKILL.md."""
+        skills = []
         if not os.path.exists(SKILLS_DIR):
             os.makedirs(SKILLS_DIR, exist_ok=True)
             
         # Scan subdirectories for SKILL.md
-        for item in os.listdir(SKILLS_DIR):
+        for item in sorted(os.listdir(SKILLS_DIR)):
             item_path = os.path.join(SKILLS_DIR, item)
             if os.path.isdir(item_path):
                 skill_file = os.path.join(item_path, "SKILL.md")
                 if os.path.exists(skill_file):
-                    with open(skill_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
+                    doc = skill_document_cache.get(skill_file)
+                    content = doc.text
                         
                     meta = cls._parse_yaml_frontmatter(content)
                     
-                    # Fallback if no frontmatter found
-                    name = meta.get('name', item)
-                    desc = meta.get('description', 'No description provided.')
-                    
-                    # Location must be a relative path standard to the project
-                    relative_location = f"./backend/skills/{item}/SKILL.md"
-                    
-                    xml_block = f"""  <skill>
-    <name>{name}</name>
-    <description>{desc}</description>
-    <location>{relative_location}</location>
+                    skills.append({
+                        # Fallback if no frontmatter found
+                        "name": meta.get('name', item),
+                        "description": meta.get('description', 'No description provided.'),
+                        "pinned": meta.get('pinned', 'false'),
+                        # Location must be a relative path standard to the project
+                        "location": f"./backend/skills/{item}/SKILL.md",
+                        "path": skill_file,
+                        "mtime": doc.mtime_ns,
+                        "content": content,
+                    })
+        return skills
+
+    @staticmethod
+    def render_snapshot(skills: list[dict], total: int = None) -> str:
+        """Renders the XML skills block for the given skills."""
+        skills_xml = []
+        
+        # Add a strong system prompt directive to stop the agent from using `ls` to check its skills
+        skills_xml.append("### SYSTEM DIRECTIVE: YOUR SKILLS SOURCE OF TRUTH ###")
+        skills_xml.append("The following `<available_skills>` block is the **ONLY** source of truth for your currently available skills.")
+        skills_xml.append("Do NOT use terminal commands (like `ls`) or code to search the file system to check what skills you have.")
+        skills_xml.append("To use a skill, call the `load_skill` tool with its name (optionally a `section` heading or another `file` in the skill) instead of reading its files.")
+        if total is not None and total > len(skills):
+            skills_xml.append(f"Only the {len(skills)} of your {total} skills most relevant to the current request are listed below.")
+        else:
+            skills_xml.append("If a skill is listed below, you have it. If it is NOT listed below, you DO NOT have it.")
+        skills_xml.append("")
+        
+        skills_xml.append("<available_skills>")
+        for skill in skills:
+            xml_block = f"""  <skill>
+    <name>{skill['name']}</name>
+    <description>{skill['description']}</description>
+    <location>{skill['location']}</location>
   </skill>"""
-                    skills_xml.append(xml_block)
-                    
+            skills_xml.append(xml_block)
         skills_xml.append("</available_skills>")
-        snapshot_content = "\n".join(skills_xml)
+        return "\n".join(skills_xml)
+
+    @classmethod
+    def generate_snapshot(cls) -> str:
+        """Scans the skills directory and generates the XML SKILLS_SNAPSHOT.md file."""
+        snapshot_content = cls.render_snapshot(cls.scan_skills())
         
         # Write to SKILLS_SNAPSHOT.md
         with open(SNAPSHOT_FILE, 'w', encoding='utf-8') as f:
@@ -71,7 +104,75 @@ class SkillsManager:
             
         return snapshot_content
 
+    @classmethod
+    def get_index(cls) -> SkillIndex:
+        """Returns the skill index, rebuilding it when a SKILL.md was added, removed or edited."""
+        skills = cls.scan_skills()
+        signature = tuple((s["path"], s["mtime"]) for s in skills)
+        if cls._index is None or cls._index_signature != signature:
+            cls._index = SkillIndex(skills)
+            cls._index_signature = signature
+            # Keep the on-disk full snapshot in sync for anything that still reads it
+            with open(SNAPSHOT_FILE, 'w', encoding='utf-8') as f:
+                f.write(cls.render_snapshot(skills))
+        return cls._index
+
+    @classmethod
+    def select_snapshot(cls, query: str, top_k: int = SKILLS_TOP_K) -> str:
+        """Renders a snapshot holding only the pinned skills and the top-k matches for the query."""
+        index = cls.get_index()
+        selected, stats = index.select(query, top_k=top_k)
+        snapshot = cls.render_snapshot(selected, total=len(index.skills))
+
+        full_tokens = estimate_tokens(cls.render_snapshot(index.skills))
+        stats["snapshot_tokens"] = estimate_tokens(snapshot)
+        stats["full_snapshot_tokens"] = full_tokens
+        stats["saved_tokens"] = full_tokens - stats["snapshot_tokens"]
+        with cls._stats_lock:
+            cls.last_selection_stats = stats
+            cls._selection_totals["selections"] += 1
+            cls._selection_totals["selection_ms"] += stats["selection_ms"]
+            cls._selection_totals["saved_tokens"] += stats["saved_tokens"]
+        return snapshot
+
+    @classmethod
+    def selection_stats(cls) -> dict:
+        """Selections made so far, their average latency and token savings, and the latest selection."""
+        with cls._stats_lock:
+            count = cls._selection_totals["selections"]
+            return {
+                "selections": count,
+                "avg_selection_ms": round(cls._selection_totals["selection_ms"] / count, 2) if count else 0.0,
+                "avg_saved_tokens": round(cls._selection_totals["saved_tokens"] / count) if count else 0,
+                "last": dict(cls.last_selection_stats),
+            }
+
+    @classmethod
+    def prefetch_skill(cls, query: str) -> str:
+        """Returns the body of the best-matching skill if it clearly matches the query, else ''."""
+        if not SKILL_PREFETCH or not query.strip():
+            return ""
+        index = cls.get_index()
+        ranked = index.rank(query)
+        if not ranked:
+            return ""
+        score, skill = ranked[0]
+        runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+        if score < SKILL_PREFETCH_MIN_SCORE or score <= runner_up:
+            return ""
+
+        body = skill_document_cache.get(skill["path"]).text
+        if len(body) > SKILL_PREFETCH_MAX_CHARS:
+            body = body[:SKILL_PREFETCH_MAX_CHARS] + "\n...[truncated; use load_skill with a section for the rest]\n"
+        return f"<skill_body name=\"{skill['name']}\">\n{body}\n</skill_body>"
+
 if __name__ == "__main__":
-    snapshot = SkillsManager.generate_snapshot()
-    print("Generated SKILLS_SNAPSHOT.md:\n")
-    print(snapshot)
+    import sys
+    if len(sys.argv) > 1:
+        snapshot = SkillsManager.select_snapshot(" ".join(sys.argv[1:]))
+        print(snapshot)
+        print(f"\nSelection stats: {SkillsManager.last_selection_stats}")
+    else:
+        snapshot = SkillsManager.generate_snapshot()
+        print("Generated SKILLS_SNAPSHOT.md:\n")
+        print(snapshot)
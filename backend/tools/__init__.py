@@ -5,7 +5,11 @@ from .core_tools import (
     read_file_tool,
     write_file_tool,
     add_memory_tool,
-    search_knowledge_base_tool
+    search_knowledge_base_tool,
+    load_skill_tool,
+    read_pdf_tool,
+    read_output_tool,
+    search_files_tool
 )
 
 __all__ = [
@@ -15,5 +19,9 @@ __all__ = [
     "read_file_tool",
     "write_file_tool",
     "add_memory_tool",
-    "search_knowledge_base_tool"
+    "search_knowledge_base_tool",
+    "load_skill_tool",
+    "read_pdf_tool",
+    "read_output_tool",
+    "search_files_tool"
 ]
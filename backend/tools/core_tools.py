@@ -6,7 +6,12 @@ import html2text
 
 from langchain_core.tools import tool
 from langchain_community.tools import ShellTool, ReadFileTool, WriteFileTool
-from langchain_experimental.tools.python.tool import PythonREPLTool
+from langchain_experimental.tools.python.tool import PythonREPLTool, sanitize_input
+
+from backend.tools.tool_cache import (
+    FETCH_URL_CACHE_TTL_SECONDS, call_cached, directory_token, file_token, invalidate, memoize_tool
+)
+from backend.tools.output_spill import govern, governed
 
 # ----------------------------------------------------------------------------
 # 1. Terminal Tool (Sandboxed ShellTool)
@@ -18,7 +23,8 @@ DANGEROUS_COMMANDS = [
     r"\bhalt\b", r"\breboot\b", r"\bpoweroff\b", r"\binit\b"
 ]
 
-from typing import Union, List
+from typing import Union, List, Optional, Type
+from pydantic import BaseModel, Field
 
 class SandboxedShellTool(ShellTool):
     def _run(self, commands: Union[str, List[str]], **kwargs) -> str:
@@ -27,7 +33,16 @@ class SandboxedShellTool(ShellTool):
         for pattern in DANGEROUS_COMMANDS:
             if re.search(pattern, commands_str):
                  return f"Security Exception: Command '{commands_str}' matches dangerous pattern and was blocked."
-        return super()._run(commands, **kwargs)
+        # Run through the process registry so a cancelled turn can kill the command
+        from backend.tools.process_registry import run_shell_command
+        command = commands if isinstance(commands, str) else ";".join(commands)
+        try:
+            return govern("terminal", run_shell_command(command))
+        except Exception as e:
+            return f"Error executing command: {str(e)}"
+        finally:
+            # The command may have changed any file, so cached reads aren't trusted afterwards
+            invalidate("read_file")
 
 # Allow changing directory but keep it relative out of caution
 terminal_tool = SandboxedShellTool(name="terminal")
@@ -35,12 +50,25 @@ terminal_tool = SandboxedShellTool(name="terminal")
 # ----------------------------------------------------------------------------
 # 2. Python REPL Tool
 # ----------------------------------------------------------------------------
-python_repl_tool = PythonREPLTool(name="python_repl")
+class SessionPythonREPLTool(PythonREPLTool):
+    def _run(self, query: str, run_manager=None) -> str:
+        # Each session's REPL runs in its own killable worker process instead of in the server
+        from backend.tools.process_registry import run_python
+        if self.sanitize_input:
+            query = sanitize_input(query)
+        try:
+            return govern("python_repl", run_python(query))
+        finally:
+            invalidate("read_file")
+
+python_repl_tool = SessionPythonREPLTool(name="python_repl")
 
 # ----------------------------------------------------------------------------
 # 3. Fetch URL Tool
 # ----------------------------------------------------------------------------
 @tool("fetch_url")
+@governed("fetch_url")
+@memoize_tool("fetch_url", ttl=FETCH_URL_CACHE_TTL_SECONDS)
 def fetch_url_tool(url: str) -> str:
     """Fetches a URL and returns its textual representation (cleaned Markdown) to save tokens."""
     try:
@@ -58,14 +86,8 @@ def fetch_url_tool(url: str) -> str:
         h = html2text.HTML2Text()
         h.ignore_links = False
         h.ignore_images = True
-        markdown_text = h.handle(str(soup))
-        
-        # Truncate if too long (e.g., arbitrarily at 15000 chars to avoid prompt bloat)
-        max_chars = 15000
-        if len(markdown_text) > max_chars:
-            markdown_text = markdown_text[:max_chars] + "\n...[truncated]"
-            
-        return markdown_text
+        # Long pages are spilled to the session scratch store rather than truncated
+        return h.handle(str(soup))
     except Exception as e:
         return f"Error fetching URL: {str(e)}"
 
@@ -75,42 +97,86 @@ def fetch_url_tool(url: str) -> str:
 # Restrict file reading to the project root directory
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
-read_file_tool = ReadFileTool(name="read_file", root_dir=PROJECT_ROOT)
-write_file_tool = WriteFileTool(name="write_file", root_dir=PROJECT_ROOT)
+class ReadFileRangeInput(BaseModel):
+    file_path: str = Field(..., description="name of file")
+    start_line: Optional[int] = Field(None, description="first line to read (1-based)")
+    end_line: Optional[int] = Field(None, description="last line to read (inclusive)")
+    offset: Optional[int] = Field(None, description="byte offset to read from, for files without useful lines")
+    length: Optional[int] = Field(None, description="number of bytes to read from `offset`")
+
+class RangedReadFileTool(ReadFileTool):
+    args_schema: Type[BaseModel] = ReadFileRangeInput
+    description: str = (
+        "Read a file from disk. Small files are returned whole; for large files pass start_line/end_line "
+        "(1-based, inclusive) or offset/length in bytes, otherwise only the first lines are shown."
+    )
+
+    def _run(self, file_path: str, start_line: Optional[int] = None, end_line: Optional[int] = None,
+             offset: Optional[int] = None, length: Optional[int] = None, run_manager=None) -> str:
+        from backend.tools.file_reader import read_range
+
+        try:
+            path = str(self.get_relative_path(file_path))
+        except Exception:
+            return super()._run(file_path)
+        token = file_token(path)
+        if token is None:
+            return super()._run(file_path)
+
+        def read():
+            try:
+                return read_range(path, start_line, end_line, offset, length)
+            except Exception as e:
+                return "Error: " + str(e)
+
+        # Ranges are served through mmap and a cached line index; the session reuses an earlier
+        # read of the same range while the file's mtime and size are unchanged
+        arguments = {"path": path, "start_line": start_line, "end_line": end_line, "offset": offset, "length": length}
+        return govern("read_file", call_cached("read_file", arguments, token, read))
+
+class InvalidatingWriteFileTool(WriteFileTool):
+    def _run(self, file_path: str, text: str, append: bool = False, run_manager=None) -> str:
+        try:
+            return super()._run(file_path, text, append)
+        finally:
+            try:
+                path = str(self.get_relative_path(file_path))
+                invalidate("read_file", lambda args: args["path"] == path)
+            except Exception:
+                pass
+
+read_file_tool = RangedReadFileTool(name="read_file", root_dir=PROJECT_ROOT)
+write_file_tool = InvalidatingWriteFileTool(name="write_file", root_dir=PROJECT_ROOT)
 
 # ----------------------------------------------------------------------------
 # 5. Add Memory Tool
 # ----------------------------------------------------------------------------
-import datetime
-
 @tool("add_memory")
-def add_memory_tool(memory_content: str) -> str:
-    """Safely appends a new piece of information or fact into the long-term MEMORY.md file with a timestamp."""
-    memory_path = os.path.join(PROJECT_ROOT, "backend", "memory", "MEMORY.md")
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
+def add_memory_tool(memory_content: str, ttl_days: Optional[int] = None) -> str:
+    """Stores a new piece of information or fact in long-term memory (rendered into MEMORY.md) with a timestamp. Set ttl_days for facts that should expire."""
+    from backend.memory.memory_store import get_memory_store
+    from backend.memory.session_manager import current_session_id
+
     try:
-        # Check if the placeholder exists to maintain structure
-        content_exists = False
-        if os.path.exists(memory_path):
-            with open(memory_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if content.strip():
-                    content_exists = True
-                    
-        with open(memory_path, 'a', encoding='utf-8') as f:
-            if not content_exists:
-                f.write("# 长期记忆 (MEMORY)\n\n这里记录着与你相关的核心设定、重要决策、偏好设定以及其他跨越单次会话的历史信息。这些信息作为上下文的一部分将在每次对话被载入。\n\n---\n")
-            f.write(f"\n- **[{timestamp}]** {memory_content}\n")
-            
-        return f"Successfully added memory: '{memory_content}' to long-term storage."
+        record, created = get_memory_store().add(memory_content, session_id=current_session_id.get(), ttl_days=ttl_days)
+        if not created:
+            return f"Memory already exists (id {record.id}, added {record.created_at}); nothing new was stored."
+
+        from backend.memory.memory_consolidator import maybe_consolidate_in_background
+        maybe_consolidate_in_background()
+        return f"Successfully added memory: '{record.content}' to long-term storage."
     except Exception as e:
         return f"Error adding memory: {str(e)}"
 
 # ----------------------------------------------------------------------------
 # 6. Search Knowledge Base Tool (Hybrid LlamaIndex)
 # ----------------------------------------------------------------------------
+def _knowledge_base_token(query: str):
+    # Changes whenever the persisted index is rebuilt; None (no caching) while there is no index
+    return directory_token(os.path.join(PROJECT_ROOT, "backend", "storage"))
+
 @tool("search_knowledge_base")
+@memoize_tool("search_knowledge_base", validity=_knowledge_base_token)
 def search_knowledge_base_tool(query: str) -> str:
     """Useful for answering questions by querying the local document knowledge base using hybrid search (BM25 + Vector)."""
     # Placeholder implementation, as LlamaIndex hybrid search setup is complex (requires embedding model, setup of vector store etc.)
@@ -129,10 +195,88 @@ def search_knowledge_base_tool(query: str) -> str:
         # NOTE: Proper hybrid search in LlamaIndex involves combining multiple retrievers 
         # (e.g. BM25Retriever + VectorIndexRetriever). 
         # For simplicity, we fallback to standard vector query if full hybrid is not rigged up.
-        query_engine = index.as_query_engine(similarity_top_k=3)
-        response = query_engine.query(query)
-        return str(response)
+        nodes = index.as_retriever(similarity_top_k=3).retrieve(query)
+        if not nodes:
+            return "No relevant documents found in the knowledge base."
+
+        # Answer synthesis goes through the "synthesize" model route instead of the chat model
+        from backend.graph.model_router import get_model
+        context = "\n\n---\n\n".join(node.get_content() for node in nodes)
+        prompt = (
+            "Answer the question using only the context below. "
+            "If the context does not contain the answer, say so.\n\n"
+            f"Context:\n{context}\n\nQuestion: {query}"
+        )
+        # Detached from the agent run's callbacks, so its tokens aren't streamed as part of the answer
+        return get_model("synthesize").invoke(prompt, config={"callbacks": []}).content
         
     except Exception as e:
         return f"Error querying knowledge base: {str(e)}"
 
+
+# ----------------------------------------------------------------------------
+# 7. Load Skill Tool
+# ----------------------------------------------------------------------------
+@tool("load_skill")
+def load_skill_tool(skill_name: str, section: Optional[str] = None, file: str = "SKILL.md") -> str:
+    """Loads a skill's instructions from the in-memory skill cache. Pass a `section` heading to get only that part, or `file` (e.g. forms.md, reference.md) for another document in the skill folder."""
+    from backend.skills.skill_cache import skill_document_cache, resolve_skill_file
+
+    try:
+        path = resolve_skill_file(skill_name, file)
+        if not path:
+            return f"Skill file '{file}' for skill '{skill_name}' not found."
+
+        doc = skill_document_cache.get(path)
+        if not section:
+            return doc.text
+
+        content = doc.section(section)
+        if content is None:
+            return f"Section '{section}' not found in {file}. Available sections:\n" + "\n".join(doc.headings())
+        return content
+    except Exception as e:
+        return f"Error loading skill: {str(e)}"
+
+# ----------------------------------------------------------------------------
+# 8. Read PDF Tool (content-hash keyed extraction cache)
+# ----------------------------------------------------------------------------
+@tool("read_pdf")
+@governed("read_pdf")
+def read_pdf_tool(file_path: str, pages: Optional[str] = None, mode: str = "text") -> str:
+    """Extracts text from a PDF (path relative to the project root) without writing code. `pages` selects 1-based pages like "1-3,7" (default: the first 5). `mode` is "text", "tables" (as markdown tables) or "layout" (text with its positional layout). Results are cached per page, so repeated questions about the same PDF are fast."""
+    from backend.tools.pdf_extraction import read_pdf
+
+    try:
+        return read_pdf(file_path, pages, mode)
+    except ImportError as e:
+        return f"Error reading PDF: missing dependency ({str(e)}). Install pypdf and pdfplumber."
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
+# ----------------------------------------------------------------------------
+# 9. Read Output Tool (pages through spilled tool outputs)
+# ----------------------------------------------------------------------------
+@tool("read_output")
+def read_output_tool(handle: str, offset: int = 0, length: int = 4000, grep: Optional[str] = None) -> str:
+    """Reads more of a long tool output that was truncated and stored under a handle like `out-1a2b3c4d5e6f`. Returns `length` characters from character `offset`, or, with `grep` (a regex), the matching lines and their offsets."""
+    from backend.tools.output_spill import read_output
+
+    try:
+        return read_output(handle, offset, length, grep)
+    except Exception as e:
+        return f"Error reading output: {str(e)}"
+
+# ----------------------------------------------------------------------------
+# 10. Search Files Tool (mmap regex scan of the project root)
+# ----------------------------------------------------------------------------
+@tool("search_files")
+@governed("search_files")
+def search_files_tool(pattern: str, path: str = ".", glob: Optional[str] = None, max_results: int = 50, ignore_case: bool = False) -> str:
+    """Searches text files under `path` (relative to the project root) for a regex and returns matching lines as `file:line: text`. Narrow the scan with `glob` (e.g. "*.py" or "backend/**/*.md"); use read_file with start_line/end_line to read around a match."""
+    from backend.tools.file_reader import search_files
+
+    try:
+        return search_files(pattern, path, glob, max_results, ignore_case)
+    except Exception as e:
+        return f"Error searching files: {str(e)}"
@@ -0,0 +1,245 @@
+import os
+import re
+import mmap
+import time
+import fnmatch
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Files up to this size are still returned whole by read_file when no range is given
+READ_FILE_WHOLE_MAX_BYTES = int(float(os.getenv("READ_FILE_WHOLE_MAX_KB", "256")) * 1024)
+# Upper bound on what one ranged read returns, whatever range is asked for
+READ_RANGE_MAX_BYTES = int(float(os.getenv("READ_RANGE_MAX_KB", "512")) * 1024)
+# Lines shown when a large file is read without a range
+PREVIEW_LINES = 100
+# Line indexes keep the offset of every Nth line; a seek scans at most N-1 lines past it
+LINE_INDEX_STRIDE = 256
+LINE_INDEX_CACHE_FILES = 64
+# Bytes scanned per numpy pass while building a line index
+INDEX_CHUNK_BYTES = 16 * 1024 * 1024
+
+# search_files limits
+SEARCH_MAX_RESULTS = 50
+SEARCH_MAX_MATCHES_PER_FILE = 20
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_FILES_TIMEOUT_SECONDS", "10"))
+# A file is scanned in windows of about this many bytes, ending on a line break, with the time budget checked between them
+SEARCH_WINDOW_BYTES = 1024 * 1024
+SEARCH_SKIP_DIRS = {".git", "node_modules", "__pycache__", ".venv", "venv", "scratch", "memory_faiss_index"}
+SEARCH_LINE_MAX_CHARS = 300
+
+
+class LineIndex:
+    """Byte offsets of every LINE_INDEX_STRIDE-th line start of a file, plus its line count.
+
+    Built with one sequential pass over the mmap'ed file, so the index of a multi-GB
+    log costs a few MB instead of the file itself being held in memory.
+    """
+
+    def __init__(self, mm: mmap.mmap, size: int):
+        import numpy as np
+
+        self.size = size
+        self.checkpoints = array("q", [0])
+        lines = 0
+        position = 0
+        while position < size:
+            end = min(position + INDEX_CHUNK_BYTES, size)
+            newlines = np.flatnonzero(np.frombuffer(mm, dtype=np.uint8, count=end - position, offset=position) == 10)
+            # Line n (0-based) starts after newline n-1; keep the starts of lines that are multiples of the stride
+            first = (-lines - 1) % LINE_INDEX_STRIDE
+            self.checkpoints.extend((newlines[first::LINE_INDEX_STRIDE] + position + 1).tolist())
+            lines += len(newlines)
+            position = end
+        # A trailing line without a newline still counts
+        if size and mm[size - 1] != 10:
+            lines += 1
+        elif self.checkpoints[-1] == size and len(self.checkpoints) > 1:
+            self.checkpoints.pop()
+        self.line_count = lines
+
+    def line_offset(self, mm: mmap.mmap, line: int) -> int:
+        """Byte offset where 1-based `line` starts; the file size if it is past the end."""
+        if line > self.line_count:
+            return self.size
+        checkpoint, remaining = divmod(line - 1, LINE_INDEX_STRIDE)
+        offset = self.checkpoints[checkpoint]
+        for _ in range(remaining):
+            offset = mm.find(b"\n", offset) + 1
+            if offset == 0:
+                return self.size
+        return offset
+
+
+class LineIndexCache:
+    """Line indexes of recently read files, reused while the file's mtime and size are unchanged."""
+
+    def __init__(self, max_files: int = LINE_INDEX_CACHE_FILES):
+        self.max_files = max_files
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], LineIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, path: str, mm: mmap.mmap, stat: os.stat_result) -> LineIndex:
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == key:
+                self._entries.move_to_end(path)
+                return entry[1]
+        index = LineIndex(mm, stat.st_size)
+        with self._lock:
+            self.builds += 1
+            self._entries[path] = (key, index)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+        return index
+
+
+line_index_cache = LineIndexCache()
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def read_range(path: str, start_line: Optional[int] = None, end_line: Optional[int] = None,
+               offset: Optional[int] = None, length: Optional[int] = None) -> str:
+    """Reads 1-based inclusive lines, or `length` bytes from byte `offset`, of a file through mmap.
+
+    With no range, small files are returned whole and large ones as a preview.
+    """
+    stat = os.stat(path)
+    if stat.st_size == 0:
+        return ""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if offset is not None or length is not None:
+            start = min(max(offset if offset is not None else 0, 0), stat.st_size)
+            size = max(min(length if length is not None else READ_RANGE_MAX_BYTES, READ_RANGE_MAX_BYTES), 0)
+            data = mm[start:start + size]
+            end = start + len(data)
+            more = f"; next offset={end}" if end < stat.st_size else ""
+            return f"[bytes {start}-{end} of {stat.st_size}{more}]\n{_decode(data)}"
+
+        preview = start_line is None and end_line is None
+        if preview:
+            if stat.st_size <= READ_FILE_WHOLE_MAX_BYTES:
+                return _decode(mm[:])
+            start_line, end_line = 1, PREVIEW_LINES
+
+        index = line_index_cache.get(path, mm, stat)
+        first = max(start_line if start_line is not None else 1, 1)
+        last = min(end_line if end_line is not None else index.line_count, index.line_count)
+        if first > last:
+            return f"[no lines {first}-{end_line if end_line is not None else first}: the file has {index.line_count} lines]"
+        start = index.line_offset(mm, first)
+        end = index.line_offset(mm, last + 1)
+        truncated = end - start > READ_RANGE_MAX_BYTES
+        if truncated:
+            # Stop at the last whole line inside the byte budget
+            cut = mm.rfind(b"\n", start, start + READ_RANGE_MAX_BYTES)
+            end = cut + 1 if cut >= start else start + READ_RANGE_MAX_BYTES
+        data = mm[start:end]
+        shown_last = first + data.count(b"\n") - (1 if data.endswith(b"\n") else 0)
+        header = f"[lines {first}-{shown_last} of {index.line_count}"
+        if shown_last < index.line_count:
+            header += f"; next start_line={shown_last + 1}"
+        if preview:
+            header += f"; file is {stat.st_size} bytes, pass start_line/end_line or offset/length to read more"
+        return f"{header}]\n{_decode(data)}"
+
+
+def _iter_files(root: str, glob: Optional[str]):
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SEARCH_SKIP_DIRS and not d.startswith("."))
+        for name in sorted(filenames):
+            path = os.path.join(directory, name)
+            if glob and not (fnmatch.fnmatch(name, glob) or fnmatch.fnmatch(os.path.relpath(path, PROJECT_ROOT), glob)):
+                continue
+            yield path
+
+
+def search_files(pattern: str, path: str = ".", glob: Optional[str] = None, max_results: int = SEARCH_MAX_RESULTS,
+                 ignore_case: bool = False) -> str:
+    """Regex search over the text files under `path` (relative to the project root).
+
+    Files are scanned through mmap, so large files are not read into memory;
+    results are capped in count and the scan stops after SEARCH_TIMEOUT_SECONDS.
+    Each file is matched window by window, so one large file can't outlast the
+    time budget; a match can't span two windows.
+    """
+    root = os.path.abspath(os.path.join(PROJECT_ROOT, path))
+    if os.path.commonpath([root, PROJECT_ROOT]) != PROJECT_ROOT:
+        return f"Error: Access denied to {path}. Permission granted exclusively to the project root."
+    if not os.path.exists(root):
+        return f"Error: no such file or directory: {path}"
+    try:
+        # A whole file is searched as one buffer, so ^ and $ must match at every line
+        regex = re.compile(pattern.encode("utf-8"), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    except re.error as e:
+        return f"Error: invalid regex `{pattern}`: {e}"
+
+    max_results = max(1, min(max_results, 500))
+    results: List[str] = []
+    files_scanned = 0
+    stopped = None
+    deadline = time.monotonic() + SEARCH_TIMEOUT_SECONDS
+    paths = [root] if os.path.isfile(root) else _iter_files(root, glob)
+    for file_path in paths:
+        if len(results) >= max_results:
+            stopped = f"stopped at {max_results} results"
+            break
+        if time.monotonic() > deadline:
+            stopped = f"stopped after {SEARCH_TIMEOUT_SECONDS:.0f}s"
+            break
+        try:
+            if os.path.getsize(file_path) == 0:
+                continue
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if b"\0" in mm[:8192]:
+                    continue  # binary
+                files_scanned += 1
+                relative = os.path.relpath(file_path, PROJECT_ROOT)
+                line = 1
+                counted_to = 0
+                last_line = 0
+                in_file = 0
+                window_start = 0
+                while window_start < len(mm) and in_file < SEARCH_MAX_MATCHES_PER_FILE and len(results) < max_results:
+                    if time.monotonic() > deadline:
+                        stopped = f"stopped after {SEARCH_TIMEOUT_SECONDS:.0f}s"
+                        break
+                    cut = mm.find(b"\n", window_start + SEARCH_WINDOW_BYTES)
+                    window_end = cut + 1 if cut >= 0 else len(mm)
+                    for match in regex.finditer(mm, window_start, window_end):
+                        line += mm[counted_to:match.start()].count(b"\n") if match.start() > counted_to else 0
+                        counted_to = max(counted_to, match.start())
+                        if line == last_line:
+                            continue
+                        last_line = line
+                        line_start = mm.rfind(b"\n", 0, match.start()) + 1
+                        line_end = mm.find(b"\n", match.start())
+                        text = _decode(mm[line_start:line_end if line_end >= 0 else len(mm)]).strip()
+                        if len(text) > SEARCH_LINE_MAX_CHARS:
+                            text = text[:SEARCH_LINE_MAX_CHARS] + "..."
+                        results.append(f"{relative}:{line}: {text}")
+                        in_file += 1
+                        if in_file >= SEARCH_MAX_MATCHES_PER_FILE or len(results) >= max_results:
+                            break
+                    window_start = window_end
+        except (OSError, ValueError):
+            continue
+        if stopped:
+            break
+    if not stopped and len(results) >= max_results:
+        stopped = f"stopped at {max_results} results"
+
+    if not results:
+        return f"No matches for `{pattern}` in {files_scanned} files" + (f" ({stopped})" if stopped else "") + "."
+    footer = f"[{len(results)} matches in {files_scanned} files scanned"
+    footer += f"; {stopped}, narrow `path` or `glob` to see more]" if stopped else "]"
+    return "\n".join(results) + "\n" + footer
@@ -0,0 +1,148 @@
+import os
+import re
+import hashlib
+import functools
+from typing import Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SCRATCH_DIR = os.path.join(PROJECT_ROOT, "backend", "sessions", "scratch")
+
+# Tool results longer than this are spilled to the session's scratch store instead of the prompt
+TOOL_OUTPUT_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_MAX_CHARS", "6000"))
+# How much of a spilled result the model still sees inline
+TOOL_OUTPUT_HEAD_CHARS = int(os.getenv("TOOL_OUTPUT_HEAD_CHARS", "2000"))
+# Per-session scratch store bound; the oldest spilled outputs are deleted beyond it
+TOOL_SCRATCH_MAX_BYTES = int(float(os.getenv("TOOL_SCRATCH_MAX_MB", "64")) * 1024 * 1024)
+# Default page size of read_output
+READ_OUTPUT_DEFAULT_LENGTH = 4000
+
+HANDLE_PATTERN = re.compile(r"^out-[0-9a-f]{12}$")
+HEADING_PATTERN = re.compile(r"^#{1,4} .+$", re.MULTILINE)
+
+
+def _session_dir() -> str:
+    from backend.memory.session_manager import current_session_id
+    session_id = current_session_id.get() or "default"
+    return os.path.join(SCRATCH_DIR, re.sub(r"[^A-Za-z0-9_.-]", "_", session_id))
+
+
+def _prune(directory: str):
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= TOOL_SCRATCH_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def spill(text: str) -> str:
+    """Writes text to the session's scratch store and returns its handle.
+
+    Handles are content hashes, so spilling the same output again reuses the file.
+    """
+    handle = "out-" + hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:12]
+    directory = _session_dir()
+    path = os.path.join(directory, f"{handle}.txt")
+    if os.path.exists(path):
+        os.utime(path)
+        return handle
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    _prune(directory)
+    return handle
+
+
+def _outline(text: str) -> str:
+    """A cheap summary of a spilled output: its size and, for Markdown-like text, its headings."""
+    lines = text.count("\n") + 1
+    summary = f"{len(text)} characters, {lines} lines"
+    headings = HEADING_PATTERN.findall(text)
+    if headings:
+        shown = headings[:12]
+        summary += "; sections: " + " | ".join(h.lstrip("#").strip() for h in shown)
+        if len(headings) > len(shown):
+            summary += f" | ...{len(headings) - len(shown)} more"
+    return summary
+
+
+def govern(tool_name: str, result):
+    """Returns a tool result unchanged if it is short; otherwise spills it and returns a head,
+    a summary and the handle to page through the rest with read_output."""
+    if not isinstance(result, str) or len(result) <= TOOL_OUTPUT_MAX_CHARS:
+        return result
+    try:
+        handle = spill(result)
+    except OSError as e:
+        print(f"Error spilling {tool_name} output: {e}")
+        return result[:TOOL_OUTPUT_MAX_CHARS] + "\n...[truncated]"
+    return (
+        f"{result[:TOOL_OUTPUT_HEAD_CHARS]}\n"
+        f"...[output truncated: {_outline(result)}. The full output is stored as `{handle}`; "
+        f"call read_output(handle=\"{handle}\", offset={TOOL_OUTPUT_HEAD_CHARS}) to read on, "
+        f"or pass `grep` to find lines in it]"
+    )
+
+
+def governed(tool_name: str):
+    """Decorates a tool function so long results are spilled instead of returned whole."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return govern(tool_name, func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def read_output(handle: str, offset: int = 0, length: int = READ_OUTPUT_DEFAULT_LENGTH, grep: Optional[str] = None) -> str:
+    """Pages through a spilled output by character offset, or lists its lines matching `grep`."""
+    if not HANDLE_PATTERN.match(handle or ""):
+        return f"Error: `{handle}` is not an output handle."
+    path = os.path.join(_session_dir(), f"{handle}.txt")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return f"Error: output `{handle}` no longer exists in this session; re-run the tool that produced it."
+    length = max(1, min(length, TOOL_OUTPUT_MAX_CHARS))
+
+    if grep:
+        try:
+            pattern = re.compile(grep, re.IGNORECASE)
+        except re.error:
+            pattern = re.compile(re.escape(grep), re.IGNORECASE)
+        matches = []
+        size = 0
+        position = 0
+        for number, line in enumerate(text.splitlines(keepends=True), start=1):
+            if position >= offset and pattern.search(line):
+                entry = f"{number} (offset {position}): {line.rstrip()}"
+                if size + len(entry) > length:
+                    matches.append(f"...more matches; pass offset={position} to continue")
+                    break
+                matches.append(entry)
+                size += len(entry) + 1
+            position += len(line)
+        return "\n".join(matches) if matches else f"No lines matching `{grep}` in `{handle}`."
+
+    offset = max(0, offset)
+    if offset >= len(text):
+        return f"Error: offset {offset} is past the end of `{handle}` ({len(text)} characters)."
+    chunk = text[offset:offset + length]
+    end = offset + len(chunk)
+    footer = f"\n...[characters {offset}-{end} of {len(text)}"
+    footer += f"; next offset={end}]" if end < len(text) else "; end of output]"
+    return chunk + footer
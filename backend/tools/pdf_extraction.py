@@ -0,0 +1,175 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from backend.skills.pdf.scripts.page_ranges import parse_page_ranges
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Upper bound on cached extraction results, evicted least-recently-used first
+PDF_CACHE_MAX_BYTES = int(float(os.getenv("PDF_CACHE_MAX_MB", "256")) * 1024 * 1024)
+# Charged per cached entry on top of its text, so empty pages still count against the budget
+CACHE_ENTRY_OVERHEAD_BYTES = 128
+# Files whose content hash is remembered by (mtime, size), so unchanged files aren't re-hashed
+HASH_MEMO_MAX_FILES = 256
+# Pages returned when the caller does not ask for a specific range
+DEFAULT_PAGE_LIMIT = 5
+
+EXTRACTION_MODES = ("text", "tables", "layout")
+
+
+def parse_pages(spec: Optional[str], num_pages: int) -> List[int]:
+    """Pages a read_pdf call selects: the PDF scripts' page spec, or the first few pages when none is given."""
+    if not spec:
+        return list(range(1, min(num_pages, DEFAULT_PAGE_LIMIT) + 1))
+    return parse_page_ranges(spec, num_pages)
+
+
+def _table_to_markdown(table: List[List[Optional[str]]]) -> str:
+    rows = [["" if cell is None else str(cell).replace("\n", " ") for cell in row] for row in table if row]
+    if not rows:
+        return ""
+    lines = ["| " + " | ".join(rows[0]) + " |", "|" + "---|" * len(rows[0])]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+    return "\n".join(lines)
+
+
+class PdfExtractionCache:
+    """Per-page PDF extraction results keyed by file content hash, bounded by their UTF-8 size.
+
+    A document's page count is kept in the same LRU as its pages, so it is evicted with them.
+    """
+
+    def __init__(self, max_bytes: int = PDF_CACHE_MAX_BYTES, max_hashed_files: int = HASH_MEMO_MAX_FILES):
+        self.max_bytes = max_bytes
+        self.max_hashed_files = max_hashed_files
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[str, int]]" = OrderedDict()
+        self._hash_by_path: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def content_hash(self, path: str) -> str:
+        """SHA-256 of the file, memoized per (path, mtime, size) so unchanged files are hashed once."""
+        stat = os.stat(path)
+        with self._lock:
+            memo = self._hash_by_path.get(path)
+            if memo and memo[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._hash_by_path.move_to_end(path)
+                return memo[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with self._lock:
+            self._hash_by_path[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            self._hash_by_path.move_to_end(path)
+            while len(self._hash_by_path) > self.max_hashed_files:
+                self._hash_by_path.popitem(last=False)
+        return digest
+
+    def _get(self, key, count: bool = True) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if count:
+                if entry is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return entry[0] if entry else None
+
+    def _put(self, key, value: str):
+        size = len(value.encode("utf-8")) + CACHE_ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def _extract(self, path: str, page_numbers: List[int], mode: str) -> Dict[int, str]:
+        results = {}
+        if mode == "text":
+            from pypdf import PdfReader
+            reader = PdfReader(path)
+            for n in page_numbers:
+                results[n] = reader.pages[n - 1].extract_text() or ""
+        else:
+            import pdfplumber
+            with pdfplumber.open(path) as pdf:
+                for n in page_numbers:
+                    page = pdf.pages[n - 1]
+                    if mode == "tables":
+                        tables = [_table_to_markdown(t) for t in page.extract_tables()]
+                        results[n] = "\n\n".join(t for t in tables if t)
+                    else:
+                        results[n] = page.extract_text(layout=True) or ""
+                    page.close()
+        return results
+
+    def page_count(self, path: str, digest: str) -> int:
+        key = (digest, 0, "page_count")
+        count = self._get(key, count=False)
+        if count is None:
+            from pypdf import PdfReader
+            count = str(len(PdfReader(path).pages))
+            self._put(key, count)
+        return int(count)
+
+    def get_pages(self, path: str, pages: Optional[str] = None, mode: str = "text") -> Tuple[int, Dict[int, str]]:
+        """Returns (total pages, {page number: extracted content}), extracting only uncached pages."""
+        digest = self.content_hash(path)
+        total = self.page_count(path, digest)
+        page_numbers = parse_pages(pages, total)
+
+        results = {}
+        missing = []
+        for n in page_numbers:
+            cached = self._get((digest, n, mode))
+            if cached is None:
+                missing.append(n)
+            else:
+                results[n] = cached
+        if missing:
+            for n, content in self._extract(path, missing, mode).items():
+                self._put((digest, n, mode), content)
+                results[n] = content
+        return total, dict(sorted(results.items()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses,
+                    "hashed_files": len(self._hash_by_path)}
+
+
+pdf_extraction_cache = PdfExtractionCache()
+
+
+def read_pdf(file_path: str, pages: Optional[str] = None, mode: str = "text") -> str:
+    """Formats the requested pages of a PDF under the project root for the model."""
+    if mode not in EXTRACTION_MODES:
+        return f"Error: mode must be one of {', '.join(EXTRACTION_MODES)}."
+    path = os.path.abspath(os.path.join(PROJECT_ROOT, file_path))
+    if os.path.commonpath([path, PROJECT_ROOT]) != PROJECT_ROOT:
+        return f"Error: Access denied to {file_path}. Permission granted exclusively to the project root."
+    if not os.path.isfile(path):
+        return f"Error: no such file: {file_path}"
+
+    try:
+        total, results = pdf_extraction_cache.get_pages(path, pages, mode)
+    except ValueError as e:
+        return f"Error: {e}"
+    parts = [f"{file_path}: {total} pages, showing {mode} for pages {', '.join(map(str, results)) or 'none'}"]
+    for n, content in results.items():
+        parts.append(f"=== Page {n} ===\n{content.strip() or '(no ' + mode + ' found)'}")
+    if not pages and total > len(results):
+        parts.append(f"...{total - len(results)} more pages; pass `pages` (e.g. \"6-10\") to read them.")
+    return "\n\n".join(parts)
@@ -0,0 +1,116 @@
+import os
+import time
+import signal
+import threading
+import subprocess
+import multiprocessing
+from typing import Dict, Set
+
+# Per-session Python REPL worker processes idle for longer than this are shut down
+PYTHON_REPL_IDLE_SECONDS = float(os.getenv("PYTHON_REPL_IDLE_SECONDS", "900"))
+
+_lock = threading.Lock()
+_shell_processes: Dict[str, Set[subprocess.Popen]] = {}
+_python_workers: Dict[str, "PythonWorker"] = {}
+
+
+def _session_key() -> str:
+    from backend.memory.session_manager import current_session_id
+    return current_session_id.get() or "default"
+
+
+def run_shell_command(command: str) -> str:
+    """Runs a shell command in its own process group, registered under the current session so
+    a cancelled turn can kill it; returns stdout and stderr like the stock ShellTool."""
+    key = _session_key()
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    with _lock:
+        _shell_processes.setdefault(key, set()).add(process)
+    try:
+        output, _ = process.communicate()
+    finally:
+        with _lock:
+            _shell_processes.get(key, set()).discard(process)
+    if process.returncode == -signal.SIGKILL:
+        return "Command was cancelled."
+    return output.decode(errors="replace")
+
+
+def _python_worker_loop(conn):
+    from langchain_experimental.utilities.python import PythonREPL
+
+    # Globals persist across commands, as they did for the in-process REPL
+    repl = PythonREPL()
+    while True:
+        try:
+            command = conn.recv()
+        except EOFError:
+            return
+        conn.send(repl.run(command))
+
+
+class PythonWorker:
+    """A session's Python REPL, run in a child process so a cancelled turn can kill it."""
+
+    def __init__(self):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_python_worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.last_used = time.monotonic()
+        self._run_lock = threading.Lock()
+
+    def run(self, command: str) -> str:
+        with self._run_lock:
+            self.last_used = time.monotonic()
+            try:
+                self.conn.send(command)
+                return self.conn.recv()
+            except (EOFError, OSError):
+                return "Execution was cancelled."
+            finally:
+                self.last_used = time.monotonic()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+def run_python(command: str) -> str:
+    key = _session_key()
+    with _lock:
+        now = time.monotonic()
+        for other_key, worker in list(_python_workers.items()):
+            if other_key != key and now - worker.last_used > PYTHON_REPL_IDLE_SECONDS and not worker._run_lock.locked():
+                worker.kill()
+                del _python_workers[other_key]
+        worker = _python_workers.get(key)
+        if worker is None or not worker.process.is_alive():
+            worker = _python_workers[key] = PythonWorker()
+    return worker.run(command)
+
+
+def kill_session_processes(session_id: str) -> int:
+    """Kills the session's running shell commands and busy Python REPL; returns how many were killed."""
+    killed = 0
+    with _lock:
+        for process in _shell_processes.pop(session_id, set()):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+                killed += 1
+            except ProcessLookupError:
+                pass
+        worker = _python_workers.get(session_id)
+        if worker and worker._run_lock.locked():
+            worker.kill()
+            del _python_workers[session_id]
+            killed += 1
+    return killed
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Per-session bounds on memoized tool results, evicted least-recently-used first
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "256"))
+TOOL_CACHE_MAX_BYTES = int(float(os.getenv("TOOL_CACHE_MAX_MB", "8")) * 1024 * 1024)
+# Sessions with a cache; the least recently active session's cache is dropped beyond this
+TOOL_CACHE_MAX_SESSIONS = int(os.getenv("TOOL_CACHE_MAX_SESSIONS", "64"))
+# How long a fetched page is reused before it is fetched again
+FETCH_URL_CACHE_TTL_SECONDS = float(os.getenv("FETCH_URL_CACHE_TTL_SECONDS", "300"))
+
+
+class SessionToolCache:
+    """One session's tool results keyed by (tool, arguments, validity token).
+
+    The validity token captures what the result depends on (a file's mtime and
+    size, an index's build stamp), so a changed source simply misses the cache;
+    results of tools without one expire after a TTL instead.
+    """
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES, max_bytes: int = TOOL_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # (tool, arguments) -> (validity token, expires at or None, result)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, Optional[float], str]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str], token: Any) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_token, expires_at, result = entry
+            if cached_token != token or (expires_at is not None and time.monotonic() >= expires_at):
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key: Tuple[str, str], token: Any, result: str, ttl: Optional[float] = None):
+        if len(result) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (token, expires_at, result)
+            self._size += len(result)
+            while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[2])
+
+    def invalidate(self, tool_name: str, predicate: Callable[[dict], bool] = lambda args: True) -> int:
+        """Drops the tool's entries whose arguments match `predicate`; returns how many."""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == tool_name and predicate(json.loads(key[1]))]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+
+_lock = threading.Lock()
+_session_caches: "OrderedDict[str, SessionToolCache]" = OrderedDict()
+_hits: Dict[str, int] = {}
+_misses: Dict[str, int] = {}
+
+
+def _current_session() -> str:
+    from backend.memory.session_manager import current_session_id
+    return current_session_id.get() or "default"
+
+
+def session_cache(session_id: Optional[str] = None) -> SessionToolCache:
+    session_id = session_id or _current_session()
+    with _lock:
+        cache = _session_caches.get(session_id)
+        if cache is None:
+            cache = _session_caches[session_id] = SessionToolCache()
+            while len(_session_caches) > TOOL_CACHE_MAX_SESSIONS:
+                _session_caches.popitem(last=False)
+        else:
+            _session_caches.move_to_end(session_id)
+        return cache
+
+
+def call_cached(tool_name: str, arguments: dict, token: Any, compute: Callable[[], str], ttl: Optional[float] = None) -> str:
+    """Returns the session's cached result for this call, or computes and caches it.
+
+    Error results are not cached, so a failed call is retried the next time.
+    """
+    cache = session_cache()
+    key = (tool_name, json.dumps(arguments, sort_keys=True, default=str))
+    result = cache.get(key, token)
+    counter = _hits if result is not None else _misses
+    with _lock:
+        counter[tool_name] = counter.get(tool_name, 0) + 1
+    if result is not None:
+        return result
+    result = compute()
+    if isinstance(result, str) and not result.startswith("Error"):
+        cache.put(key, token, result, ttl)
+    return result
+
+
+def memoize_tool(tool_name: str, validity: Optional[Callable[..., Any]] = None, ttl: Optional[float] = None):
+    """Decorates a tool function so its results are reused within the session.
+
+    `validity(*args, **kwargs)` returns the token a cached result must match; if it
+    returns None the call isn't cached. Without `validity`, results expire after `ttl`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = validity(*args, **kwargs) if validity else ()
+            if token is None:
+                return func(*args, **kwargs)
+            arguments = {"args": list(args), **kwargs}
+            return call_cached(tool_name, arguments, token, lambda: func(*args, **kwargs), ttl)
+        return wrapper
+    return decorator
+
+
+def file_token(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it can't be stat'ed."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def directory_token(path: str) -> Optional[Tuple[int, int]]:
+    """Newest mtime_ns and file count of a directory's files, e.g. a persisted index; None if missing."""
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return None
+    newest = 0
+    for name in names:
+        token = file_token(os.path.join(path, name))
+        if token:
+            newest = max(newest, token[0])
+    return newest, len(names)
+
+
+def invalidate(tool_name: str, predicate: Callable[[dict], bool] = lambda args: True) -> int:
+    """Drops matching entries of a tool from the current session's cache."""
+    return session_cache().invalidate(tool_name, predicate)
+
+
+def tool_cache_stats() -> dict:
+    with _lock:
+        caches = list(_session_caches.values())
+        hits, misses = dict(_hits), dict(_misses)
+    return {
+        "sessions": len(caches),
+        "entries": sum(len(c._entries) for c in caches),
+        "bytes": sum(c._size for c in caches),
+        "hits": hits,
+        "misses": misses,
+    }
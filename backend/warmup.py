@@ -0,0 +1,147 @@
+import os
+import time
+import asyncio
+import importlib
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+# Set to "false" to skip warm-up; the API then reports ready immediately
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+# How long Ollama keeps a model loaded after a request, and how often the keep-alive pings refresh it
+OLLAMA_KEEP_ALIVE_SECONDS = int(os.getenv("OLLAMA_KEEP_ALIVE_SECONDS", "1800"))
+OLLAMA_KEEPALIVE_PING_SECONDS = float(os.getenv("OLLAMA_KEEPALIVE_PING_SECONDS", "240"))
+# Loading a large model from disk can take minutes
+OLLAMA_LOAD_TIMEOUT_SECONDS = 300
+
+# Modules whose first import dominates the first request
+HEAVY_IMPORTS = (
+    "backend.graph.agent",
+    "langchain_community.vectorstores",
+    "backend.tools.core_tools",
+)
+
+warmup_state = {"ready": not STARTUP_WARMUP, "started_at": None, "finished_at": None, "steps": {}}
+
+
+def _ollama_base_url() -> str:
+    return os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434").rstrip("/")
+
+
+def ollama_models() -> List[Tuple[str, str]]:
+    """(kind, model) pairs served by Ollama: the embedding model, and the chat model when a route uses it."""
+    models = [("embed", os.getenv("OLLAMA_EMBED_MODEL", "qwen2.5:14b"))]
+    routed = [os.getenv("MODEL_TYPE", "openai"), os.getenv("LLM_PROVIDERS", "")]
+    routed += [value for key, value in os.environ.items() if key.startswith("MODEL_ROUTE_") and not key.endswith("_BUDGET_MS")]
+    if any("ollama" in value.lower() for value in routed):
+        models.append(("chat", os.getenv("OLLAMA_MODEL", "qwen3:8b")))
+    return models
+
+
+def load_ollama_model(kind: str, model: str, timeout: float = OLLAMA_LOAD_TIMEOUT_SECONDS):
+    """Loads a model into Ollama's memory (or refreshes its keep-alive) without generating anything."""
+    if kind == "embed":
+        response = requests.post(f"{_ollama_base_url()}/api/embed",
+                                 json={"model": model, "input": "warm-up", "keep_alive": OLLAMA_KEEP_ALIVE_SECONDS}, timeout=timeout)
+    else:
+        # An empty prompt only loads the model
+        response = requests.post(f"{_ollama_base_url()}/api/generate",
+                                 json={"model": model, "keep_alive": OLLAMA_KEEP_ALIVE_SECONDS}, timeout=timeout)
+    response.raise_for_status()
+
+
+def _import_modules():
+    for name in HEAVY_IMPORTS:
+        importlib.import_module(name)
+
+
+def _load_skills():
+    from backend.skills.skills_manager import SkillsManager
+    from backend.skills.skill_cache import skill_document_cache
+
+    index = SkillsManager.get_index()
+    for skill in index.skills:
+        skill_document_cache.get(skill["path"])
+
+
+def _load_memory_index():
+    from backend.memory.memory_retriever import load_memory_index
+    load_memory_index()
+
+
+def _warm_embeddings():
+    from backend.memory.memory_retriever import get_query_embeddings
+    get_query_embeddings().embed_query("warm-up")
+
+
+def _warm_chat_model():
+    # Building the client is all a hosted provider needs; a local Ollama model is loaded into memory
+    from backend.graph.model_router import get_model
+    get_model("chat")
+    for kind, model in ollama_models():
+        if kind == "chat":
+            load_ollama_model(kind, model)
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("imports", _import_modules),
+    ("skills", _load_skills),
+    ("embeddings", _warm_embeddings),
+    ("memory_index", _load_memory_index),
+    ("chat_model", _warm_chat_model),
+]
+
+
+def _run_step(name: str, step: Callable[[], None]):
+    started = time.monotonic()
+    result: Dict[str, object] = {"ok": True}
+    try:
+        step()
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+        print(f"Error warming up {name}: {e}")
+    result["seconds"] = round(time.monotonic() - started, 2)
+    warmup_state["steps"][name] = result
+
+
+async def run_warmup(report: Optional[Callable[[str, dict], None]] = None) -> dict:
+    """Runs the warm-up steps off the event loop and marks the process ready when they are done.
+
+    Imports run first since every other step needs them; the rest run concurrently.
+    A failed step is recorded in the state but doesn't keep the process from becoming ready.
+    """
+    warmup_state.update(ready=False, started_at=time.time(), finished_at=None, steps={})
+    first_name, first_step = WARMUP_STEPS[0]
+    await asyncio.to_thread(_run_step, first_name, first_step)
+    if report:
+        report(first_name, warmup_state["steps"][first_name])
+
+    async def run(name, step):
+        await asyncio.to_thread(_run_step, name, step)
+        if report:
+            report(name, warmup_state["steps"][name])
+
+    await asyncio.gather(*(run(name, step) for name, step in WARMUP_STEPS[1:]))
+    warmup_state.update(ready=True, finished_at=time.time())
+    return warmup_state
+
+
+def start_keepalive(interval: float = OLLAMA_KEEPALIVE_PING_SECONDS) -> Optional[threading.Thread]:
+    """Pings Ollama every `interval` seconds on a daemon thread so its models aren't unloaded between requests."""
+    models = ollama_models()
+    if interval <= 0 or not models:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            for kind, model in models:
+                try:
+                    load_ollama_model(kind, model, timeout=30)
+                except Exception as e:
+                    print(f"Error refreshing Ollama keep-alive for {model}: {e}")
+
+    thread = threading.Thread(target=loop, name="ollama-keepalive", daemon=True)
+    thread.start()
+    return thread
@@ -6,6 +6,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from backend.graph.agent import stream_chat_response
+from backend.warmup import STARTUP_WARMUP, run_warmup, start_keepalive
 
 async def run_cli():
     print("====================================")
@@ -15,6 +16,15 @@ async def run_cli():
     
     session_id = "cli_session"
     
+    if STARTUP_WARMUP:
+        # Load models, indexes and skills now instead of on the first question
+        print("Warming up...", flush=True)
+        def report(name, result):
+            status = "ok" if result["ok"] else f"failed ({result['error']})"
+            print(f"   \033[90m{name}: {status} in {result['seconds']}s\033[0m")
+        await run_warmup(report)
+    start_keepalive()
+    
     while True:
         try:
             user_input = input("\n[User]: ")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The PDF skill's scripts are run as standalone scripts and import each other by module name
+PDF_SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "backend", "skills", "pdf", "scripts")
+sys.path.insert(0, os.path.abspath(PDF_SCRIPTS_DIR))
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+from langchain.agents import create_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.tools import tool
+
+from backend.graph import agent
+from backend.memory import session_manager
+
+
+class ScriptedAgentModel(BaseChatModel):
+    """Streams one scripted reply per call: a tool call, then the answer word by word."""
+
+    replies: List[Any]
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-agent"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = self.replies.pop(0)
+        if isinstance(reply, dict):
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[{**reply, "index": 0}]))
+            return
+        for word in reply.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+@tool("lookup")
+def lookup_tool(query: str) -> str:
+    """Answers from a nested model that inherits the run's callbacks."""
+    nested = GenericFakeChatModel(messages=iter([AIMessage(content="nested synthesis tokens")]))
+    return nested.invoke(query).content
+
+
+@pytest.fixture
+def sessions_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_manager, "SESSIONS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _run_turn(monkeypatch, replies):
+    model = ScriptedAgentModel(replies=replies)
+    monkeypatch.setattr(agent, "get_mini_openclaw_agent", lambda query: create_agent(model=model, tools=[lookup_tool]))
+
+    async def collect():
+        return [frame async for frame in agent.stream_chat_response("what is it?", "test_session")]
+
+    return asyncio.run(collect())
+
+
+def test_nested_model_tokens_are_not_streamed_as_the_answer(sessions_dir, monkeypatch):
+    frames = _run_turn(monkeypatch, [
+        {"name": "lookup", "args": '{"query": "it"}', "id": "call-1"},
+        "the final answer",
+    ])
+
+    text = "".join(frame for frame in frames if not frame.startswith("data: [THOUGHT]"))
+    assert "nested" not in text
+    assert "final" in text and "answer" in text
+
+    history = session_manager.SessionManager("test_session").load_history()
+    assert [type(m).__name__ for m in history] == ["HumanMessage", "AIMessage", "ToolMessage", "AIMessage"]
+    assert history[2].content == "nested synthesis tokens"
@@ -0,0 +1,100 @@
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import pytest
+
+import check_bounding_boxes
+from check_bounding_boxes import find_bounding_box_problems, intersecting_pairs, rects_intersect
+
+SCRIPT = check_bounding_boxes.__file__
+
+
+def _brute_force(rects):
+    return {(i, j) for i, j in itertools.combinations(range(len(rects)), 2) if rects_intersect(rects[i], rects[j])}
+
+
+def _random_rects(rng, count, big=0):
+    rects = []
+    for _ in range(count):
+        x, y = rng.uniform(0, 600), rng.uniform(0, 780)
+        rects.append([x, y, x + rng.uniform(0.5, 200), y + rng.uniform(0.5, 30)])
+    for _ in range(big):
+        x, y = rng.uniform(0, 100), rng.uniform(0, 100)
+        rects.append([x, y, x + rng.uniform(300, 612), y + rng.uniform(300, 792)])
+    rng.shuffle(rects)
+    return rects
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_grid_finds_exactly_the_brute_force_pairs(seed):
+    rng = random.Random(seed)
+    rects = _random_rects(rng, rng.randint(2, 300), big=rng.randint(0, 4))
+
+    pairs = list(intersecting_pairs(rects))
+
+    assert len(pairs) == len(set(pairs))
+    assert all(i < j for i, j in pairs)
+    assert set(pairs) == _brute_force(rects)
+
+
+def test_one_page_sized_box_among_tiny_ones_stays_fast():
+    rng = random.Random(0)
+    rects = [[x, y, x + 1, y + 1] for x, y in ((rng.uniform(0, 600), rng.uniform(0, 780)) for _ in range(50))]
+    rects.append([0, 0, 612, 792])
+
+    started = time.perf_counter()
+    pairs = set(intersecting_pairs(rects))
+
+    assert time.perf_counter() - started < 0.1
+    assert pairs == {(i, 50) for i in range(50)}
+
+
+def _overlapping_fields(count):
+    # Every field's label overlaps the next field's entry
+    return {"form_fields": [{
+        "page_number": 1,
+        "description": f"field {i}",
+        "label_bounding_box": [10, i * 10, 100, i * 10 + 15],
+        "entry_bounding_box": [110, i * 10 + 5, 200, i * 10 + 25],
+    } for i in range(count)]}
+
+
+def _run(tmp_path, fields, *args):
+    path = tmp_path / "fields.json"
+    path.write_text(json.dumps(fields))
+    return subprocess.run([sys.executable, SCRIPT, str(path), *args], capture_output=True, text=True, check=True).stdout
+
+
+def test_report_stops_after_the_first_messages_unless_all_is_given(tmp_path):
+    fields = _overlapping_fields(30)
+    problems = find_bounding_box_problems(fields)
+    assert len(problems) > 25
+
+    short = _run(tmp_path, fields).splitlines()
+    full = _run(tmp_path, fields, "--all").splitlines()
+
+    assert len(short) == check_bounding_boxes.DEFAULT_MAX_MESSAGES + 1
+    assert short[-1].startswith("Aborting further checks")
+    assert len(full) == len(problems) + 1
+    assert not any(line.startswith("Aborting") for line in full)
+
+
+def test_json_output_lists_every_problem(tmp_path):
+    fields = _overlapping_fields(30)
+
+    report = json.loads(_run(tmp_path, fields, "--json"))
+
+    assert report["fields"] == 30 and report["success"] is False
+    assert report["problems"] == json.loads(json.dumps(find_bounding_box_problems(fields)))
+    assert {p["type"] for p in report["problems"]} == {"intersection"}
+
+
+def test_json_output_reports_success(tmp_path):
+    report = json.loads(_run(tmp_path, _overlapping_fields(1), "--json"))
+
+    assert report == {"fields": 1, "success": True, "problems": []}
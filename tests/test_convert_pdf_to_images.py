@@ -0,0 +1,51 @@
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import RectangleObject
+
+import convert_pdf_to_images
+from convert_pdf_to_images import target_size
+
+
+def _page(tmp_path, width, height, cropbox=None, rotation=0):
+    writer = PdfWriter()
+    page = writer.add_blank_page(width, height)
+    if cropbox:
+        page.cropbox = RectangleObject(cropbox)
+    if rotation:
+        page.rotate(rotation)
+    path = tmp_path / "page.pdf"
+    writer.write(path)
+    return PdfReader(path).pages[0]
+
+
+def test_target_size_uses_the_cropbox(tmp_path):
+    page = _page(tmp_path, 612, 792, cropbox=[50, 0, 356, 792])
+
+    width, height = target_size(page, max_dim=1000)
+
+    assert height == 1000
+    assert abs(width / height - 306 / 792) < 0.01
+
+
+def test_target_size_renders_small_pages_at_max_dpi(tmp_path):
+    page = _page(tmp_path, 144, 72)
+
+    assert target_size(page, max_dim=1000) == (400, 200)
+
+
+def test_target_size_swaps_sides_of_rotated_pages(tmp_path):
+    page = _page(tmp_path, 612, 792, rotation=90)
+
+    width, height = target_size(page, max_dim=1000)
+
+    assert width == 1000 and height < width
+
+
+def test_render_page_fixes_only_the_long_edge(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(convert_pdf_to_images, "convert_from_path", lambda *args, **kwargs: calls.append(kwargs))
+
+    convert_pdf_to_images.render_page("form.pdf", 3, (386, 1000), str(tmp_path))
+
+    assert calls[0]["size"] == 1000
+    assert calls[0]["use_cropbox"] is True
+    assert calls[0]["first_page"] == calls[0]["last_page"] == 3
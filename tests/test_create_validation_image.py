@@ -0,0 +1,65 @@
+import json
+
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import RectangleObject
+
+import create_validation_image
+from create_validation_image import draw_field_boxes, visible_area
+
+RED = (255, 0, 0)
+
+
+def _field(page, entry, label=(0, 0, 1, 1)):
+    return {"page_number": page, "entry_bounding_box": list(entry), "label_bounding_box": list(label)}
+
+
+def _blank(width, height):
+    return Image.new("RGB", (width, height), "white")
+
+
+def test_legacy_path_scales_boxes_from_declared_pdf_size(tmp_path):
+    # Behaviour change: with pdf_width/pdf_height declared, boxes are scaled to the image
+    # (here 2x) instead of being drawn as pixel coordinates
+    fields_path = tmp_path / "fields.json"
+    fields_path.write_text(json.dumps({
+        "pages": [{"page_number": 1, "pdf_width": 100, "pdf_height": 100}],
+        "form_fields": [_field(1, (10, 10, 40, 20))],
+    }))
+    input_path, output_path = tmp_path / "page.png", tmp_path / "out.png"
+    _blank(200, 200).save(input_path)
+
+    create_validation_image.create_validation_image(1, str(fields_path), str(input_path), str(output_path))
+
+    img = Image.open(output_path).convert("RGB")
+    assert img.getpixel((20, 30)) == RED
+    assert img.getpixel((80, 30)) == RED
+    assert img.getpixel((10, 15)) != RED
+
+
+def test_legacy_path_without_declared_size_draws_pixel_coordinates(tmp_path):
+    fields_path = tmp_path / "fields.json"
+    fields_path.write_text(json.dumps({"form_fields": [_field(1, (10, 10, 40, 20))]}))
+    input_path, output_path = tmp_path / "page.png", tmp_path / "out.png"
+    _blank(200, 200).save(input_path)
+
+    create_validation_image.create_validation_image(1, str(fields_path), str(input_path), str(output_path))
+
+    assert Image.open(output_path).convert("RGB").getpixel((10, 15)) == RED
+
+
+def test_boxes_are_mapped_through_the_cropbox(tmp_path):
+    writer = PdfWriter()
+    page = writer.add_blank_page(200, 400)
+    page.cropbox = RectangleObject([100, 0, 200, 200])
+    writer.write(tmp_path / "cropped.pdf")
+    area = visible_area(PdfReader(tmp_path / "cropped.pdf").pages[0])
+    assert area == (100.0, 200.0, 100.0, 200.0)
+
+    # The image shows the bottom-right quarter of the page at 2 px per point
+    img = _blank(200, 400)
+    page_info = {"page_number": 1, "pdf_width": 200, "pdf_height": 400}
+    draw_field_boxes(img, [_field(1, (110, 210, 150, 250), label=(100, 200, 101, 201))], page_info, area)
+
+    assert img.getpixel((20, 40)) == RED
+    assert img.getpixel((100, 60)) == RED
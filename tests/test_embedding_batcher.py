@@ -0,0 +1,118 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from backend.memory.embedding_batcher import CoalescingEmbeddings
+
+
+class GatedEmbeddings(Embeddings):
+    """Embeds a text as [len(text)]; each call waits for `release` so tests can queue work behind it."""
+
+    def __init__(self):
+        self.calls = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        self.entered.set()
+        assert self.release.wait(5)
+        if self.error:
+            raise self.error
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_concurrent_queries_are_batched_and_deduplicated():
+    inner = GatedEmbeddings()
+    inner.release.clear()
+    embeddings = CoalescingEmbeddings(inner, max_wait_ms=50)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(embeddings.embed_query, "first")
+        assert inner.entered.wait(5)
+        # These queue up while the first batch is in flight and go out together
+        rest = [pool.submit(embeddings.embed_query, text) for text in ("ab", "abc", "ab")]
+        deadline = time.monotonic() + 5
+        while embeddings._queue.qsize() < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        inner.release.set()
+        vectors = [first.result(5)] + [f.result(5) for f in rest]
+
+    assert vectors == [[5.0], [2.0], [3.0], [2.0]]
+    assert inner.calls == [["first"], ["ab", "abc"]]
+    assert embeddings.stats() == {"queries": 4, "batches": 2, "avg_batch": 2.0}
+    # Recent vectors are answered without another embedding call
+    assert embeddings.embed_query("abc") == [3.0]
+    assert len(inner.calls) == 2
+
+
+def test_cancelled_caller_in_flight_does_not_stop_the_dispatcher():
+    inner = GatedEmbeddings()
+    inner.release.clear()
+    embeddings = CoalescingEmbeddings(inner, max_wait_ms=0)
+
+    async def scenario():
+        task = asyncio.create_task(embeddings.aembed_query("abandoned"))
+        assert await asyncio.to_thread(inner.entered.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    inner.release.set()
+
+    assert embeddings._submit("next").result(timeout=5) == [4.0]
+
+
+def test_cancelled_caller_still_queued_is_not_embedded():
+    inner = GatedEmbeddings()
+    inner.release.clear()
+    embeddings = CoalescingEmbeddings(inner, max_wait_ms=0)
+    first = embeddings._submit("first")
+    assert inner.entered.wait(5)
+
+    async def scenario():
+        task = asyncio.create_task(embeddings.aembed_query("queued"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    inner.release.set()
+
+    assert first.result(timeout=5) == [5.0]
+    assert embeddings._submit("next").result(timeout=5) == [4.0]
+    assert ["queued"] not in inner.calls
+
+
+def test_embedder_errors_reach_the_callers_and_the_dispatcher_keeps_running():
+    inner = GatedEmbeddings()
+    inner.error = RuntimeError("embedding server down")
+    embeddings = CoalescingEmbeddings(inner, max_wait_ms=0)
+
+    with pytest.raises(RuntimeError, match="embedding server down"):
+        embeddings._submit("lost").result(timeout=5)
+    inner.error = None
+    assert embeddings._submit("back").result(timeout=5) == [4.0]
+
+
+def test_a_short_embedding_response_fails_the_batch_without_killing_the_dispatcher():
+    class ShortEmbeddings(GatedEmbeddings):
+        def embed_documents(self, texts):
+            return super().embed_documents(texts)[:-1] if len(self.calls) == 0 else super().embed_documents(texts)
+
+    inner = ShortEmbeddings()
+    embeddings = CoalescingEmbeddings(inner, max_wait_ms=0)
+
+    with pytest.raises(KeyError):
+        embeddings._submit("missing").result(timeout=5)
+    assert embeddings._submit("fine").result(timeout=5) == [4.0]
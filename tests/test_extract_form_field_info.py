@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+from reportlab.pdfgen import canvas
+
+import extract_form_field_info
+from extract_form_field_info import field_index_path, load_field_info
+
+
+def _make_form(path, names):
+    c = canvas.Canvas(str(path))
+    for i, name in enumerate(names):
+        c.acroForm.textfield(name=name, x=100, y=700 - i * 40, width=200, height=20)
+    c.showPage()
+    c.save()
+    return str(path)
+
+
+@pytest.fixture
+def extractions(monkeypatch):
+    calls = []
+    original = extract_form_field_info.get_field_info
+
+    def counting_get_field_info(reader):
+        calls.append(reader)
+        return original(reader)
+
+    monkeypatch.setattr(extract_form_field_info, "get_field_info", counting_get_field_info)
+    return calls
+
+
+def test_second_load_is_served_from_the_sidecar(tmp_path, extractions):
+    pdf = _make_form(tmp_path / "form.pdf", ["name", "email"])
+
+    first = load_field_info(pdf)
+    second = load_field_info(pdf)
+
+    assert [f["field_id"] for f in first] == ["name", "email"]
+    assert second == json.loads(json.dumps(first))
+    assert len(extractions) == 1
+    assert os.path.exists(field_index_path(pdf))
+
+
+def test_touching_the_pdf_without_changing_it_keeps_the_sidecar(tmp_path, extractions):
+    pdf = _make_form(tmp_path / "form.pdf", ["name"])
+    load_field_info(pdf)
+    stat = os.stat(pdf)
+    os.utime(pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+    load_field_info(pdf)
+
+    assert len(extractions) == 1
+
+
+def test_a_changed_pdf_is_extracted_again(tmp_path, extractions):
+    pdf = _make_form(tmp_path / "form.pdf", ["name"])
+    load_field_info(pdf)
+    _make_form(pdf, ["name", "phone"])
+
+    fields = load_field_info(pdf)
+
+    assert [f["field_id"] for f in fields] == ["name", "phone"]
+    assert len(extractions) == 2
+    with open(field_index_path(pdf)) as f:
+        assert [f["field_id"] for f in json.load(f)["fields"]] == ["name", "phone"]
+
+
+@pytest.mark.parametrize("sidecar", ["{not json", json.dumps({"sha256": "0" * 64, "fields": []}), json.dumps({"fields": []})])
+def test_corrupt_or_stale_sidecars_fall_back_to_extraction(tmp_path, extractions, sidecar):
+    pdf = _make_form(tmp_path / "form.pdf", ["name"])
+    with open(field_index_path(pdf), "w") as f:
+        f.write(sidecar)
+
+    fields = load_field_info(pdf)
+
+    assert [f["field_id"] for f in fields] == ["name"]
+    assert len(extractions) == 1
+    # The sidecar is rewritten, so the next load is a hit
+    load_field_info(pdf)
+    assert len(extractions) == 1
@@ -0,0 +1,87 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend import app as app_module
+from backend.app import app
+
+
+@pytest.fixture
+def backend_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "PROJECT_ROOT", str(tmp_path))
+    (tmp_path / "backend" / "notes").mkdir(parents=True)
+    (tmp_path / "backend" / "notes" / "todo.md").write_text("first line\nsecond line\n")
+    return tmp_path / "backend"
+
+
+def _request(*calls):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await call(client) for call in calls]
+
+    return asyncio.run(scenario())
+
+
+def test_get_returns_json_content_by_default(backend_dir):
+    response, = _request(lambda c: c.get("/api/files", params={"path": "notes/todo.md"}))
+
+    assert response.json() == {"content": "first line\nsecond line\n"}
+    assert response.headers["etag"]
+
+
+def test_raw_format_streams_with_validators_and_ranges(backend_dir):
+    params = {"path": "notes/todo.md", "format": "raw"}
+    full, = _request(lambda c: c.get("/api/files", params=params))
+    etag = full.headers["etag"]
+    unchanged, partial = _request(
+        lambda c: c.get("/api/files", params=params, headers={"if-none-match": etag}),
+        lambda c: c.get("/api/files", params=params, headers={"range": "bytes=0-9"}),
+    )
+
+    assert full.text == "first line\nsecond line\n"
+    assert unchanged.status_code == 304
+    assert partial.status_code == 206 and partial.text == "first line"
+
+
+def test_stale_if_match_is_rejected(backend_dir):
+    response, = _request(lambda c: c.put("/api/files", params={"path": "notes/todo.md"}, content=b"new",
+                                         headers={"if-match": '"stale"'}))
+
+    assert response.status_code == 412
+    assert (backend_dir / "notes" / "todo.md").read_text() == "first line\nsecond line\n"
+
+
+def test_concurrent_conditional_puts_let_only_one_writer_win(backend_dir):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            read = await client.get("/api/files", params={"path": "notes/todo.md"})
+            etag = read.headers["etag"]
+            both_started = asyncio.Event()
+            started = []
+
+            async def body(name):
+                yield b"written by "
+                started.append(name)
+                if len(started) == 2:
+                    both_started.set()
+                # Both requests have passed the early If-Match check before either finishes
+                await both_started.wait()
+                yield name.encode()
+
+            def put(name):
+                return client.put("/api/files", params={"path": "notes/todo.md"}, content=body(name),
+                                  headers={"if-match": etag})
+
+            return await asyncio.gather(put("a"), put("bb"))
+
+    responses = asyncio.run(scenario())
+
+    assert sorted(r.status_code for r in responses) == [200, 412]
+    winner = next(r for r in responses if r.status_code == 200)
+    content = (backend_dir / "notes" / "todo.md").read_text()
+    assert content in ("written by a", "written by bb")
+    assert winner.json()["bytes"] == len(content)
+    assert not [p for p in (backend_dir / "notes").iterdir() if p.name.startswith(".upload-")]
@@ -0,0 +1,80 @@
+import itertools
+import types
+
+import pytest
+
+from backend.tools import file_reader
+from backend.tools.file_reader import read_range, search_files
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_reader, "READ_FILE_WHOLE_MAX_BYTES", 1024)
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 5001)))
+    return str(path)
+
+
+def test_large_file_without_a_range_returns_a_preview_with_a_hint(log_file):
+    header, body = read_range(log_file).split("\n", 1)
+
+    assert header.startswith("[lines 1-100 of 5000; next start_line=101; file is ")
+    assert "pass start_line/end_line or offset/length" in header
+    assert body.splitlines() == [f"line {i}" for i in range(1, 101)]
+
+
+def test_explicit_first_lines_have_no_preview_hint(log_file):
+    header = read_range(log_file, start_line=1, end_line=100).split("\n", 1)[0]
+
+    assert header == "[lines 1-100 of 5000; next start_line=101]"
+
+
+def test_line_ranges_cross_index_checkpoints(log_file):
+    header, body = read_range(log_file, start_line=250, end_line=520).split("\n", 1)
+
+    assert header == "[lines 250-520 of 5000; next start_line=521]"
+    assert body.splitlines() == [f"line {i}" for i in range(250, 521)]
+
+
+def test_zero_end_line_and_length_are_not_treated_as_unset(log_file):
+    assert read_range(log_file, start_line=1, end_line=0) == "[no lines 1-0: the file has 5000 lines]"
+    assert read_range(log_file, offset=7, length=0).startswith("[bytes 7-7 of ")
+
+
+def test_byte_range(log_file):
+    size = len("".join(f"line {i}\n" for i in range(1, 5001)))
+
+    assert read_range(log_file, offset=0, length=14) == f"[bytes 0-14 of {size}; next offset=14]\nline 1\nline 2\n"
+
+
+def test_search_stops_inside_a_large_file_when_the_time_budget_runs_out(tmp_path, monkeypatch):
+    (tmp_path / "big.log").write_text(("x" * 99 + "\n") * 200 + "needle\n")
+    monkeypatch.setattr(file_reader, "PROJECT_ROOT", str(tmp_path))
+    monkeypatch.setattr(file_reader, "SEARCH_WINDOW_BYTES", 512)
+    monkeypatch.setattr(file_reader, "SEARCH_TIMEOUT_SECONDS", 3)
+    # Every clock read advances a second: the budget covers the file check and two windows
+    clock = itertools.count()
+    monkeypatch.setattr(file_reader, "time", types.SimpleNamespace(monotonic=lambda: next(clock)))
+
+    assert search_files("needle") == "No matches for `needle` in 1 files (stopped after 3s)."
+
+
+def test_search_reports_line_numbers_across_windows(tmp_path, monkeypatch):
+    (tmp_path / "big.log").write_text("".join(f"{'hit' if i % 50 == 0 else 'x' * 40} {i}\n" for i in range(1, 201)))
+    monkeypatch.setattr(file_reader, "PROJECT_ROOT", str(tmp_path))
+    monkeypatch.setattr(file_reader, "SEARCH_WINDOW_BYTES", 512)
+
+    lines = search_files("hit").splitlines()
+
+    assert lines == ["big.log:50: hit 50", "big.log:100: hit 100", "big.log:150: hit 150", "big.log:200: hit 200",
+                     "[4 matches in 1 files scanned]"]
+
+
+def test_search_anchors_match_at_every_line(tmp_path, monkeypatch):
+    (tmp_path / "module.py").write_text("import os\n\ndef first():\n    pass\n\n    def nested():\n        pass\n\ndef second():\n    return 1\n")
+    monkeypatch.setattr(file_reader, "PROJECT_ROOT", str(tmp_path))
+    # Small windows, so anchors are also checked at window starts
+    monkeypatch.setattr(file_reader, "SEARCH_WINDOW_BYTES", 16)
+
+    assert search_files(r"^def ").splitlines()[:-1] == ["module.py:3: def first():", "module.py:9: def second():"]
+    assert search_files(r"pass$").splitlines()[:-1] == ["module.py:4: pass", "module.py:7: pass"]
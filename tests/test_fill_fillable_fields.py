@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+
+from fill_fillable_fields import batch_output_path, fill_batch
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = str(tmp_path / "template.pdf")
+    c = canvas.Canvas(path)
+    c.acroForm.textfield(name="name", x=100, y=700, width=200, height=20)
+    c.showPage()
+    c.save()
+    return path
+
+
+def _write_records(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+def test_output_names_must_stay_inside_the_output_directory(tmp_path):
+    out = str(tmp_path / "out")
+
+    assert batch_output_path(out, "ok.pdf", {})[1] is None
+    assert batch_output_path(out, "../escape.pdf", {})[1]
+    assert batch_output_path(out, str(tmp_path / "absolute.pdf"), {})[1]
+    assert batch_output_path(out, ".", {})[1]
+
+
+def test_batch_rejects_unsafe_duplicate_and_empty_records(template, tmp_path):
+    out = tmp_path / "out"
+    records = _write_records(tmp_path / "records.jsonl", [
+        {"output": "alice.pdf", "values": {"name": "Alice"}},
+        {"output": "alice.pdf", "values": {"name": "Bob"}},
+        {"output": "../escape.pdf", "values": {"name": "Eve"}},
+        {"output": "empty.pdf", "values": {}},
+        {"values": {"name": "Carol"}},
+    ])
+
+    written, failures = fill_batch(template, records, str(out), workers=1)
+
+    assert written == 2
+    assert sorted(failures) == [2, 3, 4]
+    assert "already written by record 1" in failures[2][0]
+    assert "outside the output directory" in failures[3][0]
+    assert "no field values" in failures[4][0]
+    assert not (tmp_path / "escape.pdf").exists()
+    assert PdfReader(str(out / "alice.pdf")).get_fields()["name"]["/V"] == "Alice"
+    assert (out / "record_5.pdf").exists()
+
+
+def test_benchmark_fill_records_match_the_template_fields(capsys):
+    from benchmark import bench_fill
+
+    bench_fill(3, workers=1)
+
+    assert "3 written, 0 failed" in capsys.readouterr().out
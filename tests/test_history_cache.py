@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, messages_to_dict
+
+from backend.memory import session_manager
+from backend.memory.history_cache import HistoryCache, estimate_size
+from backend.memory.session_manager import SessionManager
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = HistoryCache()
+    monkeypatch.setattr(session_manager, "SESSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(session_manager, "history_cache", cache)
+    return cache
+
+
+def _exchange(text):
+    return [HumanMessage(content=text), AIMessage(content=f"reply to {text}")]
+
+
+def test_a_saved_history_loads_from_the_cache(cache):
+    manager = SessionManager("s1")
+    manager.save_history(_exchange("hello"))
+
+    loaded = manager.load_history()
+
+    assert [m.content for m in loaded] == ["hello", "reply to hello"]
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_loads_return_a_list_callers_can_extend(cache):
+    manager = SessionManager("s1")
+    manager.save_history(_exchange("hello"))
+    manager.load_history().append(HumanMessage(content="not saved"))
+
+    assert len(manager.load_history()) == 2
+
+
+def test_a_file_rewritten_elsewhere_is_read_again(cache):
+    manager = SessionManager("s1")
+    manager.save_history(_exchange("hello"))
+    # Another worker (or the files API) replaces the file
+    with open(manager.session_path, "w", encoding="utf-8") as f:
+        json.dump(messages_to_dict(_exchange("from elsewhere")), f)
+
+    loaded = manager.load_history()
+
+    assert loaded[0].content == "from elsewhere"
+    assert cache.misses == 1
+    assert manager.load_history()[0].content == "from elsewhere"
+    assert cache.hits == 1
+
+
+def test_least_recently_used_sessions_are_evicted_by_count():
+    cache = HistoryCache(max_sessions=2)
+    for name in ("a", "b"):
+        cache.put(name, (1, 1, 10), _exchange(name))
+    cache.get("a", (1, 1, 10))
+    cache.put("c", (1, 1, 10), _exchange("c"))
+
+    assert cache.get("b", (1, 1, 10)) is None
+    assert cache.get("a", (1, 1, 10)) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sessions_are_evicted_to_stay_within_the_byte_budget():
+    size = estimate_size(_exchange("x"))
+    cache = HistoryCache(max_bytes=size * 2)
+    for name in ("x", "y", "z"):
+        cache.put(name, (1, 1, 10), _exchange(name))
+
+    assert cache.get("x", (1, 1, 10)) is None
+    assert cache.stats()["estimated_bytes"] <= size * 2
+    # A history larger than the whole budget isn't kept, and replaces nothing else
+    cache.put("huge", (1, 1, 10), _exchange("x" * size * 4))
+    assert cache.get("huge", (1, 1, 10)) is None
+    assert cache.get("z", (1, 1, 10)) is not None
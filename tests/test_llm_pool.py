@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, AsyncIterator, List
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from backend.graph import llm_pool
+from backend.graph.llm_pool import HedgedChatModel
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Streams `tokens` after `delay` seconds; raises `error` instead if set."""
+
+    tokens: List[str] = []
+    delay: float = 0.0
+    error: str = ""
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(self.error)
+        for token in self.tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class EmptyStreamModel:
+    """A provider whose stream ends without a single chunk (no error raised)."""
+
+    async def astream(self, messages, stop=None, config=None, **kwargs):
+        return
+        yield
+
+
+@pytest.fixture(autouse=True)
+def fresh_health(monkeypatch):
+    monkeypatch.setattr(llm_pool, "provider_health", {})
+
+
+def _pool(*providers, hedge_after=0.05):
+    return HedgedChatModel(providers=list(providers), hedge_after=hedge_after)
+
+
+def test_empty_stream_fails_over_instead_of_winning():
+    pool = _pool(("empty", EmptyStreamModel()), ("healthy", ScriptedChatModel(tokens=["hi", " there"], delay=0.01)))
+
+    result = asyncio.run(pool.ainvoke([HumanMessage(content="hello")]))
+
+    assert result.content == "hi there"
+    assert llm_pool.provider_health["empty"].outcomes[-1] is False
+    assert llm_pool.provider_health["healthy"].outcomes[-1] is True
+
+
+def test_empty_hedge_does_not_cancel_the_slow_provider():
+    # The first provider misses the hedge deadline; the hedge then returns nothing
+    pool = _pool(("slow", ScriptedChatModel(tokens=["late"], delay=0.15)), ("empty", EmptyStreamModel()))
+
+    result = asyncio.run(pool.ainvoke([HumanMessage(content="hello")]))
+
+    assert result.content == "late"
+
+
+def test_error_before_first_token_fails_over():
+    pool = _pool(("broken", ScriptedChatModel(error="boom")), ("healthy", ScriptedChatModel(tokens=["ok"])))
+
+    assert asyncio.run(pool.ainvoke([HumanMessage(content="hello")])).content == "ok"
+
+
+def test_all_providers_empty_raises():
+    pool = _pool(("a", EmptyStreamModel()), ("b", EmptyStreamModel()))
+
+    with pytest.raises(RuntimeError, match="empty stream"):
+        asyncio.run(pool.ainvoke([HumanMessage(content="hello")]))
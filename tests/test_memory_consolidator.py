@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.memory import memory_consolidator
+from backend.memory.index_generations import IndexGenerations
+from backend.memory.memory_retriever import record_document
+from backend.memory.memory_store import MemoryStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = MemoryStore(db_path=str(tmp_path / "memory.db"), markdown_path=str(tmp_path / "MEMORY.md"))
+    monkeypatch.setattr(memory_consolidator, "memory_source_stamp", lambda: os.stat(store.markdown_path).st_mtime_ns)
+    return store
+
+
+def _index(store):
+    records = store.all()
+    ids = [f"memory-{r.id}" for r in records]
+    vectorstore = FAISS.from_documents([record_document(r) for r in records], DeterministicFakeEmbedding(size=16), ids=ids)
+    store.set_embedding_refs(dict(zip((r.id for r in records), ids)))
+    return vectorstore
+
+
+def test_catch_up_covers_memories_added_while_it_runs(store, monkeypatch):
+    store.add("already indexed")
+    vectorstore = _index(store)
+    store.add("added before publishing")
+
+    calls = []
+    original_all = store.all
+
+    def all_with_concurrent_add():
+        records = original_all()
+        if not calls:
+            # Another worker stores a memory while the first pass is embedding
+            store.add("added during the pass")
+        calls.append(len(records))
+        return records
+
+    monkeypatch.setattr(store, "all", all_with_concurrent_add)
+    stamp = memory_consolidator._catch_up(store, vectorstore)
+
+    assert len(calls) == 2
+    assert stamp == os.stat(store.markdown_path).st_mtime_ns
+    indexed = {doc.page_content for doc in vectorstore.docstore._dict.values()}
+    assert indexed == {r.to_markdown() for r in original_all()}
+
+
+def test_catch_up_drops_vectors_of_deleted_memories(store):
+    store.add("stays")
+    gone, _ = store.add("goes away")
+    vectorstore = _index(store)
+    store.delete([gone.id])
+
+    memory_consolidator._catch_up(store, vectorstore)
+
+    assert set(vectorstore.index_to_docstore_id.values()) == {f"memory-{r.id}" for r in store.all()}
+
+
+@pytest.mark.parametrize("has_index", [False, True])
+def test_early_exits_record_the_consolidated_count(store, tmp_path, monkeypatch, has_index):
+    store.add("only memory")
+    vectorstore = _index(store) if has_index else None
+    monkeypatch.setattr(memory_consolidator, "index_generations", IndexGenerations(str(tmp_path / "index")))
+    monkeypatch.setattr(memory_consolidator, "get_memory_store", lambda: store)
+    monkeypatch.setattr(memory_consolidator, "load_memory_index", lambda: vectorstore)
+    monkeypatch.setattr(memory_consolidator, "load_published_index", lambda: (None, vectorstore))
+    monkeypatch.setattr(memory_consolidator, "CONSOLIDATE_THRESHOLD", 1)
+
+    report = memory_consolidator.consolidate_memories()
+
+    assert report["merged"] == 0
+    assert store.get_meta("last_consolidated_count") == "1"
+    assert memory_consolidator.maybe_consolidate_in_background() is None
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.memory import index_generations as generations_module
+from backend.memory import memory_retriever
+from backend.memory.index_generations import IndexGenerations
+from backend.memory.memory_store import MemoryStore
+
+
+@pytest.fixture
+def generations(tmp_path):
+    return IndexGenerations(str(tmp_path / "index"))
+
+
+def _save_marker(text):
+    def save(path):
+        os.makedirs(path)
+        with open(os.path.join(path, "marker"), "w") as f:
+            f.write(text)
+    return save
+
+
+def _read_marker(path):
+    with open(os.path.join(path, "marker")) as f:
+        return f.read()
+
+
+def test_publish_makes_a_new_generation_current(generations):
+    assert generations.current() is None
+    with generations.lock():
+        generations.publish(_save_marker("one"), source_stamp=1)
+        state = generations.publish(_save_marker("two"), source_stamp=2)
+
+    current = generations.current()
+    assert current["generation"] == state["generation"] == "gen-000002"
+    assert current["source_stamp"] == 2
+    assert generations.load(_read_marker) == (current, "two")
+
+
+def test_old_generations_are_pruned(generations, monkeypatch):
+    monkeypatch.setattr(generations_module, "KEEP_GENERATIONS", 2)
+    with generations.lock():
+        for i in range(5):
+            generations.publish(_save_marker(str(i)), source_stamp=i)
+
+    assert sorted(n for n in os.listdir(generations.root) if n.startswith("gen-")) == ["gen-000004", "gen-000005"]
+
+
+def test_load_without_a_published_generation_returns_none(generations):
+    assert generations.load(_read_marker) == (None, None)
+
+
+def test_non_blocking_lock_reports_a_running_build(generations):
+    with generations.lock() as held:
+        assert held
+        # flock locks belong to the open file, so a second open in this process contends like another worker
+        with generations.lock(blocking=False) as second:
+            assert second is False
+    with generations.lock(blocking=False) as again:
+        assert again
+
+
+@pytest.fixture
+def memory_index(tmp_path, monkeypatch):
+    store = MemoryStore(db_path=str(tmp_path / "memory.db"), markdown_path=str(tmp_path / "MEMORY.md"))
+    embeddings = DeterministicFakeEmbedding(size=16)
+    monkeypatch.setattr(memory_retriever, "get_memory_store", lambda: store)
+    monkeypatch.setattr(memory_retriever, "MEMORY_FILE_PATH", store.markdown_path)
+    monkeypatch.setattr(memory_retriever, "SESSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(memory_retriever, "index_generations", IndexGenerations(str(tmp_path / "index")))
+    monkeypatch.setattr(memory_retriever, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(memory_retriever, "get_query_embeddings", lambda: embeddings)
+    monkeypatch.setattr(memory_retriever, "_loaded_index", {"generation": None, "vectorstore": None})
+    return store
+
+
+def test_load_builds_once_and_reuses_the_generation(memory_index):
+    memory_index.add("prefers window seats")
+
+    first = memory_retriever.load_memory_index()
+    generation = memory_retriever.index_generations.current()["generation"]
+    second = memory_retriever.load_memory_index()
+
+    assert first is not None and second is not None
+    assert memory_retriever.index_generations.current()["generation"] == generation
+    assert any("window seats" in d.page_content for d in second.docstore._dict.values())
+
+
+def test_a_new_memory_makes_the_index_stale(memory_index):
+    memory_index.add("first")
+    memory_retriever.load_memory_index()
+    stat = os.stat(memory_index.markdown_path)
+    memory_index.add("second")
+    os.utime(memory_index.markdown_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    vectorstore = memory_retriever.load_memory_index()
+
+    assert memory_retriever.index_generations.current()["generation"] == "gen-000002"
+    assert any("second" in d.page_content for d in vectorstore.docstore._dict.values())
+
+
+def test_unreadable_current_generation_falls_back_to_a_rebuild(memory_index, monkeypatch):
+    memory_index.add("survives")
+    memory_retriever.load_memory_index()
+    monkeypatch.setattr(memory_retriever, "_loaded_index", {"generation": None, "vectorstore": None})
+    # CURRENT is pruned between the freshness check and the load
+    monkeypatch.setattr(memory_retriever, "load_published_index", lambda: (None, None))
+
+    vectorstore = memory_retriever.load_memory_index()
+
+    assert vectorstore is not None
+    assert memory_retriever.index_generations.current()["generation"] == "gen-000002"
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+
+import pytest
+
+from backend.memory.memory_store import MemoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MemoryStore(db_path=str(tmp_path / "memory.db"), markdown_path=str(tmp_path / "MEMORY.md"))
+
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_add_appends_to_markdown_and_dedupes(store):
+    record, created = store.add("likes green tea")
+    again, created_again = store.add("Likes  green tea")
+
+    assert created and not created_again
+    assert again.id == record.id
+    with open(store.markdown_path, encoding="utf-8") as f:
+        assert f.read().count("likes green tea") == 1
+
+
+def test_unedited_markdown_is_not_reimported(store):
+    store.add("first fact")
+    store.render_markdown()
+
+    assert not store.sync_markdown()
+
+
+def test_hand_edits_to_markdown_are_imported(store):
+    store.add("keep this")
+    store.add("remove this")
+    store.render_markdown()
+
+    with open(store.markdown_path, encoding="utf-8") as f:
+        content = f.read()
+    content = "\n".join(line for line in content.splitlines() if "remove this" not in line)
+    content = content.replace("# 长期记忆 (MEMORY)", "# My memory")
+    content += "\n- **[2024-01-02 03:04:05]** added by hand\n"
+    with open(store.markdown_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    _bump_mtime(store.markdown_path)
+
+    assert [r.content for r in store.all()] == ["keep this", "added by hand"]
+    assert store.get_preamble().startswith("# My memory")
+    # The next render keeps the edit instead of overwriting it
+    rendered = store.render_markdown()
+    assert "added by hand" in rendered and "remove this" not in rendered
+
+
+def test_expired_duplicate_does_not_block_add(store):
+    record, _ = store.add("temporary fact", ttl_days=1)
+    with sqlite3.connect(store.db_path) as conn:
+        conn.execute("UPDATE memories SET expires_at = '2000-01-01 00:00:00' WHERE id = ?", (record.id,))
+
+    fresh, created = store.add("temporary fact")
+
+    assert created
+    assert fresh.expires_at is None
+    assert [r.content for r in store.all()] == ["temporary fact"]
+
+
+def test_multi_line_memory_survives_a_markdown_round_trip(store):
+    record, _ = store.add("prefers:\n- aisle seats\n- vegetarian meals")
+    store.add("second fact")
+    _bump_mtime(store.markdown_path)
+
+    assert store.sync_markdown()
+    assert [r.content for r in store.all()] == ["prefers: - aisle seats - vegetarian meals", "second fact"]
+    assert "aisle" not in store.get_preamble()
+
+
+def test_indented_lines_under_a_hand_written_bullet_continue_it(store):
+    store.add("first fact")
+    with open(store.markdown_path, "a", encoding="utf-8") as f:
+        f.write("\n- **[2024-01-02 03:04:05]** travel plans:\n  Lisbon in May\n\nclosing note\n")
+    _bump_mtime(store.markdown_path)
+
+    assert [r.content for r in store.all()] == ["first fact", "travel plans: Lisbon in May"]
+    assert store.get_preamble().rstrip().endswith("closing note")
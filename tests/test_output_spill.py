@@ -0,0 +1,109 @@
+import re
+
+import pytest
+
+from backend.memory.session_manager import current_session_id
+from backend.tools import output_spill
+from backend.tools.core_tools import read_output_tool
+from backend.tools.output_spill import governed, read_output, spill
+
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    monkeypatch.setattr(output_spill, "SCRATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(output_spill, "TOOL_OUTPUT_MAX_CHARS", 100)
+    monkeypatch.setattr(output_spill, "TOOL_OUTPUT_HEAD_CHARS", 40)
+    token = current_session_id.set("s1")
+    yield tmp_path
+    current_session_id.reset(token)
+
+
+def _long_output():
+    return "# Report\n" + "".join(f"line {i:03d} value={i * 7}\n" for i in range(50))
+
+
+@governed("report")
+def report_tool(text):
+    return text
+
+
+def _handle(result):
+    return re.search(r"`(out-[0-9a-f]{12})`", result).group(1)
+
+
+def test_short_results_are_returned_whole(scratch):
+    assert report_tool("short") == "short"
+    assert not any(scratch.iterdir())
+
+
+def test_long_results_are_spilled_with_a_head_and_a_handle(scratch):
+    text = _long_output()
+    result = report_tool(text)
+    handle = _handle(result)
+
+    assert result.startswith(text[:40] + "\n...[output truncated: ")
+    assert f"{len(text)} characters" in result and "sections: Report" in result
+    assert (scratch / "s1" / f"{handle}.txt").read_text() == text
+    # Spilling the same output again reuses the file
+    assert _handle(report_tool(text)) == handle
+    assert len(list((scratch / "s1").iterdir())) == 1
+
+
+def test_read_output_pages_through_the_spilled_text():
+    text = _long_output()
+    handle = spill(text)
+
+    page = read_output(handle, offset=40, length=30)
+    last = read_output(handle, offset=len(text) - 10, length=30)
+
+    assert page == text[40:70] + f"\n...[characters 40-70 of {len(text)}; next offset=70]"
+    assert last == text[-10:] + f"\n...[characters {len(text) - 10}-{len(text)} of {len(text)}; end of output]"
+
+
+def test_read_output_caps_the_page_length():
+    handle = spill(_long_output())
+
+    assert read_output(handle, length=10_000).startswith(_long_output()[:100] + "\n...[characters 0-100 ")
+
+
+def test_read_output_rejects_offsets_past_the_end():
+    text = _long_output()
+    handle = spill(text)
+
+    assert read_output(handle, offset=len(text)) == f"Error: offset {len(text)} is past the end of `{handle}` ({len(text)} characters)."
+
+
+def test_read_output_greps_lines_with_their_offsets():
+    text = _long_output()
+    handle = spill(text)
+    offset = text.index("line 007")
+
+    assert read_output(handle, grep="value=49$") == f"9 (offset {offset}): line 007 value=49"
+    assert read_output(handle, grep="[unclosed") == f"No lines matching `[unclosed` in `{handle}`."
+
+
+def test_read_output_reports_unknown_and_malformed_handles():
+    assert read_output("out-000000000000") == (
+        "Error: output `out-000000000000` no longer exists in this session; re-run the tool that produced it."
+    )
+    assert read_output_tool.invoke({"handle": "../../etc/passwd"}) == "Error: `../../etc/passwd` is not an output handle."
+
+
+def test_spilled_outputs_are_private_to_their_session():
+    handle = spill(_long_output())
+
+    token = current_session_id.set("s2")
+    try:
+        assert "no longer exists in this session" in read_output(handle)
+    finally:
+        current_session_id.reset(token)
+    assert read_output(handle).startswith("# Report\n")
+
+
+def test_scratch_store_drops_the_oldest_outputs(scratch, monkeypatch):
+    monkeypatch.setattr(output_spill, "TOOL_SCRATCH_MAX_BYTES", 1500)
+    first = spill(_long_output())
+    second = spill(_long_output() + "more\n")
+
+    assert not (scratch / "s1" / f"{first}.txt").exists()
+    assert (scratch / "s1" / f"{second}.txt").exists()
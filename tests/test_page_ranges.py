@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import page_ranges
+from page_ranges import parse_page_ranges
+
+
+def test_empty_spec_selects_every_page():
+    assert parse_page_ranges(None, 3) == [1, 2, 3]
+    assert parse_page_ranges("", 3) == [1, 2, 3]
+
+
+def test_ranges_are_merged_sorted_and_deduplicated():
+    assert parse_page_ranges("7, 1-3,2,9-", 10) == [1, 2, 3, 7, 9, 10]
+    assert parse_page_ranges("-2", 10) == [1, 2]
+
+
+@pytest.mark.parametrize("spec", ["0", "11", "3-1", "5-12"])
+def test_out_of_range_pages_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_page_ranges(spec, 10)
+
+
+def test_structure_script_imports_without_rendering_dependencies():
+    # extract_form_structure must not pull in pdf2image or the Unix-only resource module
+    code = "import sys; sys.modules['pdf2image'] = None; sys.modules['resource'] = None; import extract_form_structure"
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(page_ranges.__file__), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
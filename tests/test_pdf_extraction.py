@@ -0,0 +1,51 @@
+import pytest
+from pypdf import PdfWriter
+
+from backend.tools.pdf_extraction import CACHE_ENTRY_OVERHEAD_BYTES, PdfExtractionCache, parse_pages
+
+
+def _write_pdf(path, num_pages):
+    writer = PdfWriter()
+    for _ in range(num_pages):
+        writer.add_blank_page(200, 200)
+    writer.write(path)
+    return str(path)
+
+
+def test_parse_pages_defaults_to_the_first_pages():
+    assert parse_pages(None, 12) == [1, 2, 3, 4, 5]
+    assert parse_pages(None, 2) == [1, 2]
+
+
+def test_parse_pages_rejects_pages_past_the_end():
+    assert parse_pages("2-3", 4) == [2, 3]
+    with pytest.raises(ValueError):
+        parse_pages("3-9", 4)
+
+
+def test_cache_budget_counts_encoded_bytes():
+    cache = PdfExtractionCache(max_bytes=CACHE_ENTRY_OVERHEAD_BYTES + 10)
+    cache._put(("a", 1, "text"), "ééé")  # 3 characters, 6 bytes
+    cache._put(("a", 2, "text"), "ééé")
+
+    assert cache.stats()["bytes"] == CACHE_ENTRY_OVERHEAD_BYTES + 6
+    assert cache._get(("a", 1, "text")) is None
+
+
+def test_hash_memo_is_bounded(tmp_path):
+    cache = PdfExtractionCache(max_hashed_files=2)
+    paths = [_write_pdf(tmp_path / f"{i}.pdf", 1) for i in range(4)]
+    for path in paths:
+        cache.content_hash(path)
+
+    assert cache.stats()["hashed_files"] == 2
+
+
+def test_page_counts_are_evicted_with_the_pages(tmp_path):
+    cache = PdfExtractionCache(max_bytes=1)
+    first = _write_pdf(tmp_path / "first.pdf", 3)
+    second = _write_pdf(tmp_path / "second.pdf", 2)
+
+    assert cache.get_pages(first, "1-3")[0] == 3
+    assert cache.get_pages(second)[0] == 2
+    assert cache.stats()["entries"] == 1
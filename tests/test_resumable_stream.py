@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.graph import resumable_stream
+from backend.graph.resumable_stream import get_turn, parse_event_id, start_turn
+
+
+async def _events(*raw_events, hold=None):
+    for raw_event in raw_events:
+        yield raw_event
+    if hold:
+        await hold.wait()
+
+
+async def _finished_turn(*raw_events, session_id="s1"):
+    run = start_turn(_events(*raw_events), session_id)
+    await run.task
+    return run
+
+
+async def _read(run, after_seq=0):
+    return "".join([frame async for frame in run.subscribe(after_seq)])
+
+
+@pytest.fixture(autouse=True)
+def no_coalescing(monkeypatch):
+    monkeypatch.setattr(resumable_stream, "SSE_COALESCE", False)
+
+
+def test_events_carry_turn_scoped_ids():
+    async def scenario():
+        run = await _finished_turn("data: [THOUGHT] a\n\n", "data: [THOUGHT] b\n\n")
+        return run, await _read(run)
+
+    run, body = asyncio.run(scenario())
+    assert body == f"id: {run.turn_id}:1\ndata: [THOUGHT] a\n\nid: {run.turn_id}:2\ndata: [THOUGHT] b\n\n"
+    assert parse_event_id(f"{run.turn_id}:2") == (run.turn_id, 2)
+    assert parse_event_id("not-an-id") is None
+
+
+def test_resume_replays_only_missed_events():
+    async def scenario():
+        run = await _finished_turn(*(f"data: [THOUGHT] step {i}\n\n" for i in range(1, 6)))
+        return await _read(run, after_seq=3)
+
+    body = asyncio.run(scenario())
+    assert "step 3" not in body
+    assert "step 4" in body and "step 5" in body
+
+
+def test_resume_past_the_buffer_reports_a_gap(monkeypatch):
+    monkeypatch.setattr(resumable_stream, "STREAM_BUFFER_EVENTS", 2)
+
+    async def scenario():
+        run = await _finished_turn(*(f"data: [THOUGHT] step {i}\n\n" for i in range(1, 6)))
+        return await _read(run, after_seq=1)
+
+    body = asyncio.run(scenario())
+    assert body.startswith("event: gap\ndata: 2 events are no longer buffered\n\n")
+    assert "step 4" in body and "step 5" in body
+
+
+def test_turn_is_cancelled_once_no_client_is_attached(monkeypatch):
+    monkeypatch.setattr(resumable_stream, "STREAM_DETACH_GRACE_SECONDS", 0.05)
+
+    async def scenario():
+        hold = asyncio.Event()
+        run = start_turn(_events("data: [THOUGHT] working\n\n", hold=hold), "s1")
+        stream = run.subscribe()
+        await anext(stream)
+        await stream.aclose()
+        await asyncio.wait_for(run.task, 1)
+        return run
+
+    run = asyncio.run(scenario())
+    assert run.done
+
+
+def test_finished_turn_stays_resumable_after_the_detach_grace(monkeypatch):
+    monkeypatch.setattr(resumable_stream, "STREAM_DETACH_GRACE_SECONDS", 0)
+    monkeypatch.setattr(resumable_stream, "STREAM_RESUME_SECONDS", 60)
+
+    async def scenario():
+        run = await _finished_turn("data: [THOUGHT] done\n\n")
+        await _read(run)
+        await asyncio.sleep(0.05)
+        return run, get_turn(run.turn_id, "s1")
+
+    run, found = asyncio.run(scenario())
+    assert found is run
+
+
+def test_turns_are_only_found_for_their_own_session():
+    async def scenario():
+        return await _finished_turn("data: [THOUGHT] a\n\n", session_id="owner")
+
+    run = asyncio.run(scenario())
+    assert get_turn(run.turn_id, "owner") is run
+    assert get_turn(run.turn_id, "someone-else") is None
+
+
+def test_resume_endpoint_checks_the_session():
+    from backend.app import app
+
+    async def scenario():
+        run = await _finished_turn("data: [THOUGHT] private\n\n", session_id="owner")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            other = await client.get(f"/api/chat/stream/{run.turn_id}", params={"session_id": "intruder"})
+            missing = await client.get(f"/api/chat/stream/{run.turn_id}")
+            owner = await client.get(f"/api/chat/stream/{run.turn_id}", params={"session_id": "owner"})
+        return other, missing, owner
+
+    other, missing, owner = asyncio.run(scenario())
+    assert "private" not in other.text and "expired" in other.text
+    assert missing.status_code == 422
+    assert "private" in owner.text
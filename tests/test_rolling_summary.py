@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from backend.memory import rolling_summary
+from backend.memory.rolling_summary import SUMMARY_PREFIX, RollingSummary, split_turns
+
+
+@pytest.fixture(autouse=True)
+def summaries_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(rolling_summary, "SUMMARIES_DIR", str(tmp_path))
+    monkeypatch.setattr(rolling_summary, "SUMMARY_BLOCK_TURNS", 4)
+    monkeypatch.setattr(rolling_summary, "SUMMARY_MERGE_FANOUT", 4)
+    return tmp_path
+
+
+def _turns(start, count):
+    return [[HumanMessage(content=f"question {i}"), AIMessage(content=f"answer {i}")] for i in range(start, start + count)]
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        return f"summary {len(self.prompts)}"
+
+
+def test_split_turns_keeps_tool_steps_with_their_question():
+    call = AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": "c1"}])
+    messages = [HumanMessage(content="a"), call, ToolMessage(content="r", tool_call_id="c1"), AIMessage(content="b"),
+                HumanMessage(content="c")]
+
+    assert [len(turn) for turn in split_turns(messages)] == [4, 1]
+
+
+def test_full_blocks_merge_into_one_node_a_level_up():
+    summarize = FakeSummarizer()
+    summary = RollingSummary("s1", summarize)
+
+    text = summary.compress(_turns(0, 16))
+
+    # Four block summaries, then one merge of them
+    assert summary.llm_calls == 5
+    assert [node["level"] for node in summary.nodes] == [1]
+    assert text == "summary 5"
+
+
+def test_later_compressions_only_summarize_the_new_turns():
+    summarize = FakeSummarizer()
+    RollingSummary("s1", summarize).compress(_turns(0, 16))
+
+    summary = RollingSummary("s1", summarize)
+    summary.adopt(SUMMARY_PREFIX + "summary 5")
+    text = summary.compress(_turns(16, 4))
+
+    assert summary.llm_calls == 1
+    assert [node["level"] for node in summary.nodes] == [1, 0]
+    assert text == "summary 5\n\nsummary 6"
+
+
+def test_a_block_compressed_again_reuses_its_summary(summaries_dir):
+    summarize = FakeSummarizer()
+    RollingSummary("s1", summarize).compress(_turns(0, 4))
+
+    # e.g. the save that followed the first compression failed, so the same turns come back
+    summary = RollingSummary("s1", summarize)
+    summary.adopt(None)
+    summary.compress(_turns(0, 4))
+
+    assert summary.llm_calls == 0
+    assert len(summarize.prompts) == 1
+    with open(summaries_dir / "s1.json", encoding="utf-8") as f:
+        assert json.load(f)["nodes"] == summary.nodes
+
+
+def test_a_summary_not_rendered_by_the_tree_becomes_its_oldest_node():
+    summarize = FakeSummarizer()
+    summary = RollingSummary("s1", summarize)
+    summary.compress(_turns(0, 4))
+
+    summary.adopt(SUMMARY_PREFIX + "written by an older version")
+    text = summary.compress(_turns(4, 4))
+
+    assert text == "written by an older version\n\nsummary 2"
@@ -0,0 +1,74 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from backend.graph import model_router
+from backend.memory import rolling_summary, session_manager
+from backend.memory.rolling_summary import SUMMARY_PREFIX
+from backend.memory.session_manager import SessionManager
+
+
+class FakeSummaryModel:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def invoke(self, prompt):
+        if self.fail:
+            raise RuntimeError("summarizer down")
+        return AIMessage(content="short summary")
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_manager, "SESSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(rolling_summary, "SUMMARIES_DIR", str(tmp_path / "summaries"))
+    monkeypatch.setattr(model_router, "get_model", lambda route: FakeSummaryModel())
+    return SessionManager("s1")
+
+
+def _tool_step(i):
+    call = AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": f"call-{i}"}])
+    return [call, ToolMessage(content=f"result {i}", tool_call_id=f"call-{i}")]
+
+
+def _assert_tool_results_follow_their_calls(messages):
+    for i, m in enumerate(messages):
+        if isinstance(m, ToolMessage):
+            previous = messages[i - 1]
+            assert isinstance(previous, (AIMessage, ToolMessage)) and i > 0
+            if isinstance(previous, AIMessage):
+                assert m.tool_call_id in {call["id"] for call in previous.tool_calls}
+
+
+def test_compression_summarizes_whole_old_turns(manager):
+    messages = [SystemMessage(content="rules")]
+    for i in range(30):
+        messages += [HumanMessage(content=f"q{i}"), AIMessage(content=f"a{i}")]
+
+    compressed = manager._compress_history(messages, max_messages=40)
+
+    assert compressed[0].content == "rules"
+    assert compressed[1].content.startswith(SUMMARY_PREFIX + "short summary")
+    assert isinstance(compressed[2], HumanMessage)
+    assert len(compressed) - 2 <= 20
+
+
+def test_one_oversized_turn_is_cut_between_tool_steps(manager):
+    # 1 question + 24 call/result pairs: the midpoint falls between a call and its result
+    messages = [HumanMessage(content="do everything")] + [m for i in range(24) for m in _tool_step(i)]
+
+    compressed = manager._compress_history(messages, max_messages=40)
+
+    kept = compressed[1:]
+    assert isinstance(kept[0], AIMessage) and kept[0].tool_calls
+    _assert_tool_results_follow_their_calls(kept)
+
+
+def test_truncation_fallback_does_not_start_with_a_tool_result(manager, monkeypatch):
+    monkeypatch.setattr(model_router, "get_model", lambda route: FakeSummaryModel(fail=True))
+    messages = [HumanMessage(content="do everything")] + [m for i in range(24) for m in _tool_step(i)]
+
+    # The last 41 messages would start with a tool result
+    compressed = manager._compress_history(messages, max_messages=41)
+
+    assert not isinstance(compressed[0], ToolMessage)
+    _assert_tool_results_follow_their_calls(compressed)
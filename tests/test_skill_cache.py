@@ -0,0 +1,96 @@
+import pytest
+
+from backend.skills import skills_manager
+from backend.skills.skill_cache import SkillDocumentCache
+from backend.skills.skills_manager import SkillsManager
+from backend.tools.core_tools import load_skill_tool
+
+SKILL_MD = """---
+name: forms
+description: Fill PDF forms.
+---
+# Forms
+Start here.
+## Fillable fields
+Use fill_fillable_fields.py.
+```bash
+# not a section
+```
+## Annotations
+Use fill_pdf_form_with_annotations.py.
+"""
+
+
+@pytest.fixture
+def skill_file(tmp_path, monkeypatch):
+    (tmp_path / "forms").mkdir()
+    path = tmp_path / "forms" / "SKILL.md"
+    path.write_text(SKILL_MD)
+    (tmp_path / "forms" / "reference.md").write_text("# Reference\nField types.\n")
+    monkeypatch.setattr(skills_manager, "SKILLS_DIR", str(tmp_path))
+    monkeypatch.setattr(skills_manager, "SNAPSHOT_FILE", str(tmp_path / "SKILLS_SNAPSHOT.md"))
+    monkeypatch.setattr(SkillsManager, "_index", None)
+    return path
+
+
+def test_unchanged_file_is_served_from_the_cache(skill_file, monkeypatch):
+    cache = SkillDocumentCache()
+    first = cache.get(str(skill_file))
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("cached document was read again")
+
+    monkeypatch.setattr("builtins.open", no_reads)
+
+    assert cache.get(str(skill_file)) is first
+    assert first.headings() == ["# Forms", "## Fillable fields", "## Annotations"]
+
+
+def test_edited_file_is_parsed_again(skill_file):
+    cache = SkillDocumentCache()
+    before = cache.get(str(skill_file))
+
+    skill_file.write_text(SKILL_MD + "## Troubleshooting\nCheck the field ids.\n")
+    after = cache.get(str(skill_file))
+
+    assert after is not before
+    assert after.section("troubleshooting") == "## Troubleshooting\nCheck the field ids.\n"
+
+
+def test_invalidate_drops_cached_documents(skill_file):
+    cache = SkillDocumentCache()
+    first = cache.get(str(skill_file))
+    cache.invalidate(str(skill_file))
+
+    assert cache.get(str(skill_file)) is not first
+
+
+def test_load_skill_returns_the_requested_section(skill_file):
+    content = load_skill_tool.invoke({"skill_name": "forms", "section": "fillable fields"})
+
+    assert content.startswith("## Fillable fields\n")
+    assert "# not a section" in content
+    assert "Annotations" not in content
+
+
+def test_load_skill_reads_other_files_in_the_skill(skill_file):
+    assert load_skill_tool.invoke({"skill_name": "forms", "file": "REFERENCE.md"}) == "# Reference\nField types.\n"
+
+
+def test_load_skill_lists_sections_when_one_is_missing(skill_file):
+    message = load_skill_tool.invoke({"skill_name": "forms", "section": "signatures"})
+
+    assert message.startswith("Section 'signatures' not found in SKILL.md.")
+    assert "## Annotations" in message
+
+
+def test_load_skill_reports_unknown_skills(skill_file):
+    message = load_skill_tool.invoke({"skill_name": "spreadsheets"})
+
+    assert message == "Skill file 'SKILL.md' for skill 'spreadsheets' not found."
+
+
+def test_load_skill_stays_inside_the_skill_folder(skill_file):
+    message = load_skill_tool.invoke({"skill_name": "forms", "file": "../SKILLS_SNAPSHOT.md"})
+
+    assert message == "Skill file '../SKILLS_SNAPSHOT.md' for skill 'forms' not found."
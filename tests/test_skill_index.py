@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from backend import app as app_module
+from backend.memory import memory_retriever
+from backend.skills import skill_index, skills_manager
+from backend.skills.skill_index import SkillIndex, skill_document
+from backend.skills.skills_manager import SkillsManager
+
+SKILLS = {
+    "pdf": ("Fill PDF forms and extract text from PDF documents.", "# PDF\n## Filling forms\n"),
+    "xlsx": ("Work with tabular workbooks and formulas.", "# Workbooks\n"),
+    "docx": ("Edit Word documents with tracked changes.", "# Documents\n"),
+    "pptx": ("Build slide decks and presentations.", "# Slides\n"),
+}
+
+
+class KeywordEmbeddings:
+    """Embeds text onto a 'spreadsheet' axis, so 'excel' matches 'tabular' with no shared words."""
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    @staticmethod
+    def _embed(text):
+        text = text.lower()
+        return [1.0, 0.0] if "excel" in text or "tabular" in text else [0.0, 1.0]
+
+
+class UnavailableEmbeddings:
+    def embed_query(self, text):
+        raise ConnectionError("embedding server down")
+
+    embed_documents = embed_query
+
+
+def _skills():
+    return [
+        {"name": name, "description": description, "content": content}
+        for name, (description, content) in SKILLS.items()
+    ]
+
+
+def _names(skills):
+    return [s["name"] for s in skills]
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    def use(fake):
+        monkeypatch.setattr(memory_retriever, "get_query_embeddings", lambda: fake)
+    return use
+
+
+def test_document_headings_skip_code_fences():
+    content = "# Usage\n```bash\n# not a heading\n```\n## Options ##\n"
+    document = skill_document({"name": "cli", "description": "Runs commands.", "content": content})
+
+    assert document.splitlines() == ["cli", "Runs commands.", "Usage", "Options"]
+
+
+def test_bm25_selects_lexical_matches(monkeypatch):
+    monkeypatch.setattr(skill_index, "EMBEDDING_WEIGHT", 0.0)
+    selected, stats = SkillIndex(_skills()).select("fill a pdf form", top_k=1, pinned=[])
+
+    assert _names(selected) == ["pdf"]
+    assert stats["total_skills"] == 4 and stats["selected_skills"] == 1
+
+
+def test_embeddings_find_skills_with_no_shared_words(embeddings, monkeypatch):
+    monkeypatch.setattr(skill_index, "EMBEDDING_WEIGHT", 0.0)
+    bm25_only, _ = SkillIndex(_skills()).select("open this excel file", top_k=1, pinned=[])
+
+    monkeypatch.setattr(skill_index, "EMBEDDING_WEIGHT", 0.5)
+    embeddings(KeywordEmbeddings())
+    hybrid, _ = SkillIndex(_skills()).select("open this excel file", top_k=1, pinned=[])
+
+    assert bm25_only == []
+    assert _names(hybrid) == ["xlsx"]
+
+
+def test_falls_back_to_bm25_without_embeddings(embeddings, monkeypatch):
+    monkeypatch.setattr(skill_index, "EMBEDDING_WEIGHT", 0.5)
+    embeddings(UnavailableEmbeddings())
+    selected, _ = SkillIndex(_skills()).select("edit word documents", top_k=1, pinned=[])
+
+    assert _names(selected) == ["docx"]
+
+
+def test_pinned_skills_are_always_selected(monkeypatch):
+    monkeypatch.setattr(skill_index, "EMBEDDING_WEIGHT", 0.0)
+    skills = _skills()
+    skills[3]["pinned"] = "true"
+    selected, _ = SkillIndex(skills).select("fill a pdf form", top_k=1, pinned=["docx"])
+
+    assert _names(selected) == ["pdf", "docx", "pptx"]
+
+
+def test_small_skill_sets_and_empty_queries_list_everything(monkeypatch):
+    monkeypatch.setattr(skill_index, "EMBEDDING_WEIGHT", 0.0)
+
+    assert len(SkillIndex(_skills()).select("fill a pdf form", top_k=4, pinned=[])[0]) == 4
+    assert len(SkillIndex(_skills()).select("  ", top_k=1, pinned=[])[0]) == 4
+
+
+@pytest.fixture
+def skills_dir(tmp_path, monkeypatch):
+    for name, (description, content) in SKILLS.items():
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "SKILL.md").write_text(f"---\nname: {name}\ndescription: {description}\n---\n{content}")
+    monkeypatch.setattr(skills_manager, "SKILLS_DIR", str(tmp_path))
+    monkeypatch.setattr(skills_manager, "SNAPSHOT_FILE", str(tmp_path / "SKILLS_SNAPSHOT.md"))
+    monkeypatch.setattr(skill_index, "EMBEDDING_WEIGHT", 0.0)
+    monkeypatch.setattr(SkillsManager, "_index", None)
+    monkeypatch.setattr(SkillsManager, "_selection_totals", {"selections": 0, "selection_ms": 0.0, "saved_tokens": 0})
+    monkeypatch.setattr(SkillsManager, "last_selection_stats", {})
+    return tmp_path
+
+
+def test_select_snapshot_lists_only_the_selected_skills(skills_dir):
+    snapshot = SkillsManager.select_snapshot("fill a pdf form", top_k=1)
+
+    assert "<name>pdf</name>" in snapshot
+    assert "<name>xlsx</name>" not in snapshot
+    assert "Only the 1 of your 4 skills" in snapshot
+    # The full snapshot on disk still lists every skill
+    assert (skills_dir / "SKILLS_SNAPSHOT.md").read_text().count("<skill>") == 4
+
+    stats = SkillsManager.last_selection_stats
+    assert stats["selected_skills"] == 1
+    assert 0 < stats["snapshot_tokens"] < stats["full_snapshot_tokens"]
+    assert stats["saved_tokens"] == stats["full_snapshot_tokens"] - stats["snapshot_tokens"]
+
+
+def test_selection_stats_are_reported_in_metrics(skills_dir):
+    SkillsManager.select_snapshot("fill a pdf form", top_k=1)
+    SkillsManager.select_snapshot("build slide decks", top_k=1)
+
+    metrics = asyncio.run(app_module.get_metrics())["skill_selection"]
+
+    assert metrics["selections"] == 2
+    assert metrics["avg_saved_tokens"] > 0
+    assert metrics["last"]["selected_skills"] == 1
@@ -0,0 +1,93 @@
+import asyncio
+import re
+
+import pytest
+
+from backend.graph import resumable_stream
+from backend.graph.resumable_stream import coalesce_window, start_turn, token_text
+
+
+def parse_sse(body):
+    """Dispatches events as the WHATWG EventSource parser does: (id, data) per blank-line-terminated event."""
+    events = []
+    data_lines, last_id = [], None
+    for line in re.split(r"\r\n|\r|\n", body):
+        if not line:
+            if data_lines:
+                events.append((last_id, "\n".join(data_lines)))
+            data_lines = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "data":
+            data_lines.append(value)
+        elif field == "id":
+            last_id = value
+    return events
+
+
+async def _tokens(tokens):
+    for token in tokens:
+        yield f"data: {token}\n\n"
+
+
+def _stream(tokens, after_seq=0):
+    async def scenario():
+        run = start_turn(_tokens(tokens), "s1")
+        await run.task
+        return run, "".join([frame async for frame in run.subscribe(after_seq)])
+
+    return asyncio.run(scenario())
+
+
+def test_merged_tokens_keep_their_newlines():
+    tokens = ["Here is a list:\n", "- one\n", "- two", "\n\ndone"]
+    run, body = _stream(tokens)
+
+    events = parse_sse(body)
+    assert len(events) == 1
+    assert events[0] == (f"{run.turn_id}:{len(tokens)}", "".join(tokens))
+
+
+def test_merged_frame_id_resumes_after_the_merged_tokens():
+    run, body = _stream(["a", "b", "c"], after_seq=1)
+
+    assert parse_sse(body) == [(f"{run.turn_id}:3", "bc")]
+
+
+def test_thoughts_are_not_merged_with_tokens():
+    async def scenario():
+        async def events():
+            yield "data: Hel\n\n"
+            yield "data: [THOUGHT] Calling tool: search...\n\n"
+            yield "data: lo\n\n"
+
+        run = start_turn(events(), "s1")
+        await run.task
+        return "".join([frame async for frame in run.subscribe()])
+
+    events = parse_sse(asyncio.run(scenario()))
+    assert [data for _, data in events] == ["Hel", "[THOUGHT] Calling tool: search...", "lo"]
+
+
+def test_token_text_only_accepts_plain_answer_tokens():
+    assert token_text("data: hi\n\n") == "hi"
+    assert token_text("data: [THOUGHT] x\n\n") is None
+    assert token_text("data: Error: boom\n\n") is None
+    assert token_text("event: gap\ndata: 1\n\n") is None
+
+
+def test_coalesce_window_grows_with_attached_streams(monkeypatch):
+    monkeypatch.setattr(resumable_stream, "SSE_COALESCE", True)
+    monkeypatch.setattr(resumable_stream, "SSE_COALESCE_IDLE_STREAMS", 10)
+    monkeypatch.setattr(resumable_stream, "SSE_COALESCE_BUSY_STREAMS", 110)
+    monkeypatch.setattr(resumable_stream, "SSE_COALESCE_MAX_WINDOW_MS", 50)
+
+    windows = []
+    for streams in (5, 10, 60, 110, 500):
+        monkeypatch.setattr(resumable_stream, "_active_subscribers", streams)
+        windows.append(coalesce_window())
+
+    assert windows == [0.0, 0.0, pytest.approx(0.025), pytest.approx(0.05), pytest.approx(0.05)]
@@ -0,0 +1,153 @@
+import sys
+import types
+import threading
+from collections import OrderedDict
+
+import pytest
+
+from backend.memory.session_manager import current_session_id
+from backend.tools import tool_cache
+from backend.tools.tool_cache import SessionToolCache, call_cached, file_token, invalidate, memoize_tool, tool_cache_stats
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(tool_cache, "_session_caches", OrderedDict())
+    monkeypatch.setattr(tool_cache, "_hits", {})
+    monkeypatch.setattr(tool_cache, "_misses", {})
+    token = current_session_id.set("s1")
+    yield
+    current_session_id.reset(token)
+
+
+class Counter:
+    def __init__(self, result="result"):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def test_repeated_call_with_the_same_token_is_served_from_the_cache():
+    compute = Counter()
+
+    assert call_cached("read_file", {"path": "a"}, (1, 10), compute) == "result"
+    assert call_cached("read_file", {"path": "a"}, (1, 10), compute) == "result"
+
+    assert compute.calls == 1
+    stats = tool_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == ({"read_file": 1}, {"read_file": 1}, 1)
+
+
+def test_a_changed_token_misses_and_replaces_the_entry():
+    compute = Counter()
+    call_cached("read_file", {"path": "a"}, (1, 10), compute)
+    call_cached("read_file", {"path": "a"}, (2, 12), compute)
+
+    assert compute.calls == 2
+    assert tool_cache_stats()["entries"] == 1
+
+
+def test_file_token_follows_edits(tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text("one")
+    before = file_token(str(path))
+    path.write_text("one two")
+
+    assert file_token(str(path)) != before
+    assert file_token(str(tmp_path / "missing")) is None
+
+
+def test_error_results_are_not_cached():
+    compute = Counter("Error: timed out")
+    call_cached("fetch_url", {"url": "u"}, (), compute)
+    call_cached("fetch_url", {"url": "u"}, (), compute)
+
+    assert compute.calls == 2
+
+
+def test_results_without_a_token_expire_after_their_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(tool_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    compute = Counter()
+    call_cached("fetch_url", {"url": "u"}, (), compute, ttl=60)
+    now[0] += 59
+    call_cached("fetch_url", {"url": "u"}, (), compute, ttl=60)
+    now[0] += 2
+    call_cached("fetch_url", {"url": "u"}, (), compute, ttl=60)
+
+    assert compute.calls == 2
+
+
+def test_sessions_do_not_share_results():
+    compute = Counter()
+    call_cached("read_file", {"path": "a"}, (1, 10), compute)
+    token = current_session_id.set("s2")
+    try:
+        call_cached("read_file", {"path": "a"}, (1, 10), compute)
+    finally:
+        current_session_id.reset(token)
+
+    assert compute.calls == 2
+    assert tool_cache_stats()["sessions"] == 2
+
+
+def test_hit_and_miss_counts_add_up_under_concurrent_calls():
+    interval = sys.getswitchinterval()
+    # Switch threads as often as possible so unguarded read-modify-writes would interleave
+    sys.setswitchinterval(1e-6)
+    try:
+        def worker():
+            for i in range(500):
+                call_cached("read_file", {"path": str(i % 5)}, (1, 10), Counter())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    stats = tool_cache_stats()
+    assert stats["hits"]["read_file"] + stats["misses"]["read_file"] == 8 * 500
+
+
+def test_least_recently_used_entries_are_evicted_by_count_and_bytes():
+    cache = SessionToolCache(max_entries=2, max_bytes=10)
+    cache.put(("t", "a"), 1, "aaaa")
+    cache.put(("t", "b"), 1, "bbbb")
+    assert cache.get(("t", "a"), 1) == "aaaa"
+    cache.put(("t", "c"), 1, "cc")
+
+    assert cache.get(("t", "b"), 1) is None
+    cache.put(("t", "d"), 1, "dddddddd")
+    assert [cache.get(("t", k), 1) for k in "acd"] == [None, "cc", "dddddddd"]
+    # A result larger than the whole budget isn't cached at all
+    cache.put(("t", "e"), 1, "e" * 11)
+    assert cache.get(("t", "e"), 1) is None and cache.get(("t", "d"), 1) == "dddddddd"
+
+
+def test_invalidate_drops_only_matching_entries():
+    call_cached("read_file", {"path": "a"}, 1, Counter())
+    call_cached("read_file", {"path": "b"}, 1, Counter())
+    call_cached("search", {"path": "a"}, 1, Counter())
+
+    assert invalidate("read_file", lambda args: args["path"] == "a") == 1
+    assert tool_cache_stats()["entries"] == 2
+
+
+def test_memoize_tool_skips_the_cache_when_validity_is_none():
+    calls = []
+
+    @memoize_tool("lookup", validity=lambda key: None if key == "volatile" else 1)
+    def lookup(key):
+        calls.append(key)
+        return f"value of {key}"
+
+    for key in ("stable", "stable", "volatile", "volatile"):
+        assert lookup(key) == f"value of {key}"
+
+    assert calls == ["stable", "volatile", "volatile"]
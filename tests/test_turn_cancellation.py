@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+from backend.graph import agent, resumable_stream
+from backend.graph.agent import _consistent_messages
+from backend.graph.resumable_stream import start_turn
+from backend.memory import session_manager
+from backend.memory.session_manager import current_session_id
+from backend.tools import process_registry
+from backend.tools.process_registry import kill_session_processes, run_python, run_shell_command
+from tests.test_agent_stream import ScriptedAgentModel
+
+
+def _call(*ids):
+    return AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": i} for i in ids])
+
+
+def _result(call_id):
+    return ToolMessage(content="found", tool_call_id=call_id)
+
+
+def test_a_tool_step_missing_results_is_dropped():
+    messages = [_call("a"), _result("a"), _call("b", "c"), _result("b")]
+
+    assert _consistent_messages(messages, "") == messages[:2]
+
+
+def test_answered_tool_steps_and_the_interrupted_answer_are_kept():
+    messages = [_call("a"), _result("a")]
+
+    kept = _consistent_messages(messages, "The answer is")
+
+    assert kept[:2] == messages
+    assert kept[2].content == "The answer is\n\n[response interrupted]"
+
+
+def _run_in_session(session_id, func, *args):
+    """Runs func on a thread with the session set, as tool calls of a turn run; returns a holder for its result."""
+    result = []
+
+    def target():
+        current_session_id.set(session_id)
+        result.append(func(*args))
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, result
+
+
+def _wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_killing_a_session_stops_its_shell_commands_only():
+    thread, result = _run_in_session("victim", run_shell_command, "sleep 30")
+    other, other_result = _run_in_session("bystander", run_shell_command, "sleep 0.5; echo finished")
+    _wait_for(lambda: process_registry._shell_processes.get("victim"))
+
+    assert kill_session_processes("victim") == 1
+    thread.join(5)
+    other.join(5)
+
+    assert result == ["Command was cancelled."]
+    assert other_result == ["finished\n"]
+
+
+def test_killing_a_session_stops_its_busy_python_worker():
+    thread, result = _run_in_session("victim", run_python, "import time\ntime.sleep(30)")
+    _wait_for(lambda: "victim" in process_registry._python_workers and process_registry._python_workers["victim"]._run_lock.locked())
+    worker = process_registry._python_workers["victim"]
+
+    assert kill_session_processes("victim") == 1
+    thread.join(5)
+
+    assert result == ["Execution was cancelled."]
+    worker.process.join(5)
+    assert worker.process.exitcode == -9
+    assert "victim" not in process_registry._python_workers
+
+
+@tool("slow_command")
+def slow_command_tool(command: str) -> str:
+    """Runs a shell command."""
+    return run_shell_command(command)
+
+
+def test_disconnected_client_cancels_the_turn_and_saves_consistent_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_manager, "SESSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(resumable_stream, "STREAM_DETACH_GRACE_SECONDS", 0)
+    model = ScriptedAgentModel(replies=[{"name": "slow_command", "args": '{"command": "sleep 30"}', "id": "call-1"}])
+    monkeypatch.setattr(agent, "get_mini_openclaw_agent", lambda query: create_agent(model=model, tools=[slow_command_tool]))
+
+    async def scenario():
+        run = start_turn(agent.stream_chat_response("run it", "s1"), "s1")
+        stream = run.subscribe()
+        async for frame in stream:
+            if "Calling tool: slow_command" in frame:
+                break
+        await asyncio.to_thread(_wait_for, lambda: process_registry._shell_processes.get("s1"))
+        started = time.monotonic()
+        # The client goes away mid-tool
+        await stream.aclose()
+        await asyncio.wait_for(run.task, 5)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(scenario())
+
+    assert elapsed < 5
+    assert not process_registry._shell_processes.get("s1")
+    history = session_manager.SessionManager("s1").load_history()
+    # The tool call never got its result, so only the question is kept
+    assert len(history) == 1 and isinstance(history[0], HumanMessage)
@@ -0,0 +1,88 @@
+import asyncio
+import copy
+import threading
+
+import httpx
+import pytest
+
+from backend import app as app_module
+from backend import warmup
+from backend.app import app
+from backend.warmup import run_warmup, warmup_state
+
+
+@pytest.fixture(autouse=True)
+def restore_state():
+    saved = copy.deepcopy(warmup_state)
+    yield
+    warmup_state.clear()
+    warmup_state.update(saved)
+
+
+@pytest.fixture
+def steps(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def imports():
+        calls.append("imports")
+
+    def slow_model():
+        calls.append("slow_model")
+        release.wait(5)
+
+    def broken_index():
+        calls.append("broken_index")
+        raise ConnectionError("embedding server down")
+
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", [("imports", imports), ("slow_model", slow_model), ("broken_index", broken_index)])
+    return release, calls
+
+
+async def _wait_until(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_failed_steps_are_recorded_without_blocking_readiness(steps):
+    release, calls = steps
+    release.set()
+    reported = []
+
+    state = asyncio.run(run_warmup(report=lambda name, result: reported.append(name)))
+
+    assert state["ready"] and state["finished_at"] >= state["started_at"]
+    assert calls[0] == "imports" and reported[0] == "imports"
+    assert sorted(reported) == ["broken_index", "imports", "slow_model"]
+    assert state["steps"]["broken_index"]["ok"] is False
+    assert state["steps"]["broken_index"]["error"] == "embedding server down"
+    assert state["steps"]["slow_model"]["ok"] is True
+
+
+def test_ready_endpoint_reports_503_until_warmup_finishes(steps, monkeypatch):
+    release, _ = steps
+    monkeypatch.setattr(app_module, "STARTUP_WARMUP", True)
+    monkeypatch.setattr(app_module, "start_consolidation_scheduler", lambda: None)
+    monkeypatch.setattr(app_module, "start_keepalive", lambda: None)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                # Startup has completed while the slow step is still loading
+                await _wait_until(lambda: "imports" in warmup_state["steps"])
+                before = await client.get("/api/ready")
+                release.set()
+                await _wait_until(lambda: warmup_state["ready"])
+                after = await client.get("/api/ready")
+        return before, after
+
+    before, after = asyncio.run(scenario())
+
+    assert before.status_code == 503 and before.json()["ready"] is False
+    assert after.status_code == 200
+    assert after.json()["steps"]["broken_index"]["ok"] is False
+    assert after.json()["steps"]["slow_model"]["ok"] is True